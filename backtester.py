@@ -1,16 +1,30 @@
 import pandas as pd
 import numpy as np
 import yfinance as yf
-import talib
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import seaborn as sns
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import logging
+import os
+import time
+import uuid
+from functools import partial
 import warnings
 warnings.filterwarnings('ignore')
 
 from risk_manager import AdvancedRiskManager
+from monte_carlo import MonteCarloAnalyzer
+from performance_metrics import trade_metrics, equity_metrics, trades_to_arrays
+from equity_recorder import EquityRecorder
+from indicators import IndicatorEngine, PRICE_COLUMNS
+from indicator_cache import IndicatorCache
+from compact_bars import CompactBars, ACTIONS, ACTION_CODES
+from optimizer import ParameterRange, StrategyOptimizer, load_set_file
+from experiment_store import ExperimentStore, data_fingerprint
+from bar_store import BarStore, INTERVAL_TIMEFRAMES
+from execution_costs import ExecutionCosts
+from session_calendar import SessionCalendar
 
 class ForexBacktester:
     """
@@ -18,24 +32,108 @@ class ForexBacktester:
     بک‌تستر جامع استراتژی فارکس
     """
     
-    def __init__(self, initial_balance: float = 10000):
+    # Indicator columns read by the signal logic; only these (and their
+    # dependencies) are computed
+    REQUIRED_INDICATORS = [
+        'EMA_9', 'EMA_21', 'EMA_50', 'MACD', 'MACD_signal', 'RSI', 'Stoch_K', 'Stoch_D',
+        'BB_upper', 'BB_lower', 'ATR', 'ADX', 'DI_plus', 'DI_minus', 'SAR', 'OBV',
+    ]
+    
+    # Tunable strategy parameters; names follow Optimization_Settings.set
+    # where the EA has an equivalent input
+    DEFAULT_PARAMS = {
+        'FastMA': 9,
+        'SlowMA': 21,
+        'TrendMA': 50,
+        'SignalMA': 9,            # MACD signal period
+        'RSI_Period': 14,
+        'BB_Period': 20,
+        'BB_Deviation': 2.0,
+        'ADX_Period': 14,
+        'ATR_Period': 14,
+        'Stoch_K': 5,
+        'Stoch_D': 3,
+        'Stoch_Slowing': 3,
+        'ATR_SL_Multiplier': 2.0,
+        'ATR_TP_Multiplier': 4.0,
+        'RiskPercent': 2.0,
+        'SignalThreshold': 0.6,   # combined score needed for a BUY/SELL signal
+    }
+    
+    # Trade-offs explored by optimize_pareto (max_drawdown is negative, so higher is better)
+    PARETO_OBJECTIVES = [('total_return', 'max'), ('max_drawdown', 'max'), ('sharpe_ratio', 'max')]
+    
+    # Search ranges for parameters the .set file does not cover
+    EXTRA_PARAM_RANGES = [
+        ParameterRange('TrendMA', 40, 60, 5, is_int=True),
+        ParameterRange('SignalThreshold', 0.2, 0.6, 0.02),
+    ]
+    
+    # Bars skipped at the start while indicators warm up
+    SIGNAL_WARMUP = 100
+    
+    # Raw bars recomputed ahead of each streamed chunk: long enough for the
+    # recursive indicators (EMA, Wilder smoothing, SAR) to converge to the
+    # values an in-memory run computes from the first bar
+    STREAM_WARMUP = 2000
+    
+    # Part of every stored run's key; bump when signal or fill logic changes
+    # so results in an experiment store are recomputed
+    RESULTS_VERSION = 2
+    
+    def __init__(self, initial_balance: float = 10000, cache_dir: Optional[str] = None,
+                 equity_dir: Optional[str] = None, keep_equity_curve: bool = True,
+                 indicator_cache: Optional[IndicatorCache] = None, compact: bool = False,
+                 params: Optional[Dict] = None, experiment_store: Optional[ExperimentStore] = None,
+                 bar_store: Optional[BarStore] = None, costs: Optional[ExecutionCosts] = None,
+                 calendar: Optional[SessionCalendar] = None):
         """
         Initialize the backtester
         
         Args:
             initial_balance: Starting balance for backtesting
+            cache_dir: Optional directory for caching downloaded price data
+            equity_dir: Write equity curves to memory-mapped files in this directory (one file per run)
+            keep_equity_curve: Keep the equity curve (False = streaming statistics only)
+            indicator_cache: Shared indicator cache (default: on disk under cache_dir/indicators)
+            compact: Keep bars, indicators and signals in float32 structured arrays
+            params: Strategy parameter overrides (see DEFAULT_PARAMS)
+            experiment_store: Record every run here and load runs already stored instead of repeating them
+            bar_store: Local bar store read before falling back to yfinance
+            costs: Spread, slippage and commission charged on fills (default: fill at the close)
+            calendar: Only enter trades during these sessions (default: any bar)
         """
+        unknown = set(params or {}) - set(self.DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
         self.initial_balance = initial_balance
+        self.cache_dir = cache_dir
+        self.equity_dir = equity_dir
+        self.keep_equity_curve = keep_equity_curve
+        self.compact = compact
+        self.experiment_store = experiment_store
+        self.bar_store = bar_store
+        self.costs = costs
+        self.calendar = calendar
         self.current_balance = initial_balance
         
         # Risk manager
         self.risk_manager = AdvancedRiskManager(initial_balance)
         
+        # Indicator engine
+        if indicator_cache is None and cache_dir:
+            indicator_cache = IndicatorCache(cache_dir=os.path.join(cache_dir, 'indicators'))
+        self.indicators = IndicatorEngine(cache=indicator_cache)
+        
         # Backtest results
         self.trades = []
-        self.equity_curve = []
+        self.equity_curve = np.empty(0)
+        self.equity_recorder = None
         self.daily_returns = []
         self.performance_metrics = {}
+        self.bars_nbytes = 0
+        self.optimization_results = {}
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
@@ -44,10 +142,25 @@ class ForexBacktester:
     def get_forex_data(self, symbol: str, start_date: str, end_date: str, 
                       interval: str = '15m') -> pd.DataFrame:
         """
-        Get forex data using yfinance (for major pairs)
-        دریافت داده‌های فارکس با استفاده از yfinance
+        Get forex data from the local bar store, or yfinance (for major pairs)
+        دریافت داده‌های فارکس از پایگاه محلی یا yfinance
         """
         try:
+            # Imported history covers any range yfinance's intraday limits don't
+            if self.bar_store is not None and interval in INTERVAL_TIMEFRAMES:
+                data = self.bar_store.frame(symbol, INTERVAL_TIMEFRAMES[interval], start_date, end_date,
+                                            with_spread=True)
+                if not data.empty:
+                    return data
+            
+            # Serve from the local cache when possible
+            cache_path = None
+            if self.cache_dir:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                cache_path = os.path.join(self.cache_dir, f"{symbol}_{interval}_{start_date}_{end_date}.pkl")
+                if os.path.exists(cache_path):
+                    return pd.read_pickle(cache_path)
+            
             # Convert forex symbol to Yahoo Finance format
             if symbol == 'EURUSD':
                 yahoo_symbol = 'EURUSD=X'
@@ -79,91 +192,44 @@ class ForexBacktester:
             # Add tick_volume (simulate)
             data['tick_volume'] = data['volume'].fillna(1000)
             
+            if cache_path:
+                data.to_pickle(cache_path)
+            
             return data
             
         except Exception as e:
             self.logger.error(f"Error getting forex data: {e}")
             return pd.DataFrame()
     
-    def calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate technical indicators (same as main bot)"""
-        try:
-            # Price data
-            high = df['high'].values
-            low = df['low'].values
-            close = df['close'].values
-            volume = df['tick_volume'].values
-            
-            # Moving Averages
-            df['EMA_9'] = talib.EMA(close, timeperiod=9)
-            df['EMA_21'] = talib.EMA(close, timeperiod=21)
-            df['EMA_50'] = talib.EMA(close, timeperiod=50)
-            df['EMA_200'] = talib.EMA(close, timeperiod=200)
-            
-            df['SMA_20'] = talib.SMA(close, timeperiod=20)
-            df['SMA_50'] = talib.SMA(close, timeperiod=50)
-            
-            # MACD
-            df['MACD'], df['MACD_signal'], df['MACD_hist'] = talib.MACD(close)
-            
-            # RSI
-            df['RSI'] = talib.RSI(close, timeperiod=14)
-            df['RSI_9'] = talib.RSI(close, timeperiod=9)
-            
-            # Stochastic
-            df['Stoch_K'], df['Stoch_D'] = talib.STOCH(high, low, close)
-            
-            # Bollinger Bands
-            df['BB_upper'], df['BB_middle'], df['BB_lower'] = talib.BBANDS(close)
-            
-            # ATR for volatility
-            df['ATR'] = talib.ATR(high, low, close, timeperiod=14)
-            
-            # ADX for trend strength
-            df['ADX'] = talib.ADX(high, low, close, timeperiod=14)
-            df['DI_plus'] = talib.PLUS_DI(high, low, close, timeperiod=14)
-            df['DI_minus'] = talib.MINUS_DI(high, low, close, timeperiod=14)
-            
-            # Williams %R
-            df['Williams_R'] = talib.WILLR(high, low, close, timeperiod=14)
-            
-            # CCI
-            df['CCI'] = talib.CCI(high, low, close, timeperiod=14)
-            
-            # Parabolic SAR
-            df['SAR'] = talib.SAR(high, low)
-            
-            # Volume indicators
-            df['OBV'] = talib.OBV(close, volume)
-            df['AD'] = talib.AD(high, low, close, volume)
-            
-            # Support and Resistance levels
-            df = self.calculate_support_resistance(df)
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating indicators: {e}")
-            return df
+    def calculate_technical_indicators(self, df: pd.DataFrame, columns: Optional[List[str]] = None,
+                                       symbol: Optional[str] = None, timeframe: Optional[str] = None) -> pd.DataFrame:
+        """Calculate technical indicators (same engine as main bot)"""
+        return self.indicators.compute(df, columns or self.REQUIRED_INDICATORS, self.indicator_params(),
+                                       symbol=symbol, timeframe=timeframe)
+    
+    def indicator_params(self) -> Dict[str, Dict]:
+        """Indicator engine parameter overrides for the strategy parameters"""
+        p = self.params
+        return {
+            'EMA_9': {'timeperiod': p['FastMA']},
+            'EMA_21': {'timeperiod': p['SlowMA']},
+            'EMA_50': {'timeperiod': p['TrendMA']},
+            'MACD': {'signalperiod': p['SignalMA']},
+            'RSI': {'timeperiod': p['RSI_Period']},
+            'BBANDS': {'timeperiod': p['BB_Period'], 'nbdevup': p['BB_Deviation'], 'nbdevdn': p['BB_Deviation']},
+            'ATR': {'timeperiod': p['ATR_Period']},
+            'DI': {'timeperiod': p['ADX_Period']},
+            'ADX': {'timeperiod': p['ADX_Period']},
+            'STOCH': {'fastk_period': p['Stoch_K'], 'slowk_period': p['Stoch_Slowing'],
+                      'slowd_period': p['Stoch_D']},
+        }
     
     def calculate_support_resistance(self, df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
         """Calculate dynamic support and resistance levels"""
-        try:
-            df['Support'] = df['low'].rolling(window=window).min()
-            df['Resistance'] = df['high'].rolling(window=window).max()
-            
-            # Pivot points
-            df['Pivot'] = (df['high'] + df['low'] + df['close']) / 3
-            df['R1'] = 2 * df['Pivot'] - df['low']
-            df['S1'] = 2 * df['Pivot'] - df['high']
-            df['R2'] = df['Pivot'] + (df['high'] - df['low'])
-            df['S2'] = df['Pivot'] - (df['high'] - df['low'])
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating support/resistance: {e}")
-            return df
+        return self.indicators.compute(
+            df, ['Support', 'Resistance', 'Pivot', 'R1', 'S1', 'R2', 'S2'],
+            params={'SR': {'window': window}}
+        )
     
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -173,7 +239,7 @@ class ForexBacktester:
         try:
             signals = []
             
-            for i in range(100, len(df)):  # Start after indicators are calculated
+            for i in range(self.SIGNAL_WARMUP, len(df)):  # Start after indicators are calculated
                 try:
                     current_data = df.iloc[i-50:i+1]  # Get recent data for analysis
                     
@@ -203,8 +269,8 @@ class ForexBacktester:
                     })
             
             # Add signals to dataframe
-            signal_df = pd.DataFrame(signals, index=df.index[100:])
-            df = df.iloc[100:].copy()  # Align indices
+            signal_df = pd.DataFrame(signals, index=df.index[self.SIGNAL_WARMUP:])
+            df = df.iloc[self.SIGNAL_WARMUP:].copy()  # Align indices
             
             for col in signal_df.columns:
                 df[f'signal_{col}'] = signal_df[col]
@@ -303,14 +369,17 @@ class ForexBacktester:
                 'take_profit': 0
             }
             
-            if total_score > 0.6:
+            threshold = self.params['SignalThreshold']
+            sl_multiplier = self.params['ATR_SL_Multiplier']
+            tp_multiplier = self.params['ATR_TP_Multiplier']
+            if total_score > threshold:
                 signal['action'] = 'BUY'
-                signal['stop_loss'] = current_price - (data['ATR'].iloc[-1] * 2)
-                signal['take_profit'] = current_price + (data['ATR'].iloc[-1] * 4)
-            elif total_score < -0.6:
+                signal['stop_loss'] = current_price - (data['ATR'].iloc[-1] * sl_multiplier)
+                signal['take_profit'] = current_price + (data['ATR'].iloc[-1] * tp_multiplier)
+            elif total_score < -threshold:
                 signal['action'] = 'SELL'
-                signal['stop_loss'] = current_price + (data['ATR'].iloc[-1] * 2)
-                signal['take_profit'] = current_price - (data['ATR'].iloc[-1] * 4)
+                signal['stop_loss'] = current_price + (data['ATR'].iloc[-1] * sl_multiplier)
+                signal['take_profit'] = current_price - (data['ATR'].iloc[-1] * tp_multiplier)
             
             return signal
             
@@ -325,202 +394,647 @@ class ForexBacktester:
                 'take_profit': 0
             }
     
+    def prepare_compact_bars(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                             timeframe: Optional[str] = None) -> CompactBars:
+        """
+        Calculate indicators and signals into compact float32 storage
+        محاسبه اندیکاتورها و سیگنال‌ها در حالت فشرده
+
+        Indicators and signals are computed from the float64 prices, so the
+        decisions match the standard path; values are rounded once as each
+        column is written into its field. Returns a view that skips the
+        warmup bars.
+        """
+        prices = [c for c in PRICE_COLUMNS if c in df.columns]
+        cost_columns = ['fill_cost'] if self.costs is not None else []
+        bars = CompactBars.allocate(df.index, prices + self.REQUIRED_INDICATORS + cost_columns,
+                                    float64_columns=('close', 'fill_cost'))
+        
+        data = {c: df[c].values for c in prices}
+        data.update(self.indicators.frame_arrays(df, self.REQUIRED_INDICATORS, self.indicator_params(),
+                                                 symbol=symbol, timeframe=timeframe))
+        if cost_columns:
+            data['fill_cost'] = self.fill_costs(symbol, df, data['ATR'])
+        for column, values in data.items():
+            bars[column] = values
+        
+        try:
+            for name, values in self.analyze_signals_vectorized(data).items():
+                bars[f'signal_{name}'] = values
+        except Exception as e:
+            self.logger.error(f"Error generating signals: {e}")
+            bars['signal_action'] = ACTION_CODES['HOLD']
+        
+        bars = bars[self.SIGNAL_WARMUP:]
+        self.apply_sessions(bars, symbol)
+        return bars
+    
+    def analyze_signals_vectorized(self, data) -> Dict[str, np.ndarray]:
+        """
+        analyze_signal for all bars at once
+
+        Scores are accumulated in the same order as analyze_signal so the
+        totals are bit-identical for the same inputs.
+        """
+        close = np.asarray(data['close'], dtype=np.float64)
+        n = len(close)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Trend analysis
+            trend_score = np.zeros(n)
+            ema_9, ema_21, ema_50 = data['EMA_9'], data['EMA_21'], data['EMA_50']
+            trend_score += np.where(ema_9 > ema_21, 0.3, 0.0)
+            trend_score -= np.where(ema_9 < ema_21, 0.3, 0.0)
+            trend_score += np.where(ema_21 > ema_50, 0.4, 0.0)
+            trend_score -= np.where(ema_21 < ema_50, 0.4, 0.0)
+            
+            # Momentum analysis
+            momentum_score = np.zeros(n)
+            rsi = data['RSI']
+            rsi_neutral = (rsi > 30) & (rsi < 70)
+            momentum_score += np.where(rsi_neutral & (rsi > 50), 0.3, 0.0)
+            momentum_score -= np.where(rsi_neutral & ~(rsi > 50), 0.3, 0.0)
+            
+            macd_up = data['MACD'] > data['MACD_signal']
+            momentum_score += np.where(macd_up, 0.3, 0.0)
+            momentum_score -= np.where(~macd_up, 0.3, 0.0)
+            
+            stoch_k, stoch_d = data['Stoch_K'], data['Stoch_D']
+            momentum_score += np.where((stoch_k > stoch_d) & (stoch_k < 80), 0.2, 0.0)
+            momentum_score -= np.where((stoch_k < stoch_d) & (stoch_k > 20), 0.2, 0.0)
+            
+            # Volume analysis: mean OBV change over the last 5 bars
+            volume_score = np.zeros(n)
+            obv_diff = np.diff(np.asarray(data['OBV'], dtype=np.float64), prepend=np.nan)
+            obv_trend = np.full(n, np.nan)
+            obv_trend[4:] = (obv_diff[1:-3] + obv_diff[2:-2] + obv_diff[3:-1] + obv_diff[4:]) / 4
+            volume_score += np.where(obv_trend > 0, 0.2, 0.0)
+            volume_score -= np.where(obv_trend < 0, 0.2, 0.0)
+            
+            # Support/Resistance analysis
+            sr_score = np.zeros(n)
+            bb_upper = np.asarray(data['BB_upper'], dtype=np.float64)
+            bb_lower = np.asarray(data['BB_lower'], dtype=np.float64)
+            bb_position = (close - bb_lower) / (bb_upper - bb_lower)
+            sr_score += np.where((bb_position > 0.2) & (bb_position < 0.4), 0.3, 0.0)
+            sr_score -= np.where((bb_position > 0.6) & (bb_position < 0.8), 0.3, 0.0)
+            
+            # Market structure
+            structure_score = np.zeros(n)
+            trending = data['ADX'] > 25
+            di_up = data['DI_plus'] > data['DI_minus']
+            structure_score += np.where(trending & di_up, 0.3, 0.0)
+            structure_score -= np.where(trending & ~di_up, 0.3, 0.0)
+            
+            above_sar = close > data['SAR']
+            structure_score += np.where(above_sar, 0.2, 0.0)
+            structure_score -= np.where(~above_sar, 0.2, 0.0)
+        
+        # Combine scores
+        total_score = (trend_score * 0.3 + momentum_score * 0.25 +
+                       volume_score * 0.15 + sr_score * 0.15 + structure_score * 0.15)
+        confidence = np.minimum(np.abs(total_score) * 100, 100)
+        
+        buy = total_score > self.params['SignalThreshold']
+        sell = total_score < -self.params['SignalThreshold']
+        action = np.full(n, ACTION_CODES['HOLD'], dtype=np.int8)
+        action[buy] = ACTION_CODES['BUY']
+        action[sell] = ACTION_CODES['SELL']
+        
+        atr = np.asarray(data['ATR'], dtype=np.float64)
+        sl_distance = atr * self.params['ATR_SL_Multiplier']
+        tp_distance = atr * self.params['ATR_TP_Multiplier']
+        stop_loss = np.where(buy, close - sl_distance, np.where(sell, close + sl_distance, 0.0))
+        take_profit = np.where(buy, close + tp_distance, np.where(sell, close - tp_distance, 0.0))
+        
+        return {
+            'action': action,
+            'strength': total_score,
+            'confidence': confidence,
+            'entry_price': close,
+            'stop_loss': stop_loss,
+            'take_profit': take_profit
+        }
+    
     def run_backtest(self, symbol: str, start_date: str, end_date: str,
-                    confidence_threshold: float = 75.0) -> Dict:
+                    confidence_threshold: float = 75.0, data: Optional[pd.DataFrame] = None) -> Dict:
         """
         Run comprehensive backtest
         اجرای بک‌تست جامع
+
+        Args:
+            data: Pre-loaded 15m bars (default: downloaded with get_forex_data)
         """
         try:
             self.logger.info(f"Starting backtest for {symbol} from {start_date} to {end_date}")
             
             # Get data
-            df = self.get_forex_data(symbol, start_date, end_date, '15m')
+            df = data if data is not None else self.get_forex_data(symbol, start_date, end_date, '15m')
             if df.empty:
                 return {}
             
-            # Calculate indicators
-            df = self.calculate_technical_indicators(df)
+            # Skip runs that are already in the experiment store
+            run_key = None
+            started = time.perf_counter()
+            if self.experiment_store is not None:
+                fingerprint = data_fingerprint(df)
+                n_bars = len(df)
+                settings = self.run_settings(confidence_threshold)
+                run_key = self.experiment_store.run_key(symbol, fingerprint, self.params, settings)
+                stored = self.experiment_store.load(run_key)
+                if stored is not None:
+                    return self.restore_run(stored)
+            
+            if self.compact:
+                # Indicators and signals go straight into float32 storage
+                bars = self.prepare_compact_bars(df, symbol=symbol, timeframe='15m')
+                del df
+                self.bars_nbytes = bars.nbytes
+            else:
+                # Calculate indicators
+                df = self.calculate_technical_indicators(df, symbol=symbol, timeframe='15m')
+                
+                # Generate signals
+                bars = self.generate_signals(df)
+                del df
+                if self.costs is not None:
+                    bars['fill_cost'] = self.fill_costs(symbol, bars)
+                self.apply_sessions(bars, symbol)
+                self.bars_nbytes = int(bars.memory_usage(index=True, deep=True).sum())
+            
+            self._start_run(symbol, start_date, end_date)
+            open_positions = {}
+            self._simulate_bars(bars, symbol, open_positions, confidence_threshold)
+            
+            # Close any remaining positions at the end
+            self._close_open_positions(open_positions, symbol, float(np.asarray(bars['close'])[-1]),
+                                       bars.index[-1], self._last_fill_cost(bars))
+            
+            self.equity_curve = self.equity_recorder.close()
+            
+            # Calculate performance metrics
+            self.performance_metrics = self.calculate_performance_metrics()
             
-            # Generate signals
-            df = self.generate_signals(df)
+            self.logger.info(f"Backtest completed. Total trades: {len(self.trades)}")
+            self.logger.info(f"Final balance: ${self.current_balance:.2f}")
             
-            # Initialize tracking
-            self.trades = []
-            self.equity_curve = [self.initial_balance]
-            self.current_balance = self.initial_balance
-            self.risk_manager = AdvancedRiskManager(self.initial_balance)
+            # A run without trades has no metrics; anything else missing them failed
+            if run_key is not None and (self.performance_metrics or not self.trades):
+                self.experiment_store.record(
+                    run_key, symbol, start_date, end_date, fingerprint, self.params,
+                    self.performance_metrics, self.trades, settings=settings, n_bars=n_bars,
+                    elapsed=time.perf_counter() - started
+                )
             
+            return self.performance_metrics
+            
+        except Exception as e:
+            self.logger.error(f"Error running backtest: {e}")
+            return {}
+    
+    def run_backtest_streaming(self, symbol: str, start_date: str, end_date: str,
+                               confidence_threshold: float = 75.0, data=None,
+                               chunk_bars: int = 100_000, warmup_bars: Optional[int] = None) -> Dict:
+        """
+        Run the backtest over consecutive chunks of bars
+        اجرای بک‌تست به‌صورت جریانی روی بخش‌های متوالی داده‌ها
+
+        Only one chunk has indicators and signals at a time, computed over the
+        chunk and the warmup_bars raw bars before it, so peak memory is set by
+        chunk_bars rather than the length of the range. Open positions,
+        balance, risk state and equity statistics carry across chunks, and
+        the trades match run_backtest on the same bars. Runs are not looked
+        up in or recorded to the experiment store.
+
+        Args:
+            data: Bars as a DataFrame or an iterable of consecutive DataFrames
+                (default: the bar store, read a month at a time, else get_forex_data)
+            chunk_bars: Bars per chunk
+            warmup_bars: Preceding bars indicators are recomputed over (default STREAM_WARMUP)
+        """
+        try:
+            self.logger.info(f"Starting streaming backtest for {symbol} from {start_date} to {end_date}")
+            warmup_bars = self.STREAM_WARMUP if warmup_bars is None else warmup_bars
+            
+            self._start_run(symbol, start_date, end_date)
             open_positions = {}
+            history = None
+            seen = 0
+            last_close = last_time = None
+            last_cost = 0.0
+            self.bars_nbytes = 0
+            
+            for chunk in self.stream_bars(symbol, start_date, end_date, data, chunk_bars):
+                if chunk.empty:
+                    continue
+                window = chunk if history is None else pd.concat([history, chunk])
+                skip = len(window) - len(chunk) + max(0, min(self.SIGNAL_WARMUP - seen, len(chunk)))
+                bars = self.prepare_window(window, skip, symbol)
+                self.bars_nbytes = max(self.bars_nbytes, bars.nbytes if self.compact else
+                                       int(bars.memory_usage(index=True, deep=True).sum()))
+                
+                if len(bars):
+                    self._simulate_bars(bars, symbol, open_positions, confidence_threshold,
+                                        first_bar=seen + len(chunk) - len(bars))
+                    last_cost = self._last_fill_cost(bars)
+                
+                seen += len(chunk)
+                last_close, last_time = float(chunk['close'].values[-1]), chunk.index[-1]
+                history = window.iloc[-warmup_bars:].copy() if warmup_bars else None
+                del window, bars
             
-            # Process each bar
-            for i, (timestamp, row) in enumerate(df.iterrows()):
-                try:
-                    current_price = row['close']
+            if seen <= self.SIGNAL_WARMUP:
+                self.logger.error(f"Not enough bars for {symbol}: {seen}")
+                return {}
+            
+            self._close_open_positions(open_positions, symbol, last_close, last_time, last_cost)
+            self.equity_curve = self.equity_recorder.close()
+            self.performance_metrics = self.calculate_performance_metrics()
+            
+            self.logger.info(f"Streaming backtest completed over {seen:,} bars. Total trades: {len(self.trades)}")
+            self.logger.info(f"Final balance: ${self.current_balance:.2f}")
+            
+            return self.performance_metrics
+            
+        except Exception as e:
+            self.logger.error(f"Error running streaming backtest: {e}")
+            return {}
+    
+    def stream_bars(self, symbol: str, start_date: str, end_date: str, data=None,
+                    chunk_bars: int = 100_000) -> Iterator[pd.DataFrame]:
+        """Consecutive 15m bar frames for a streaming run (see run_backtest_streaming)"""
+        if isinstance(data, pd.DataFrame):
+            for start in range(0, len(data), chunk_bars):
+                yield data.iloc[start:start + chunk_bars]
+            return
+        if data is not None:
+            yield from data
+            return
+        
+        if self.bar_store is not None:
+            found = False
+            for frame in self.bar_store.iter_frames(symbol, '15m', start_date, end_date, chunk_bars,
+                                                    with_spread=True):
+                found = True
+                yield frame
+            if found:
+                return
+        
+        # yfinance ranges are short enough to load at once
+        yield from self.stream_bars(symbol, start_date, end_date,
+                                    self.get_forex_data(symbol, start_date, end_date, '15m'), chunk_bars)
+    
+    def prepare_window(self, window: pd.DataFrame, skip: int, symbol: str):
+        """
+        Indicators and signals for a window of raw bars, dropping the first skip rows
+
+        Returns a DataFrame like generate_signals, or CompactBars in compact mode.
+        """
+        prices = {c: window[c].values for c in PRICE_COLUMNS if c in window.columns}
+        data = dict(prices)
+        data.update(self.indicators.compute_arrays(prices, self.REQUIRED_INDICATORS, self.indicator_params()))
+        signals = self.analyze_signals_vectorized(data)
+        index = window.index[skip:]
+        
+        cost_columns = []
+        if self.costs is not None:
+            data['fill_cost'] = self.fill_costs(symbol, window, data['ATR'])
+            cost_columns = ['fill_cost']
+        
+        if self.compact:
+            bars = CompactBars.allocate(index, list(prices) + self.REQUIRED_INDICATORS + cost_columns,
+                                        float64_columns=('close', 'fill_cost'))
+            for column, values in data.items():
+                bars[column] = values[skip:]
+            for name, values in signals.items():
+                bars[f'signal_{name}'] = values[skip:]
+            self.apply_sessions(bars, symbol)
+            return bars
+        
+        bars = pd.DataFrame({column: values[skip:] for column, values in data.items()}, index=index)
+        for name, values in signals.items():
+            bars[f'signal_{name}'] = values[skip:]
+        bars['signal_action'] = np.asarray(ACTIONS, dtype=object)[bars['signal_action'].values]
+        self.apply_sessions(bars, symbol)
+        return bars
+    
+    def fill_costs(self, symbol: str, bars: pd.DataFrame, atr: Optional[np.ndarray] = None) -> np.ndarray:
+        """Adverse fill distance from the close at each bar under the cost model"""
+        if atr is None:
+            atr = bars['ATR'].values
+        spread = bars['spread'].values if 'spread' in bars.columns else None
+        return self.costs.fill_offsets(symbol, bars.index, atr, spread)
+    
+    def apply_sessions(self, bars, symbol: Optional[str] = None):
+        """
+        Turn entry signals outside the calendar's sessions into HOLD (in place)
+
+        Open positions still exit on any bar, as they do live.
+        """
+        if self.calendar is None or len(bars) == 0:
+            return
+        closed = ~self.calendar.mask(bars.index, symbol)
+        if isinstance(bars, pd.DataFrame):
+            bars.loc[closed, 'signal_action'] = 'HOLD'
+        else:
+            bars['signal_action'] = np.where(closed, ACTION_CODES['HOLD'], bars['signal_action'])
+    
+    @staticmethod
+    def _last_fill_cost(bars) -> float:
+        return float(np.asarray(bars['fill_cost'])[-1]) if 'fill_cost' in bars.columns else 0.0
+    
+    def _start_run(self, symbol: str, start_date: str, end_date: str):
+        """Reset balance, trades, risk manager and equity recorder for a new run"""
+        self.trades = []
+        equity_path = None
+        if self.equity_dir:
+            # Unique per run: optimizer and validation workers backtest the same symbol and dates at once
+            run_id = f"{os.getpid()}_{uuid.uuid4().hex[:8]}"
+            equity_path = os.path.join(self.equity_dir, f"{symbol}_{start_date}_{end_date}_{run_id}_equity.f64")
+        self.equity_recorder = EquityRecorder(
+            self.initial_balance, path=equity_path, keep_curve=self.keep_equity_curve
+        )
+        self.current_balance = self.initial_balance
+        self.risk_manager = AdvancedRiskManager(self.initial_balance)
+        self.risk_manager.max_risk_per_trade = self.params['RiskPercent'] / 100
+    
+    def _simulate_bars(self, bars, symbol: str, open_positions: Dict, confidence_threshold: float,
+                       first_bar: int = 0):
+        """
+        Trade through bars with signals, updating open_positions, balance and equity in place
+
+        Args:
+            bars: Bars with indicator and signal columns (DataFrame or CompactBars)
+            open_positions: Positions carried in from earlier bars (modified in place)
+            first_bar: Position of bars[0] in the whole run (for log messages)
+        """
+        # Process each bar
+        has_costs = 'fill_cost' in bars.columns
+        for i, (timestamp, row) in enumerate(bars.iterrows()):
+            try:
+                current_price = row['close']
+                fill_cost = row['fill_cost'] if has_costs else 0.0
+                
+                # Check for position exits first
+                positions_to_close = []
+                for pos_id, position in open_positions.items():
+                    should_close = False
+                    close_reason = ""
                     
-                    # Check for position exits first
-                    positions_to_close = []
-                    for pos_id, position in open_positions.items():
-                        should_close = False
-                        close_reason = ""
-                        
-                        if position['type'] == 'BUY':
-                            # Check stop loss
-                            if current_price <= position['stop_loss']:
-                                should_close = True
-                                close_reason = "Stop Loss"
-                            # Check take profit
-                            elif current_price >= position['take_profit']:
-                                should_close = True
-                                close_reason = "Take Profit"
-                        else:  # SELL
-                            # Check stop loss
-                            if current_price >= position['stop_loss']:
-                                should_close = True
-                                close_reason = "Stop Loss"
-                            # Check take profit
-                            elif current_price <= position['take_profit']:
-                                should_close = True
-                                close_reason = "Take Profit"
-                        
-                        if should_close:
-                            positions_to_close.append((pos_id, close_reason))
+                    if position['type'] == 'BUY':
+                        # Check stop loss
+                        if current_price <= position['stop_loss']:
+                            should_close = True
+                            close_reason = "Stop Loss"
+                        # Check take profit
+                        elif current_price >= position['take_profit']:
+                            should_close = True
+                            close_reason = "Take Profit"
+                    else:  # SELL
+                        # Check stop loss
+                        if current_price >= position['stop_loss']:
+                            should_close = True
+                            close_reason = "Stop Loss"
+                        # Check take profit
+                        elif current_price <= position['take_profit']:
+                            should_close = True
+                            close_reason = "Take Profit"
                     
-                    # Close positions
-                    for pos_id, close_reason in positions_to_close:
-                        position = open_positions[pos_id]
-                        
-                        # Calculate P&L
-                        if position['type'] == 'BUY':
-                            pnl = (current_price - position['entry_price']) * position['size'] * 10
+                    if should_close:
+                        positions_to_close.append((pos_id, close_reason))
+                
+                # Close positions
+                for pos_id, close_reason in positions_to_close:
+                    position = open_positions[pos_id]
+                    
+                    # Calculate P&L (fills are fill_cost worse than the close)
+                    if position['type'] == 'BUY':
+                        exit_price = current_price - fill_cost
+                        pnl = (exit_price - position['entry_price']) * position['size'] * 10
+                    else:
+                        exit_price = current_price + fill_cost
+                        pnl = (position['entry_price'] - exit_price) * position['size'] * 10
+                    
+                    # Update balance
+                    self.current_balance += pnl
+                    
+                    # Record trade
+                    trade_record = {
+                        'entry_time': position['entry_time'],
+                        'exit_time': timestamp,
+                        'symbol': symbol,
+                        'type': position['type'],
+                        'size': position['size'],
+                        'entry_price': position['entry_price'],
+                        'exit_price': exit_price,
+                        'stop_loss': position['stop_loss'],
+                        'take_profit': position['take_profit'],
+                        'pnl': pnl,
+                        'pnl_pct': (pnl / self.initial_balance) * 100,
+                        'exit_reason': close_reason,
+                        'duration': (timestamp - position['entry_time']).total_seconds() / 3600,
+                        'confidence': position['confidence']
+                    }
+                    
+                    self.trades.append(trade_record)
+                    
+                    # Update risk manager
+                    self.risk_manager.close_position(pos_id, exit_price, timestamp)
+                    
+                    # Remove from open positions
+                    del open_positions[pos_id]
+                
+                # Check for new entry signals
+                if (row['signal_action'] in ['BUY', 'SELL'] and 
+                    row['signal_confidence'] >= confidence_threshold and
+                    len(open_positions) < 3):  # Max 3 concurrent positions for backtest
+                    
+                    # Calculate position size
+                    volatility = row['ATR'] / current_price
+                    position_size = self.risk_manager.calculate_position_size(
+                        symbol, current_price, row['signal_stop_loss'], 
+                        self.current_balance, volatility
+                    )
+                    
+                    # Check if position can be opened
+                    can_open, reason = self.risk_manager.can_open_position(
+                        symbol, position_size, current_price
+                    )
+                    
+                    if can_open:
+                        # Create position
+                        pos_id = f"{symbol}_{timestamp.strftime('%Y%m%d_%H%M%S')}"
+                        if row['signal_action'] == 'BUY':
+                            entry_price = current_price + fill_cost
                         else:
-                            pnl = (position['entry_price'] - current_price) * position['size'] * 10
-                        
-                        # Update balance
-                        self.current_balance += pnl
+                            entry_price = current_price - fill_cost
                         
-                        # Record trade
-                        trade_record = {
-                            'entry_time': position['entry_time'],
-                            'exit_time': timestamp,
-                            'symbol': symbol,
-                            'type': position['type'],
-                            'size': position['size'],
-                            'entry_price': position['entry_price'],
-                            'exit_price': current_price,
-                            'stop_loss': position['stop_loss'],
-                            'take_profit': position['take_profit'],
-                            'pnl': pnl,
-                            'pnl_pct': (pnl / self.initial_balance) * 100,
-                            'exit_reason': close_reason,
-                            'duration': (timestamp - position['entry_time']).total_seconds() / 3600,
-                            'confidence': position['confidence']
+                        position = {
+                            'id': pos_id,
+                            'entry_time': timestamp,
+                            'type': row['signal_action'],
+                            'size': position_size,
+                            'entry_price': entry_price,
+                            'stop_loss': row['signal_stop_loss'],
+                            'take_profit': row['signal_take_profit'],
+                            'confidence': row['signal_confidence']
                         }
                         
-                        self.trades.append(trade_record)
+                        open_positions[pos_id] = position
                         
                         # Update risk manager
-                        self.risk_manager.close_position(pos_id, current_price, timestamp)
-                        
-                        # Remove from open positions
-                        del open_positions[pos_id]
-                    
-                    # Check for new entry signals
-                    if (row['signal_action'] in ['BUY', 'SELL'] and 
-                        row['signal_confidence'] >= confidence_threshold and
-                        len(open_positions) < 3):  # Max 3 concurrent positions for backtest
-                        
-                        # Calculate position size
-                        volatility = row['ATR'] / current_price
-                        position_size = self.risk_manager.calculate_position_size(
-                            symbol, current_price, row['signal_stop_loss'], 
-                            self.current_balance, volatility
-                        )
-                        
-                        # Check if position can be opened
-                        can_open, reason = self.risk_manager.can_open_position(
-                            symbol, position_size, current_price
+                        self.risk_manager.add_position(
+                            symbol, position_size, entry_price,
+                            row['signal_stop_loss'], row['signal_take_profit'],
+                            row['signal_action'], position_id=pos_id, entry_time=timestamp
                         )
-                        
-                        if can_open:
-                            # Create position
-                            pos_id = f"{symbol}_{timestamp.strftime('%Y%m%d_%H%M%S')}"
-                            
-                            position = {
-                                'id': pos_id,
-                                'entry_time': timestamp,
-                                'type': row['signal_action'],
-                                'size': position_size,
-                                'entry_price': current_price,
-                                'stop_loss': row['signal_stop_loss'],
-                                'take_profit': row['signal_take_profit'],
-                                'confidence': row['signal_confidence']
-                            }
-                            
-                            open_positions[pos_id] = position
-                            
-                            # Update risk manager
-                            self.risk_manager.add_position(
-                                symbol, position_size, current_price,
-                                row['signal_stop_loss'], row['signal_take_profit'],
-                                row['signal_action']
-                            )
-                    
-                    # Update equity curve
-                    unrealized_pnl = 0
-                    for position in open_positions.values():
-                        if position['type'] == 'BUY':
-                            unrealized_pnl += (current_price - position['entry_price']) * position['size'] * 10
-                        else:
-                            unrealized_pnl += (position['entry_price'] - current_price) * position['size'] * 10
-                    
-                    current_equity = self.current_balance + unrealized_pnl
-                    self.equity_curve.append(current_equity)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing bar {i}: {e}")
-                    continue
-            
-            # Close any remaining positions at the end
-            for pos_id, position in open_positions.items():
-                final_price = df['close'].iloc[-1]
-                
-                if position['type'] == 'BUY':
-                    pnl = (final_price - position['entry_price']) * position['size'] * 10
-                else:
-                    pnl = (position['entry_price'] - final_price) * position['size'] * 10
                 
-                self.current_balance += pnl
+                # Update equity curve
+                unrealized_pnl = 0
+                for position in open_positions.values():
+                    if position['type'] == 'BUY':
+                        unrealized_pnl += (current_price - position['entry_price']) * position['size'] * 10
+                    else:
+                        unrealized_pnl += (position['entry_price'] - current_price) * position['size'] * 10
                 
-                trade_record = {
-                    'entry_time': position['entry_time'],
-                    'exit_time': df.index[-1],
-                    'symbol': symbol,
-                    'type': position['type'],
-                    'size': position['size'],
-                    'entry_price': position['entry_price'],
-                    'exit_price': final_price,
-                    'stop_loss': position['stop_loss'],
-                    'take_profit': position['take_profit'],
-                    'pnl': pnl,
-                    'pnl_pct': (pnl / self.initial_balance) * 100,
-                    'exit_reason': 'End of Test',
-                    'duration': (df.index[-1] - position['entry_time']).total_seconds() / 3600,
-                    'confidence': position['confidence']
-                }
+                current_equity = self.current_balance + unrealized_pnl
+                self.equity_recorder.record(current_equity)
                 
-                self.trades.append(trade_record)
+            except Exception as e:
+                self.logger.error(f"Error processing bar {first_bar + i}: {e}")
+                continue
+    
+    def _close_open_positions(self, open_positions: Dict, symbol: str, final_price: float, final_time,
+                              fill_cost: float = 0.0):
+        """Close everything still open at the last bar of the run"""
+        for pos_id, position in open_positions.items():
+            
+            if position['type'] == 'BUY':
+                exit_price = final_price - fill_cost
+                pnl = (exit_price - position['entry_price']) * position['size'] * 10
+            else:
+                exit_price = final_price + fill_cost
+                pnl = (position['entry_price'] - exit_price) * position['size'] * 10
+            
+            self.current_balance += pnl
+            
+            trade_record = {
+                'entry_time': position['entry_time'],
+                'exit_time': final_time,
+                'symbol': symbol,
+                'type': position['type'],
+                'size': position['size'],
+                'entry_price': position['entry_price'],
+                'exit_price': exit_price,
+                'stop_loss': position['stop_loss'],
+                'take_profit': position['take_profit'],
+                'pnl': pnl,
+                'pnl_pct': (pnl / self.initial_balance) * 100,
+                'exit_reason': 'End of Test',
+                'duration': (final_time - position['entry_time']).total_seconds() / 3600,
+                'confidence': position['confidence']
+            }
             
-            # Calculate performance metrics
-            self.performance_metrics = self.calculate_performance_metrics()
+            self.trades.append(trade_record)
+        
+        open_positions.clear()
+    
+    def run_settings(self, confidence_threshold: float) -> Dict:
+        """Backtest settings besides the strategy parameters that change a run's result"""
+        settings = {
+            'confidence_threshold': confidence_threshold,
+            'initial_balance': self.initial_balance,
+            'version': self.RESULTS_VERSION,
+        }
+        # Only compact runs and runs with costs or sessions carry them, so keys of other runs are unchanged
+        if self.compact:
+            settings['compact'] = True
+        if self.costs is not None:
+            settings['costs'] = self.costs.to_dict()
+        if self.calendar is not None:
+            settings['sessions'] = self.calendar.to_dict()
+        return settings
+    
+    def restore_run(self, stored: Dict) -> Dict:
+        """
+        Load a stored run's trades and metrics as if it had just been run
+        
+        The equity curve is not stored, so plots of restored runs show trades only.
+        """
+        self.trades = stored['trades']
+        self.performance_metrics = stored['metrics']
+        self.current_balance = self.performance_metrics.get(
+            'final_balance', self.initial_balance + sum(t['pnl'] for t in self.trades)
+        )
+        self.equity_curve = np.empty(0)
+        self.equity_recorder = None
+        
+        self.logger.info(f"Loaded stored run {stored['id']} for {stored['symbol']} "
+                       f"({len(self.trades)} trades)")
+        return self.performance_metrics
+    
+    def check_compact_accuracy(self, symbol: str, start_date: str, end_date: str,
+                               confidence_threshold: float = 75.0,
+                               data: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Confirm that compact (float32) mode makes the same trading decisions
+        بررسی یکسان بودن تصمیمات معاملاتی در حالت فشرده
+
+        Runs the backtest in both modes on the same bars and compares every
+        trade's entry, exit, direction and exit reason.
+        """
+        try:
+            if data is None:
+                data = self.get_forex_data(symbol, start_date, end_date, '15m')
+            if data.empty:
+                return {}
             
-            self.logger.info(f"Backtest completed. Total trades: {len(self.trades)}")
-            self.logger.info(f"Final balance: ${self.current_balance:.2f}")
+            runs = {}
+            for compact in (False, True):
+                backtester = ForexBacktester(self.initial_balance, compact=compact,
+                                             indicator_cache=self.indicators.cache, params=self.params,
+                                             costs=self.costs, calendar=self.calendar)
+                backtester.run_backtest(symbol, start_date, end_date, confidence_threshold, data=data.copy())
+                runs[compact] = backtester
+            standard, compact = runs[False], runs[True]
+            
+            def decisions(trades):
+                return [(t['entry_time'], t['exit_time'], t['type'], t['exit_reason']) for t in trades]
+            
+            standard_decisions = decisions(standard.trades)
+            compact_decisions = decisions(compact.trades)
+            mismatched = sum(a != b for a, b in zip(standard_decisions, compact_decisions))
+            mismatched += abs(len(standard_decisions) - len(compact_decisions))
+            
+            pnl_diff = 0.0
+            if mismatched == 0 and standard.trades:
+                pnl_diff = float(np.max(np.abs(
+                    np.array([t['pnl'] for t in standard.trades]) -
+                    np.array([t['pnl'] for t in compact.trades])
+                )))
+            
+            result = {
+                'decisions_match': mismatched == 0,
+                'standard_trades': len(standard.trades),
+                'compact_trades': len(compact.trades),
+                'mismatched_trades': mismatched,
+                'max_pnl_diff': pnl_diff,
+                'final_balance_diff': compact.current_balance - standard.current_balance,
+                'standard_bytes': standard.bars_nbytes,
+                'compact_bytes': compact.bars_nbytes,
+                'memory_ratio': compact.bars_nbytes / standard.bars_nbytes if standard.bars_nbytes else 0
+            }
             
-            return self.performance_metrics
+            if result['decisions_match']:
+                self.logger.info(f"Compact mode matches for {symbol}: {len(compact.trades)} trades, "
+                                 f"{result['memory_ratio']:.0%} of the memory")
+            else:
+                self.logger.warning(f"Compact mode changed {mismatched} trading decisions for {symbol}")
+            
+            return result
             
         except Exception as e:
-            self.logger.error(f"Error running backtest: {e}")
+            self.logger.error(f"Error checking compact accuracy: {e}")
             return {}
     
     def calculate_performance_metrics(self) -> Dict:
@@ -529,133 +1043,193 @@ class ForexBacktester:
             if not self.trades:
                 return {}
             
-            trades_df = pd.DataFrame(self.trades)
-            
-            # Basic metrics
-            total_trades = len(trades_df)
-            winning_trades = trades_df[trades_df['pnl'] > 0]
-            losing_trades = trades_df[trades_df['pnl'] < 0]
-            
-            win_rate = len(winning_trades) / total_trades * 100
-            loss_rate = len(losing_trades) / total_trades * 100
-            
-            # P&L metrics
-            total_pnl = trades_df['pnl'].sum()
-            total_return = (self.current_balance - self.initial_balance) / self.initial_balance * 100
-            
-            avg_win = winning_trades['pnl'].mean() if not winning_trades.empty else 0
-            avg_loss = losing_trades['pnl'].mean() if not losing_trades.empty else 0
-            
-            largest_win = winning_trades['pnl'].max() if not winning_trades.empty else 0
-            largest_loss = losing_trades['pnl'].min() if not losing_trades.empty else 0
-            
-            # Profit factor
-            gross_profit = winning_trades['pnl'].sum() if not winning_trades.empty else 0
-            gross_loss = abs(losing_trades['pnl'].sum()) if not losing_trades.empty else 0
-            profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-            
-            # Risk metrics
-            equity_series = pd.Series(self.equity_curve)
-            returns = equity_series.pct_change().dropna()
-            
-            # Drawdown calculation
-            peak = equity_series.expanding().max()
-            drawdown = (equity_series - peak) / peak * 100
-            max_drawdown = drawdown.min()
-            
-            # Sharpe ratio
-            if len(returns) > 1 and returns.std() > 0:
-                sharpe_ratio = returns.mean() / returns.std() * np.sqrt(252 * 24 * 4)  # 15min intervals
+            arrays = trades_to_arrays(self.trades)
+            trade_stats = trade_metrics(
+                arrays['pnl'], arrays['entry_times'], arrays['durations'],
+                self.initial_balance, self.current_balance
+            )
+            if self.equity_recorder is not None:
+                equity_stats = self.equity_recorder.get_stats()
             else:
-                sharpe_ratio = 0
+                equity_stats = equity_metrics(np.asarray(self.equity_curve))
             
-            # Sortino ratio
-            negative_returns = returns[returns < 0]
-            if len(negative_returns) > 1 and negative_returns.std() > 0:
-                sortino_ratio = returns.mean() / negative_returns.std() * np.sqrt(252 * 24 * 4)
-            else:
-                sortino_ratio = 0
+            total_return = trade_stats['total_return']
+            max_drawdown = equity_stats['max_drawdown']
             
             # Calmar ratio
             calmar_ratio = total_return / abs(max_drawdown) if max_drawdown < 0 else 0
             
-            # Trade duration analysis
-            avg_trade_duration = trades_df['duration'].mean()
-            avg_winning_duration = winning_trades['duration'].mean() if not winning_trades.empty else 0
-            avg_losing_duration = losing_trades['duration'].mean() if not losing_trades.empty else 0
-            
-            # Consecutive wins/losses
-            consecutive_wins = 0
-            consecutive_losses = 0
-            max_consecutive_wins = 0
-            max_consecutive_losses = 0
-            
-            for pnl in trades_df['pnl']:
-                if pnl > 0:
-                    consecutive_wins += 1
-                    consecutive_losses = 0
-                    max_consecutive_wins = max(max_consecutive_wins, consecutive_wins)
-                else:
-                    consecutive_losses += 1
-                    consecutive_wins = 0
-                    max_consecutive_losses = max(max_consecutive_losses, consecutive_losses)
-            
-            # Monthly returns
-            trades_df['month'] = pd.to_datetime(trades_df['entry_time']).dt.to_period('M')
-            monthly_returns = trades_df.groupby('month')['pnl'].sum()
-            winning_months = len(monthly_returns[monthly_returns > 0])
-            total_months = len(monthly_returns)
-            monthly_win_rate = winning_months / total_months * 100 if total_months > 0 else 0
-            
             return {
                 # Basic metrics
-                'total_trades': total_trades,
-                'winning_trades': len(winning_trades),
-                'losing_trades': len(losing_trades),
-                'win_rate': win_rate,
-                'loss_rate': loss_rate,
+                'total_trades': trade_stats['total_trades'],
+                'winning_trades': trade_stats['winning_trades'],
+                'losing_trades': trade_stats['losing_trades'],
+                'win_rate': trade_stats['win_rate'],
+                'loss_rate': trade_stats['loss_rate'],
                 
                 # P&L metrics
-                'total_pnl': total_pnl,
+                'total_pnl': trade_stats['total_pnl'],
                 'total_return': total_return,
-                'gross_profit': gross_profit,
-                'gross_loss': gross_loss,
-                'profit_factor': profit_factor,
-                'avg_win': avg_win,
-                'avg_loss': avg_loss,
-                'largest_win': largest_win,
-                'largest_loss': largest_loss,
+                'gross_profit': trade_stats['gross_profit'],
+                'gross_loss': trade_stats['gross_loss'],
+                'profit_factor': trade_stats['profit_factor'],
+                'avg_win': trade_stats['avg_win'],
+                'avg_loss': trade_stats['avg_loss'],
+                'largest_win': trade_stats['largest_win'],
+                'largest_loss': trade_stats['largest_loss'],
                 
                 # Risk metrics
                 'max_drawdown': max_drawdown,
-                'sharpe_ratio': sharpe_ratio,
-                'sortino_ratio': sortino_ratio,
+                'sharpe_ratio': equity_stats['sharpe_ratio'],
+                'sortino_ratio': equity_stats['sortino_ratio'],
                 'calmar_ratio': calmar_ratio,
                 
                 # Duration metrics
-                'avg_trade_duration': avg_trade_duration,
-                'avg_winning_duration': avg_winning_duration,
-                'avg_losing_duration': avg_losing_duration,
+                'avg_trade_duration': trade_stats['avg_trade_duration'],
+                'avg_winning_duration': trade_stats['avg_winning_duration'],
+                'avg_losing_duration': trade_stats['avg_losing_duration'],
                 
                 # Streak metrics
-                'max_consecutive_wins': max_consecutive_wins,
-                'max_consecutive_losses': max_consecutive_losses,
+                'max_consecutive_wins': trade_stats['max_consecutive_wins'],
+                'max_consecutive_losses': trade_stats['max_consecutive_losses'],
                 
                 # Monthly metrics
-                'monthly_win_rate': monthly_win_rate,
-                'winning_months': winning_months,
-                'total_months': total_months,
+                'monthly_win_rate': trade_stats['monthly_win_rate'],
+                'winning_months': trade_stats['winning_months'],
+                'total_months': trade_stats['total_months'],
                 
                 # Balance info
                 'initial_balance': self.initial_balance,
                 'final_balance': self.current_balance,
-                'peak_balance': max(self.equity_curve),
+                'peak_balance': equity_stats['peak_balance'],
             }
             
         except Exception as e:
             self.logger.error(f"Error calculating performance metrics: {e}")
             return {}
     
+    def optimization_space(self, settings_file: str = 'Optimization_Settings.set') -> List[ParameterRange]:
+        """
+        Search ranges for the strategy parameters
+
+        Inputs flagged for optimization in the .set file that the strategy
+        uses, plus EXTRA_PARAM_RANGES for parameters the file does not cover.
+        """
+        space = []
+        if settings_file and os.path.exists(settings_file):
+            space = load_set_file(settings_file, names=self.DEFAULT_PARAMS)
+        names = {p.name for p in space}
+        space += [p for p in self.EXTRA_PARAM_RANGES if p.name not in names]
+        return space
+    
+    def optimize(self, symbol: str, start_date: str, end_date: str,
+                 space: Optional[List[ParameterRange]] = None, n_trials: int = 200,
+                 batch_size: int = 8, objective='sharpe_ratio', confidence_threshold: float = 0.0,
+                 settings_file: str = 'Optimization_Settings.set', rungs=(0.25, 0.5, 1.0), eta: float = 3,
+                 max_workers: Optional[int] = None, seed: Optional[int] = None) -> Dict:
+        """
+        Search strategy parameters adaptively instead of over a full grid
+        بهینه‌سازی تطبیقی پارامترهای استراتژی
+
+        Parameter sets are proposed in parallel batches by a TPE sampler and
+        pruned early on the start of the date range (see StrategyOptimizer).
+        The best parameters are applied to this backtester. With an
+        experiment store every trial is recorded, and trials stored by an
+        earlier search are loaded instead of rerun.
+
+        Args:
+            space: Parameter ranges (default: optimization_space(settings_file))
+            n_trials: Parameter sets to try
+            batch_size: Parameter sets evaluated in parallel per batch
+            objective: Metric name or function of the metrics to maximize, or a
+                list of (metric, 'max'/'min') pairs for a Pareto search
+            confidence_threshold: Minimum signal confidence; SignalThreshold
+                is searched instead by default
+            rungs: Date range fractions candidates must survive
+            eta: Keep the best 1/eta of candidates at each rung
+            max_workers: Worker processes (1 = run in this process)
+        """
+        try:
+            data = self.get_forex_data(symbol, start_date, end_date, '15m')
+            if data.empty:
+                return {}
+            
+            if space is None:
+                space = self.optimization_space(settings_file)
+            
+            evaluate = partial(
+                run_optimization_trial, symbol=symbol, data=data, initial_balance=self.initial_balance,
+                confidence_threshold=confidence_threshold, compact=self.compact, base_params=self.params,
+                results_db=self.experiment_store.path if self.experiment_store is not None else None,
+                costs=self.costs, calendar=self.calendar
+            )
+            optimizer = StrategyOptimizer(
+                space, evaluate, objective=objective, batch_size=batch_size, rungs=rungs,
+                eta=eta, max_workers=max_workers, seed=seed
+            )
+            
+            self.logger.info(f"Optimizing {len(space)} parameters for {symbol} "
+                           f"({optimizer.grid_size:.3g} grid combinations, {n_trials} trials)")
+            results = optimizer.optimize(n_trials)
+            
+            if 'pareto_front' in results:
+                self.logger.info(f"Pareto front: {len(results['pareto_front'])} parameter sets after "
+                               f"{results['backtests_equivalent']:.1f} full-backtest equivalents")
+            elif results['best_params']:
+                self.params = {**self.params, **results['best_params']}
+                self.logger.info(f"Best {objective if isinstance(objective, str) else 'score'}: "
+                               f"{results['best_score']:.4f} after {results['backtests_equivalent']:.1f} "
+                               f"full-backtest equivalents")
+            
+            self.optimization_results = results
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error optimizing parameters: {e}")
+            return {}
+    
+    def optimize_pareto(self, symbol: str, start_date: str, end_date: str,
+                        objectives: Optional[List[Tuple[str, str]]] = None, **kwargs) -> Dict:
+        """
+        Find the trade-off frontier between return, drawdown and Sharpe ratio
+        یافتن جبهه پارتو بین بازده، افت سرمایه و نسبت شارپ
+
+        Same search as optimize() but ranked by non-dominated sorting; returns
+        the Pareto front of full-range results instead of a single best set
+        (the backtester's parameters are left unchanged).
+        """
+        return self.optimize(symbol, start_date, end_date,
+                             objective=objectives or self.PARETO_OBJECTIVES, **kwargs)
+    
+    def run_monte_carlo(self, n_paths: int = 100_000, method: str = 'bootstrap',
+                        slippage_pips: float = 0.0, ruin_threshold: float = 0.5,
+                        seed: Optional[int] = None) -> Dict:
+        """
+        Estimate drawdown, return and ruin distributions by resampling trades
+        تخمین توزیع افت سرمایه و ریسک ورشکستگی با شبیه‌سازی مونت‌کارلو
+        """
+        try:
+            if not self.trades:
+                self.logger.error("No backtest trades for Monte Carlo analysis")
+                return {}
+            
+            analyzer = MonteCarloAnalyzer(self.initial_balance, seed=seed)
+            results = analyzer.run(
+                self.trades, n_paths=n_paths, method=method,
+                slippage_pips=slippage_pips, ruin_threshold=ruin_threshold
+            )
+            
+            if results:
+                self.performance_metrics['monte_carlo'] = results
+                self.logger.info(f"Monte Carlo: median max drawdown {results['max_drawdown']['p50']:.2f}%, "
+                               f"ruin probability {results['ruin_probability']:.2f}%")
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error running Monte Carlo analysis: {e}")
+            return {}
+    
     def plot_results(self, save_path: str = None):
         """
         Plot comprehensive backtest results
@@ -678,9 +1252,9 @@ class ForexBacktester:
             axes[0, 0].grid(True, alpha=0.3)
             
             # Add drawdown
-            equity_series = pd.Series(self.equity_curve)
-            peak = equity_series.expanding().max()
-            drawdown = (equity_series - peak) / peak * 100
+            equity = np.asarray(self.equity_curve)
+            peak = np.maximum.accumulate(equity) if len(equity) else equity
+            drawdown = (equity - peak) / peak * 100
             
             ax_dd = axes[0, 0].twinx()
             ax_dd.fill_between(range(len(drawdown)), drawdown, 0, alpha=0.3, color='red')
@@ -791,6 +1365,15 @@ class ForexBacktester:
             - Monthly Win Rate: {self.performance_metrics['monthly_win_rate']:.1f}%
             - Winning Months: {self.performance_metrics['winning_months']}/{self.performance_metrics['total_months']}
             
+            """
+            
+            # Monte Carlo robustness (if run)
+            if 'monte_carlo' in self.performance_metrics:
+                report += MonteCarloAnalyzer(self.initial_balance).format_report(
+                    self.performance_metrics['monte_carlo']
+                )
+            
+            report += """
             STRATEGY ASSESSMENT:
             """
             
@@ -835,6 +1418,59 @@ class ForexBacktester:
             self.logger.error(f"Error generating report: {e}")
             return "Error generating report"
 
+def run_backtest_job(symbol: str, start_date: str, end_date: str,
+                     initial_balance: float = 10000, confidence_threshold: float = 75.0,
+                     cache_dir: Optional[str] = None, compact: bool = False,
+                     results_db: Optional[str] = None, bar_store: Optional[str] = None,
+                     costs: Optional[Dict] = None, sessions: Optional[Dict] = None) -> Dict:
+    """
+    Run a single backtest in isolation (picklable entry point for process pools)
+    اجرای یک بک‌تست مستقل برای استفاده در پردازش موازی
+    """
+    store = ExperimentStore(results_db) if results_db else None
+    try:
+        backtester = ForexBacktester(initial_balance, cache_dir=cache_dir, compact=compact,
+                                     experiment_store=store,
+                                     bar_store=BarStore(bar_store) if bar_store else None,
+                                     costs=ExecutionCosts.from_config(costs),
+                                     calendar=SessionCalendar.from_config(sessions) if sessions else None)
+        return backtester.run_backtest(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            confidence_threshold=confidence_threshold
+        )
+    finally:
+        if store is not None:
+            store.close()
+
+def run_optimization_trial(params: Dict, fraction: float, symbol: str, data: pd.DataFrame,
+                           initial_balance: float = 10000, confidence_threshold: float = 0.0,
+                           compact: bool = False, base_params: Optional[Dict] = None,
+                           results_db: Optional[str] = None,
+                           costs: Optional[ExecutionCosts] = None,
+                           calendar: Optional[SessionCalendar] = None) -> Dict:
+    """
+    Backtest one parameter set on the first ``fraction`` of the bars (optimizer job)
+    اجرای بک‌تست یک مجموعه پارامتر روی بخشی از بازه زمانی
+    """
+    bars = data.iloc[:max(1, int(round(len(data) * fraction)))].copy()
+    store = ExperimentStore(results_db) if results_db else None
+    try:
+        backtester = ForexBacktester(initial_balance, compact=compact, experiment_store=store,
+                                     params={**(base_params or {}), **params}, costs=costs,
+                                     calendar=calendar)
+        return backtester.run_backtest(
+            symbol=symbol,
+            start_date=str(bars.index[0].date()),
+            end_date=str(bars.index[-1].date()),
+            confidence_threshold=confidence_threshold,
+            data=bars
+        )
+    finally:
+        if store is not None:
+            store.close()
+
 # Example usage
 if __name__ == "__main__":
     # Create backtester
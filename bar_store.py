@@ -0,0 +1,496 @@
+"""
+Memory-mapped local bar store and history importers
+ذخیره‌ساز محلی کندل‌ها با نگاشت حافظه و ورود داده‌های تاریخی
+
+Bars live in one ``.npy`` file of BAR_DTYPE records per symbol, timeframe and
+month (``<root>/<SYMBOL>/<TF>/<YYYY-MM>.npy``). Reads memory-map the month
+files and slice them by binary search, so any date range is served without
+parsing or copying.
+
+Importers turn MetaTrader 5 history exports, HistData.com files and tick
+dumps (MT5 or HistData) into the store::
+
+    python bar_store.py EURUSD EURUSD_M1_2023.csv EURUSD_M1_2024.csv
+    python bar_store.py EURUSD HISTDATA_COM_ASCII_EURUSD_T202401.csv --timeframe M1
+"""
+
+import argparse
+import glob
+import logging
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# One bar record (as MetaTrader's copy_rates); time is epoch seconds (UTC)
+BAR_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+    ('close', '<f8'), ('tick_volume', '<i8'), ('spread', '<i4')
+])
+
+TIMEFRAME_SECONDS = {
+    'M1': 60, 'M5': 300, 'M15': 900, 'M30': 1800,
+    'H1': 3600, 'H4': 14400, 'D1': 86400,
+}
+
+# yfinance-style intervals used by the backtester
+INTERVAL_TIMEFRAMES = {
+    '1m': 'M1', '5m': 'M5', '15m': 'M15', '30m': 'M30',
+    '60m': 'H1', '1h': 'H1', '4h': 'H4', '1d': 'D1',
+}
+
+# HistData.com timestamps are EST without daylight saving
+HISTDATA_UTC_OFFSET_HOURS = 5
+
+CHUNK_ROWS = 1_000_000
+
+FORMAT_PATTERNS = [
+    ('histdata_ascii', re.compile(r'^\d{8} \d{6};')),
+    ('histdata_ticks', re.compile(r'^\d{8} \d{9},')),
+    ('histdata_mt', re.compile(r'^\d{4}\.\d{2}\.\d{2},\d{2}:\d{2},')),
+]
+
+
+def timeframe_name(timeframe: str) -> str:
+    """'15m' / 'M15' -> 'M15'"""
+    name = INTERVAL_TIMEFRAMES.get(timeframe, timeframe).upper()
+    if name not in TIMEFRAME_SECONDS:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    return name
+
+
+def point_size(symbol: str) -> float:
+    return 0.001 if 'JPY' in symbol.upper() else 0.00001
+
+
+def _to_epoch(value) -> int:
+    return int(pd.Timestamp(value).timestamp()) if value is not None else None
+
+
+def _segments(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indices of runs of equal sorted keys"""
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1)) if len(keys) else np.empty(0, int)
+    ends = np.concatenate((starts[1:], [len(keys)])) if len(keys) else np.empty(0, int)
+    return starts, ends
+
+
+def resample_bars(records: np.ndarray, period: int) -> np.ndarray:
+    """Aggregate time-sorted bars into a coarser timeframe (buckets aligned to epoch)"""
+    if len(records) == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+    buckets = records['time'] // period * period
+    starts, ends = _segments(buckets)
+    out = np.empty(len(starts), dtype=BAR_DTYPE)
+    out['time'] = buckets[starts]
+    out['open'] = records['open'][starts]
+    out['high'] = np.maximum.reduceat(records['high'], starts)
+    out['low'] = np.minimum.reduceat(records['low'], starts)
+    out['close'] = records['close'][ends - 1]
+    out['tick_volume'] = np.add.reduceat(records['tick_volume'], starts)
+    out['spread'] = np.minimum.reduceat(records['spread'], starts)
+    return out
+
+
+def ticks_to_bars(times: np.ndarray, bid: np.ndarray, ask: np.ndarray, period: int,
+                  point: float) -> np.ndarray:
+    """Aggregate time-sorted ticks (epoch milliseconds) into bid bars"""
+    if len(times) == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+    buckets = times // 1000 // period * period
+    starts, ends = _segments(buckets)
+    out = np.empty(len(starts), dtype=BAR_DTYPE)
+    out['time'] = buckets[starts]
+    out['open'] = bid[starts]
+    out['high'] = np.maximum.reduceat(bid, starts)
+    out['low'] = np.minimum.reduceat(bid, starts)
+    out['close'] = bid[ends - 1]
+    out['tick_volume'] = ends - starts
+    spread = np.round((ask - bid) / point)
+    out['spread'] = np.minimum.reduceat(spread, starts)
+    return out
+
+
+def records_frame(records: np.ndarray, with_spread: bool = False) -> pd.DataFrame:
+    """BAR_DTYPE records as a frame indexed by bar time"""
+    columns = ['open', 'high', 'low', 'close', 'tick_volume'] + (['spread'] if with_spread else [])
+    index = pd.DatetimeIndex(records['time'].astype('datetime64[s]'), name='time')
+    return pd.DataFrame({c: records[c] for c in columns}, index=index)
+
+
+def _normalize(records: np.ndarray) -> np.ndarray:
+    """Sort by time and keep the last record for duplicate times"""
+    order = np.argsort(records['time'], kind='stable')
+    records = records[order]
+    keep = np.ones(len(records), dtype=bool)
+    keep[:-1] = records['time'][1:] != records['time'][:-1]
+    return records[keep]
+
+
+class BarStore:
+    """
+    Month-partitioned, memory-mapped bar storage
+    ذخیره‌سازی کندل‌ها به تفکیک ماه با نگاشت حافظه
+    """
+
+    def __init__(self, root: str = 'data/bars'):
+        """
+        Args:
+            root: Store directory (<root>/<SYMBOL>/<TF>/<YYYY-MM>.npy)
+        """
+        self.root = root
+        self._maps = {}   # path -> (mtime_ns, size, memmap)
+        self.logger = logging.getLogger(__name__)
+
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol.upper(), timeframe_name(timeframe))
+
+    def months(self, symbol: str, timeframe: str) -> List[str]:
+        """Stored months ('YYYY-MM'), oldest first"""
+        files = glob.glob(os.path.join(self._dir(symbol, timeframe), '????-??.npy'))
+        return sorted(os.path.basename(f)[:-4] for f in files)
+
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def timeframes(self, symbol: str) -> List[str]:
+        path = os.path.join(self.root, symbol.upper())
+        if not os.path.isdir(path):
+            return []
+        return sorted((d for d in os.listdir(path) if d in TIMEFRAME_SECONDS), key=TIMEFRAME_SECONDS.get)
+
+    def _map(self, path: str) -> np.ndarray:
+        """Memory-map a month file (re-mapped if it changed on disk)"""
+        stat = os.stat(path)
+        cached = self._maps.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        records = np.load(path, mmap_mode='r')
+        self._maps[path] = (stat.st_mtime_ns, stat.st_size, records)
+        return records
+
+    def write(self, symbol: str, timeframe: str, records: np.ndarray) -> int:
+        """
+        Add bars, merging with stored months (new bars replace stored ones at the same time)
+
+        Returns:
+            Number of months written
+        """
+        if len(records) == 0:
+            return 0
+        records = _normalize(np.asarray(records, dtype=BAR_DTYPE))
+        directory = self._dir(symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+
+        months = records['time'].astype('datetime64[s]').astype('datetime64[M]')
+        starts, ends = _segments(months.astype(np.int64))
+        for start, end in zip(starts, ends):
+            path = os.path.join(directory, f"{months[start]}.npy")
+            month = records[start:end]
+            if os.path.exists(path):
+                month = _normalize(np.concatenate([np.load(path), month]))
+
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, month)
+            os.replace(tmp_path, path)
+            self._maps.pop(path, None)
+
+        return len(starts)
+
+    def slices(self, symbol: str, timeframe: str, start=None, end=None) -> List[np.ndarray]:
+        """
+        Zero-copy memory-mapped slices covering [start, end), one per month
+        برش‌های بدون کپی از داده‌های ذخیره شده
+        """
+        start_ts, end_ts = _to_epoch(start), _to_epoch(end)
+        first = str(np.datetime64(start_ts, 's').astype('datetime64[M]')) if start_ts is not None else None
+        last = str(np.datetime64(end_ts - 1, 's').astype('datetime64[M]')) if end_ts is not None else None
+
+        directory = self._dir(symbol, timeframe)
+        out = []
+        for month in self.months(symbol, timeframe):
+            if (first and month < first) or (last and month > last):
+                continue
+            records = self._map(os.path.join(directory, f"{month}.npy"))
+            lo = np.searchsorted(records['time'], start_ts, 'left') if start_ts is not None else 0
+            hi = np.searchsorted(records['time'], end_ts, 'left') if end_ts is not None else len(records)
+            if hi > lo:
+                out.append(records[lo:hi])
+        return out
+
+    def read(self, symbol: str, timeframe: str, start=None, end=None) -> np.ndarray:
+        """
+        Bars in [start, end) as one record array
+
+        A view of the memory map when the range lies in one month; a single
+        concatenated copy otherwise. Timeframes that are not stored are
+        aggregated from the stored divisor that covers most of the range.
+        """
+        timeframe = timeframe_name(timeframe)
+        source = self._source_timeframe(symbol, timeframe, start, end)
+        if source is None:
+            return np.empty(0, dtype=BAR_DTYPE)
+        parts = self.slices(symbol, source, start, end)
+        if not parts:
+            return np.empty(0, dtype=BAR_DTYPE)
+        records = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        if source != timeframe:
+            records = resample_bars(records, TIMEFRAME_SECONDS[timeframe])
+        return records
+
+    def _source_timeframe(self, symbol: str, timeframe: str, start=None, end=None) -> Optional[str]:
+        """
+        Stored timeframe to serve a timeframe from over [start, end)
+
+        The timeframe itself or a stored divisor of it, whichever has the most
+        of the range stored (time covered = bars in range x bar length); ties
+        go to the timeframe itself, then to the finest divisor.
+        """
+        stored = self.timeframes(symbol)
+        period = TIMEFRAME_SECONDS[timeframe]
+        candidates = [tf for tf in stored if tf == timeframe] + \
+                     [tf for tf in stored if tf != timeframe and period % TIMEFRAME_SECONDS[tf] == 0]
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+
+        best, best_seconds = None, -1
+        for tf in candidates:
+            bars = sum(len(part) for part in self.slices(symbol, tf, start, end))
+            seconds = bars * TIMEFRAME_SECONDS[tf]
+            if seconds > best_seconds:
+                best, best_seconds = tf, seconds
+        return best
+
+    def frame(self, symbol: str, timeframe: str, start=None, end=None,
+              with_spread: bool = False) -> pd.DataFrame:
+        """Bars in [start, end) as a get_forex_data-style frame (open/high/low/close/tick_volume)"""
+        return records_frame(self.read(symbol, timeframe, start, end), with_spread)
+
+    def iter_frames(self, symbol: str, timeframe: str, start=None, end=None,
+                    chunk_bars: int = 100_000, with_spread: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        Bars in [start, end) as consecutive frames of chunk_bars bars
+
+        Months are read (and aggregated, for timeframes that are not stored)
+        one at a time, so memory stays bounded by a month and a chunk.
+        """
+        timeframe = timeframe_name(timeframe)
+        source = self._source_timeframe(symbol, timeframe, start, end)
+        if source is None:
+            return
+        pending, count = [], 0
+        for part in self.slices(symbol, source, start, end):
+            if source != timeframe:
+                part = resample_bars(part, TIMEFRAME_SECONDS[timeframe])
+            pending.append(part)
+            count += len(part)
+            while count >= chunk_bars:
+                records = pending[0] if len(pending) == 1 else np.concatenate(pending)
+                yield records_frame(records[:chunk_bars], with_spread)
+                pending, count = [records[chunk_bars:]], count - chunk_bars
+        if count:
+            yield records_frame(pending[0] if len(pending) == 1 else np.concatenate(pending), with_spread)
+
+    def coverage(self, symbol: str, timeframe: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp, int]]:
+        """(first bar, last bar, bar count) stored for a symbol and timeframe"""
+        months = self.months(symbol, timeframe)
+        if not months:
+            return None
+        directory = self._dir(symbol, timeframe)
+        maps = [self._map(os.path.join(directory, f"{m}.npy")) for m in months]
+        maps = [m for m in maps if len(m)]
+        if not maps:
+            return None
+        return (pd.Timestamp(int(maps[0]['time'][0]), unit='s'),
+                pd.Timestamp(int(maps[-1]['time'][-1]), unit='s'),
+                sum(len(m) for m in maps))
+
+    # -------------------------------------------------------------- import
+
+    def import_file(self, path: str, symbol: str, timeframe: Optional[str] = None,
+                    fmt: str = 'auto', utc_offset_hours: Optional[float] = None,
+                    chunk_rows: int = CHUNK_ROWS) -> Dict:
+        """
+        Import a history file into the store
+        ورود فایل تاریخچه به پایگاه کندل‌ها
+
+        Args:
+            path: MT5 history/tick export, HistData ASCII/MetaTrader bars or ticks
+            symbol: Symbol the file holds
+            timeframe: Bar timeframe; for tick files the timeframe to build (default M1);
+                for bar files inferred from the data when omitted
+            fmt: 'auto', 'mt5_bars', 'mt5_ticks', 'histdata_ascii', 'histdata_mt' or 'histdata_ticks'
+            utc_offset_hours: Hours to subtract to get UTC (default 0 for MT5 exports,
+                5 for HistData's EST)
+            chunk_rows: Rows parsed at a time
+
+        Returns:
+            {'format', 'timeframe', 'bars', 'months'}
+        """
+        fmt = detect_format(path) if fmt == 'auto' else fmt
+        if utc_offset_hours is None:
+            utc_offset_hours = -HISTDATA_UTC_OFFSET_HOURS if fmt.startswith('histdata') else 0
+        offset = int(utc_offset_hours * 3600)
+        symbol = symbol.upper()
+
+        if fmt in ('mt5_ticks', 'histdata_ticks'):
+            timeframe = timeframe_name(timeframe or 'M1')
+            chunks = self._tick_bars(_read_ticks(path, fmt, chunk_rows), offset,
+                                     TIMEFRAME_SECONDS[timeframe], point_size(symbol))
+        else:
+            chunks = (_shift(records, offset) for records in _read_bars(path, fmt, chunk_rows, symbol))
+
+        bars, months = 0, set()
+        for records in chunks:
+            if timeframe is None:
+                timeframe = infer_timeframe(records['time'])
+            timeframe = timeframe_name(timeframe)
+            self.write(symbol, timeframe, records)
+            bars += len(records)
+            months.update(str(m) for m in np.unique(records['time'].astype('datetime64[s]').astype('datetime64[M]')))
+
+        self.logger.info(f"Imported {bars:,} {symbol} {timeframe} bars from {path} ({fmt})")
+        return {'format': fmt, 'timeframe': timeframe, 'bars': bars, 'months': sorted(months)}
+
+    @staticmethod
+    def _tick_bars(chunks: Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]], offset: int,
+                   period: int, point: float) -> Iterator[np.ndarray]:
+        """Aggregate tick chunks into bars, carrying the last (unfinished) bar to the next chunk"""
+        carry = None
+        for times, bid, ask in chunks:
+            times = times - offset * 1000
+            if carry is not None:
+                times, bid, ask = (np.concatenate([c, x]) for c, x in zip(carry, (times, bid, ask)))
+            order = np.argsort(times, kind='stable')
+            times, bid, ask = times[order], bid[order], ask[order]
+
+            last_bucket = times[-1] // 1000 // period * period
+            cut = np.searchsorted(times, last_bucket * 1000, 'left')
+            carry = (times[cut:], bid[cut:], ask[cut:])
+            if cut:
+                yield ticks_to_bars(times[:cut], bid[:cut], ask[:cut], period, point)
+        if carry is not None and len(carry[0]):
+            yield ticks_to_bars(*carry, period, point)
+
+
+def _shift(records: np.ndarray, offset: int) -> np.ndarray:
+    if offset:
+        records['time'] -= offset
+    return records
+
+
+def infer_timeframe(times: np.ndarray) -> str:
+    """Timeframe from the most common spacing of bar times"""
+    if len(times) < 2:
+        raise ValueError("Cannot infer the timeframe from fewer than two bars; pass timeframe")
+    gaps, counts = np.unique(np.diff(times), return_counts=True)
+    gap = int(gaps[np.argmax(counts)])
+    for name, seconds in TIMEFRAME_SECONDS.items():
+        if seconds == gap:
+            return name
+    raise ValueError(f"Bar spacing of {gap}s is not a supported timeframe")
+
+
+def detect_format(path: str) -> str:
+    """Identify an export format from its first line"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        first = f.readline().strip()
+    if first.startswith('<DATE>'):
+        return 'mt5_ticks' if '<BID>' in first else 'mt5_bars'
+    for name, pattern in FORMAT_PATTERNS:
+        if pattern.match(first):
+            return name
+    raise ValueError(f"Unrecognized history format in {path}: {first[:60]!r}")
+
+
+def _epoch_seconds(stamps: pd.Series, fmt: str) -> np.ndarray:
+    return pd.to_datetime(stamps, format=fmt).values.astype('datetime64[s]').astype(np.int64)
+
+
+def _read_bars(path: str, fmt: str, chunk_rows: int, symbol: str) -> Iterator[np.ndarray]:
+    """Parse bar exports in chunks into BAR_DTYPE records"""
+    point = point_size(symbol)
+    if fmt == 'mt5_bars':
+        reader = pd.read_csv(path, sep='\t', chunksize=chunk_rows, dtype={'<DATE>': str, '<TIME>': str})
+    elif fmt == 'histdata_ascii':
+        reader = pd.read_csv(path, sep=';', header=None, chunksize=chunk_rows, dtype={0: str},
+                             names=['stamp', 'open', 'high', 'low', 'close', 'volume'])
+    elif fmt == 'histdata_mt':
+        reader = pd.read_csv(path, sep=',', header=None, chunksize=chunk_rows, dtype={0: str, 1: str},
+                             names=['date', 'time', 'open', 'high', 'low', 'close', 'volume'])
+    else:
+        raise ValueError(f"Unknown bar format: {fmt}")
+
+    for chunk in reader:
+        records = np.zeros(len(chunk), dtype=BAR_DTYPE)
+        if fmt == 'mt5_bars':
+            chunk.columns = [c.strip('<>').lower() for c in chunk.columns]
+            stamps = chunk['date'] + ' ' + (chunk['time'] if 'time' in chunk else '00:00:00')
+            records['time'] = _epoch_seconds(stamps, '%Y.%m.%d %H:%M:%S')
+            records['tick_volume'] = chunk['tickvol'].values
+            if 'spread' in chunk:
+                records['spread'] = chunk['spread'].values
+        elif fmt == 'histdata_ascii':
+            records['time'] = _epoch_seconds(chunk['stamp'], '%Y%m%d %H%M%S')
+            records['tick_volume'] = chunk['volume'].values
+        else:
+            records['time'] = _epoch_seconds(chunk['date'] + ' ' + chunk['time'], '%Y.%m.%d %H:%M')
+            records['tick_volume'] = chunk['volume'].values
+        for field in ('open', 'high', 'low', 'close'):
+            records[field] = chunk[field].values
+        if fmt != 'mt5_bars':
+            records['spread'] = 0
+        yield records
+
+
+def _read_ticks(path: str, fmt: str, chunk_rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Parse tick exports in chunks into (epoch ms, bid, ask)"""
+    if fmt == 'mt5_ticks':
+        reader = pd.read_csv(path, sep='\t', chunksize=chunk_rows, usecols=['<DATE>', '<TIME>', '<BID>', '<ASK>'],
+                             dtype={'<DATE>': str, '<TIME>': str})
+    elif fmt == 'histdata_ticks':
+        reader = pd.read_csv(path, sep=',', header=None, chunksize=chunk_rows, dtype={0: str},
+                             names=['stamp', 'bid', 'ask', 'volume'])
+    else:
+        raise ValueError(f"Unknown tick format: {fmt}")
+
+    last_bid = last_ask = np.nan
+    for chunk in reader:
+        if fmt == 'mt5_ticks':
+            chunk.columns = [c.strip('<>').lower() for c in chunk.columns]
+            stamps = pd.to_datetime(chunk['date'] + ' ' + chunk['time'], format='%Y.%m.%d %H:%M:%S.%f')
+            # MT5 leaves bid or ask empty when only the other side changed
+            bid = chunk['bid'].ffill().fillna(last_bid).values
+            ask = chunk['ask'].ffill().fillna(last_ask).values
+        else:
+            stamps = pd.to_datetime(chunk['stamp'], format='%Y%m%d %H%M%S%f')
+            bid, ask = chunk['bid'].values, chunk['ask'].values
+        times = stamps.values.astype('datetime64[ms]').astype(np.int64)
+        valid = ~(np.isnan(bid) | np.isnan(ask))
+        if len(bid):
+            last_bid, last_ask = bid[-1], ask[-1]
+        yield times[valid], bid[valid].astype(np.float64), ask[valid].astype(np.float64)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import MT5 / HistData history files into the bar store")
+    parser.add_argument('symbol')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--root', default='data/bars', help="Store directory")
+    parser.add_argument('--timeframe', help="Bar timeframe (inferred for bar files; default M1 for ticks)")
+    parser.add_argument('--format', default='auto',
+                        choices=['auto', 'mt5_bars', 'mt5_ticks', 'histdata_ascii', 'histdata_mt', 'histdata_ticks'])
+    parser.add_argument('--utc-offset', type=float, help="Hours to subtract from file times to get UTC")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = BarStore(args.root)
+    for path in args.files:
+        store.import_file(path, args.symbol, args.timeframe, args.format, args.utc_offset)
+    for timeframe in store.timeframes(args.symbol):
+        first, last, count = store.coverage(args.symbol, timeframe)
+        print(f"{args.symbol.upper()} {timeframe}: {count:,} bars from {first} to {last}")
@@ -0,0 +1,394 @@
+import numpy as np
+import pandas as pd
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import permutations
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from backtester import ForexBacktester
+from risk_manager import AdvancedRiskManager
+from market_generator import generate_bars
+
+# Bar counts and symbol counts per suite
+SUITES = {
+    'quick': {'bars': [10_000], 'symbols': [1]},
+    'standard': {'bars': [10_000, 100_000, 1_000_000], 'symbols': [1, 10]},
+    'full': {'bars': [10_000, 100_000, 1_000_000, 10_000_000], 'symbols': [1, 10, 50]},
+}
+
+CURRENCIES = ['EUR', 'USD', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'NZD']
+SYMBOLS = [base + quote for base, quote in permutations(CURRENCIES, 2)]
+
+BASELINE_DIR = os.path.join('data', 'benchmarks')
+
+# Generated frames are kept between repetitions up to this size
+FRAME_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class BenchContext:
+    """Inputs for one benchmark case: n_symbols deterministic synthetic frames of n_bars"""
+
+    def __init__(self, n_bars: int, n_symbols: int, seed: int = 0):
+        if n_symbols > len(SYMBOLS):
+            raise ValueError(f"At most {len(SYMBOLS)} symbols are supported")
+        self.n_bars = n_bars
+        self.symbols = SYMBOLS[:n_symbols]
+        self.seed = seed
+        self._frames = {} if n_bars * n_symbols * 40 <= FRAME_CACHE_BYTES else None
+
+    def frames(self) -> Iterator:
+        """(symbol, frame) pairs; frames are generated on first use"""
+        for i, symbol in enumerate(self.symbols):
+            df = self._frames.get(symbol) if self._frames is not None else None
+            if df is None:
+                df = generate_bars(symbol, self.n_bars, seed=self.seed * 1000 + i)
+                if self._frames is not None:
+                    self._frames[symbol] = df
+            yield symbol, df
+
+
+@dataclass
+class HotPath:
+    """
+    A benchmarked code path
+
+    ``calls(ctx)`` yields zero-argument callables, one per timed call, that
+    return the number of items (bars or calls) they processed. Setup work
+    done in the generator between yields is not timed.
+    """
+    name: str
+    calls: Callable[[BenchContext], Iterator[Callable[[], int]]]
+    unit: str = 'bars'
+    max_total_bars: Optional[int] = None   # skip larger cases (slow per-bar paths)
+
+
+def _indicator_calls(ctx: BenchContext):
+    for symbol, df in ctx.frames():
+        backtester = ForexBacktester()
+
+        def call():
+            backtester.calculate_technical_indicators(df, symbol=symbol, timeframe='15m')
+            return len(df)
+        yield call
+
+
+def _signal_calls(ctx: BenchContext):
+    for symbol, df in ctx.frames():
+        backtester = ForexBacktester()
+        df = backtester.calculate_technical_indicators(df, symbol=symbol, timeframe='15m')
+
+        def call():
+            backtester.generate_signals(df)
+            return len(df)
+        yield call
+
+
+def _vectorized_signal_calls(ctx: BenchContext):
+    for symbol, df in ctx.frames():
+        backtester = ForexBacktester()
+        df = backtester.calculate_technical_indicators(df, symbol=symbol, timeframe='15m')
+
+        def call():
+            backtester.analyze_signals_vectorized(df)
+            return len(df)
+        yield call
+
+
+def _backtest_calls(compact: bool):
+    def calls(ctx: BenchContext):
+        for symbol, df in ctx.frames():
+            backtester = ForexBacktester(keep_equity_curve=False, compact=compact)
+
+            def call():
+                backtester.run_backtest(symbol, str(df.index[0].date()), str(df.index[-1].date()),
+                                        confidence_threshold=0.0, data=df.copy())
+                return len(df)
+            yield call
+    return calls
+
+
+def _streaming_backtest_calls(ctx: BenchContext):
+    for symbol, df in ctx.frames():
+        backtester = ForexBacktester(keep_equity_curve=False, compact=True)
+
+        def call():
+            backtester.run_backtest_streaming(symbol, str(df.index[0].date()), str(df.index[-1].date()),
+                                              confidence_threshold=0.0, data=df, chunk_bars=50_000)
+            return len(df)
+        yield call
+
+
+def build_risk_manager(symbols: Sequence[str], n_trades: int, seed: int = 0) -> AdvancedRiskManager:
+    """Risk manager with n_trades closed trades across symbols and a few open positions"""
+    rng = np.random.default_rng(seed)
+    manager = AdvancedRiskManager(100_000)
+    now = datetime.now()
+    pnl = rng.normal(5, 50, n_trades)
+    for i in range(n_trades):
+        symbol = symbols[i % len(symbols)]
+        entry_time = now - timedelta(minutes=15 * (n_trades - i))
+        manager.trade_history.append({
+            'id': f"{symbol}_{i}", 'symbol': symbol, 'size': 0.1, 'entry_price': 1.1,
+            'stop_loss': 1.095, 'take_profit': 1.11, 'type': 'BUY', 'entry_time': entry_time,
+            'risk_amount': 50.0, 'status': 'closed', 'close_price': 1.1 + pnl[i] / 1e4,
+            'close_time': entry_time + timedelta(minutes=30), 'pnl': float(pnl[i]),
+        })
+    manager.current_balance += float(pnl.sum())
+    manager.peak_balance = max(manager.initial_balance, manager.current_balance)
+
+    # Leave room below max_positions so every check runs
+    for symbol in symbols[:manager.max_positions - 1]:
+        manager.add_position(symbol, 0.1, 1.1, 1.095, 1.11, 'BUY')
+    return manager
+
+
+def _risk_calls(method: str, calls_per_symbol: int):
+    def calls(ctx: BenchContext):
+        # Portfolio-level: one closed trade per 100 bars of history
+        manager = build_risk_manager(ctx.symbols, max(1, ctx.n_bars // 100), ctx.seed)
+        for symbol in ctx.symbols:
+            for _ in range(calls_per_symbol):
+                if method == 'can_open_position':
+                    def call():
+                        manager.can_open_position(symbol, 0.1, 1.1)
+                        return 1
+                else:
+                    def call():
+                        manager.get_portfolio_metrics()
+                        return 1
+                yield call
+    return calls
+
+
+HOT_PATHS = {
+    path.name: path for path in [
+        HotPath('calculate_technical_indicators', _indicator_calls),
+        HotPath('generate_signals', _signal_calls, max_total_bars=100_000),
+        HotPath('analyze_signals_vectorized', _vectorized_signal_calls),
+        HotPath('run_backtest', _backtest_calls(compact=False), max_total_bars=100_000),
+        HotPath('run_backtest_compact', _backtest_calls(compact=True), max_total_bars=2_000_000),
+        HotPath('run_backtest_streaming', _streaming_backtest_calls, max_total_bars=2_000_000),
+        HotPath('can_open_position', _risk_calls('can_open_position', 200), unit='calls'),
+        HotPath('get_portfolio_metrics', _risk_calls('get_portfolio_metrics', 5), unit='calls'),
+    ]
+}
+
+
+def run_case(path: HotPath, n_bars: int, n_symbols: int, repeat: int = 7, seed: int = 0) -> Dict:
+    """
+    Time one hot path on n_symbols x n_bars
+
+    Latencies are per call. Each repetition runs every call once; throughput
+    comes from the fastest repetition (``best_ms``), the statistic least
+    disturbed by other load on the machine, and ``spread_pct`` is how much
+    slower the slowest repetition was. Peak memory is the extra traced
+    allocation of the first call, measured in a separate untimed pass.
+    """
+    ctx = BenchContext(n_bars, n_symbols, seed)
+    latencies = []
+    repetitions = []
+    items = 0
+    for _ in range(repeat):
+        elapsed = 0.0
+        for call in path.calls(ctx):
+            start = time.perf_counter()
+            items += call()
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            elapsed += latency
+        repetitions.append(elapsed)
+
+    calls = path.calls(ctx)
+    call = next(calls)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    call()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    calls.close()
+
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    best, worst = min(repetitions), max(repetitions)
+    return {
+        'path': path.name,
+        'bars': n_bars,
+        'symbols': n_symbols,
+        'calls': len(latencies),
+        'repeat': repeat,
+        'unit': path.unit,
+        'throughput': items / repeat / best if best else float('nan'),
+        'best_ms': best * 1000,
+        'spread_pct': 100 * (worst - best) / best if best else 0.0,
+        'mean_ms': float(latencies_ms.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'peak_mb': peak / (1024 * 1024),
+    }
+
+
+def environment_info() -> Dict:
+    """Commit and machine details stored with results"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    try:
+        import talib  # noqa: F401
+        backend = 'talib'
+    except ImportError:
+        backend = 'numpy'
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'indicator_backend': backend,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(suite: str = 'quick', paths: Optional[List[str]] = None, bars: Optional[List[int]] = None,
+              symbols: Optional[List[int]] = None, repeat: int = 7, seed: int = 0,
+              no_limits: bool = False, progress: Callable[[str], None] = print) -> Dict:
+    """
+    Run every selected hot path for each (bars, symbols) size
+
+    Cases above a path's max_total_bars are listed under 'skipped' unless
+    no_limits is set.
+    """
+    sizes = SUITES[suite]
+    bars = bars or sizes['bars']
+    symbols = symbols or sizes['symbols']
+    unknown = set(paths or []) - set(HOT_PATHS)
+    if unknown:
+        raise ValueError(f"Unknown hot paths: {sorted(unknown)}")
+
+    results, skipped = [], []
+    for name in paths or HOT_PATHS:
+        path = HOT_PATHS[name]
+        for n_symbols in symbols:
+            for n_bars in bars:
+                if not no_limits and path.max_total_bars and n_bars * n_symbols > path.max_total_bars:
+                    skipped.append({'path': name, 'bars': n_bars, 'symbols': n_symbols})
+                    continue
+                progress(f"{name}: {n_bars:,} bars x {n_symbols} symbols")
+                results.append(run_case(path, n_bars, n_symbols, repeat, seed))
+
+    return {'environment': environment_info(), 'suite': suite, 'repeat': repeat, 'seed': seed,
+            'results': results, 'skipped': skipped}
+
+
+def _case_key(result: Dict):
+    return result['path'], result['bars'], result['symbols']
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.15) -> List[Dict]:
+    """
+    Compare results case by case against a baseline
+
+    A case regresses when throughput of the fastest repetition drops, or
+    peak memory grows, by more than ``tolerance``. The median latency ratio
+    and the repetition spread of both runs are reported but not gated on:
+    medians of a few runs move with machine load alone.
+    """
+    previous = {_case_key(r): r for r in baseline.get('results', [])}
+    rows = []
+    for result in current.get('results', []):
+        base = previous.get(_case_key(result))
+        if base is None:
+            continue
+        throughput = result['throughput'] / base['throughput'] if base['throughput'] else float('nan')
+        latency = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] else float('nan')
+        memory = result['peak_mb'] / base['peak_mb'] if base['peak_mb'] > 0.01 else 1.0
+        rows.append({
+            'path': result['path'], 'bars': result['bars'], 'symbols': result['symbols'],
+            'throughput_ratio': throughput, 'p50_ratio': latency, 'peak_ratio': memory,
+            'spread_pct': max(result.get('spread_pct', 0.0), base.get('spread_pct', 0.0)),
+            'regression': throughput < 1 - tolerance or memory > 1 + tolerance
+        })
+    return rows
+
+
+def save_results(report: Dict, path: Optional[str] = None) -> str:
+    """Write a report as JSON (default: data/benchmarks/<commit>.json)"""
+    if path is None:
+        name = report['environment'].get('commit') or datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(BASELINE_DIR, f"{name}.json")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def format_results(report: Dict) -> str:
+    lines = [f"{'Hot path':<31} {'Bars':>10} {'Sym':>4} {'Throughput':>18} {'Spread':>7} "
+             f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Peak MB':>8}"]
+    for r in report['results']:
+        lines.append(f"{r['path']:<31} {r['bars']:>10,} {r['symbols']:>4} "
+                     f"{r['throughput']:>10,.0f} {r['unit'] + '/s':<7} {r.get('spread_pct', 0.0):>6.1f}% "
+                     f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_mb']:>8.1f}")
+    for s in report.get('skipped', []):
+        lines.append(f"{s['path']:<31} {s['bars']:>10,} {s['symbols']:>4}   skipped (above max_total_bars)")
+    return '\n'.join(lines)
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'Hot path':<31} {'Bars':>10} {'Sym':>4} {'Throughput':>11} {'p50':>8} {'Peak':>8} {'Spread':>7}"]
+    for r in rows:
+        flag = '  REGRESSION' if r['regression'] else ''
+        lines.append(f"{r['path']:<31} {r['bars']:>10,} {r['symbols']:>4} {r['throughput_ratio']:>10.2f}x "
+                     f"{r['p50_ratio']:>7.2f}x {r['peak_ratio']:>7.2f}x {r.get('spread_pct', 0.0):>6.1f}%{flag}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the trading hot paths on synthetic bars")
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick')
+    parser.add_argument('--paths', nargs='+', choices=sorted(HOT_PATHS), help="Hot paths (default: all)")
+    parser.add_argument('--bars', nargs='+', type=int, help="Bar counts (overrides the suite)")
+    parser.add_argument('--symbols', nargs='+', type=int, help="Symbol counts (overrides the suite)")
+    parser.add_argument('--repeat', type=int, default=7, help="Repetitions per case (the fastest is compared)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-limits', action='store_true', help="Also run cases above max_total_bars")
+    parser.add_argument('--save', nargs='?', const='', metavar='PATH',
+                        help="Save results as a baseline (default: data/benchmarks/<commit>.json)")
+    parser.add_argument('--compare', metavar='PATH', help="Baseline results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Allowed relative drop in best-repetition throughput")
+    args = parser.parse_args()
+
+    # Timings should not include log output
+    logging.disable(logging.CRITICAL)
+
+    report = run_suite(args.suite, args.paths, args.bars, args.symbols, args.repeat, args.seed,
+                       args.no_limits)
+    print(format_results(report))
+
+    if args.save is not None:
+        print(f"Saved results to {save_results(report, args.save or None)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        print(f"\nCompared with {baseline['environment'].get('commit')} ({args.compare}):")
+        print(format_comparison(rows))
+        if any(r['regression'] for r in rows):
+            raise SystemExit(1)
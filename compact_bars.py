@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Iterator, Tuple
+
+# Signal actions are stored as int8 codes
+ACTIONS = ('HOLD', 'BUY', 'SELL')
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+# Price levels orders are filled against stay float64 so stops and targets
+# trigger on exactly the same bars as in full precision
+SIGNAL_FIELDS = (
+    ('signal_action', np.int8),
+    ('signal_strength', np.float32),
+    ('signal_confidence', np.float32),
+    ('signal_entry_price', np.float64),
+    ('signal_stop_loss', np.float64),
+    ('signal_take_profit', np.float64),
+)
+
+
+class CompactBars:
+    """
+    Float32 structured-array storage for bars, indicators and signals
+    ذخیره‌سازی فشرده کندل‌ها، اندیکاتورها و سیگنال‌ها با float32
+
+    Each bar is one record of float32 fields (float64 for the fill price
+    and signal levels), so a frame takes well under half the memory of the
+    float64 DataFrame. Slicing returns views, never copies.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, data: np.ndarray):
+        self.index = index
+        self.data = data
+
+    @classmethod
+    def allocate(cls, index: pd.DatetimeIndex, columns: Iterable[str], signals: bool = True,
+                 float64_columns: Iterable[str] = ('close',)) -> 'CompactBars':
+        """Allocate storage for the given columns (plus signal fields)"""
+        columns = list(columns)
+        float64_columns = set(float64_columns)
+        fields = [(column, np.float64 if column in float64_columns else np.float32) for column in columns]
+        if signals:
+            fields += list(SIGNAL_FIELDS)
+        data = np.zeros(len(index), dtype=fields)
+        for column in columns:
+            data[column] = np.nan
+        return cls(index, data)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return self.data.dtype.names
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.index.nbytes
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.data.dtype.names
+
+    def __getitem__(self, key):
+        """Column name -> field view; slice -> CompactBars view"""
+        if isinstance(key, slice):
+            return CompactBars(self.index[key], self.data[key])
+        return self.data[key]
+
+    def __setitem__(self, column: str, values):
+        """Write a column in place (cast to the field dtype)"""
+        self.data[column] = values
+
+    def iterrows(self) -> Iterator[Tuple[pd.Timestamp, Dict]]:
+        """Yield (timestamp, row) like DataFrame.iterrows, with Python scalars"""
+        names = self.data.dtype.names
+        has_action = 'signal_action' in names
+        for timestamp, record in zip(self.index, self.data):
+            row = dict(zip(names, record.item()))
+            if has_action:
+                row['signal_action'] = ACTIONS[row['signal_action']]
+            yield timestamp, row
+
+    def to_frame(self) -> pd.DataFrame:
+        """Expand to a DataFrame (copies; for reporting)"""
+        df = pd.DataFrame(self.data, index=self.index)
+        if 'signal_action' in df.columns:
+            df['signal_action'] = np.asarray(ACTIONS, dtype=object)[df['signal_action'].values]
+        return df
@@ -0,0 +1,170 @@
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+
+# Degradation levels, each adding to the ones before it
+LEVELS = ('normal', 'skip_slow_timeframes', 'shed_alerts', 'reduce_symbols')
+
+# Alert priorities dropped while shedding alert work
+SHEDDABLE_ALERTS = ('INFO', 'SUCCESS')
+
+
+class CycleBudget:
+    """
+    Deadline tracking and load shedding for the trading loop
+    پایش مهلت زمانی چرخه معاملات و کاهش بار در صورت تأخیر
+
+    Every cycle and every symbol within it is timed against a budget. After
+    ``escalate_after`` consecutive overrunning cycles the loop degrades one
+    level: reuse H4/D1 data between refreshes, then drop low-priority
+    alerts, then stop a cycle at its deadline and carry the remaining
+    symbols over to the front of the next one. After ``recover_after``
+    consecutive cycles under ``recover_fraction`` of the budget it steps
+    back one level.
+    """
+
+    def __init__(self, cycle_budget: float, symbol_budget: Optional[float] = None,
+                 escalate_after: int = 2, recover_after: int = 5, recover_fraction: float = 0.6):
+        """
+        Args:
+            cycle_budget: Seconds a cycle may take
+            symbol_budget: Seconds one symbol may take (default: an even share of the cycle budget)
+            escalate_after: Consecutive overruns before degrading one level
+            recover_after: Consecutive fast cycles before recovering one level
+            recover_fraction: A cycle is fast when it takes less than this share of the budget
+        """
+        self.cycle_budget = cycle_budget
+        self.symbol_budget_seconds = symbol_budget
+        self.escalate_after = escalate_after
+        self.recover_after = recover_after
+        self.recover_fraction = recover_fraction
+
+        self.level = 0
+        self.cycles = 0
+        self.overruns = 0
+        self.symbol_overruns = 0
+        self.consecutive_overruns = 0
+        self.consecutive_fast = 0
+        self.last_cycle_seconds = 0.0
+        self.max_cycle_seconds = 0.0
+
+        self._cycle_started = None
+        self._cycle_symbols = 1
+        self._slow_symbols = []
+        self._deferred = []
+
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def level_name(self) -> str:
+        return LEVELS[self.level]
+
+    @property
+    def skip_slow_timeframes(self) -> bool:
+        return self.level >= 1
+
+    @property
+    def shed_alerts(self) -> bool:
+        return self.level >= 2
+
+    @property
+    def reduce_symbols(self) -> bool:
+        return self.level >= 3
+
+    @property
+    def symbol_budget(self) -> float:
+        if self.symbol_budget_seconds:
+            return self.symbol_budget_seconds
+        return self.cycle_budget / self._cycle_symbols
+
+    def start_cycle(self, symbols: Sequence[str]) -> List[str]:
+        """
+        Start timing a cycle
+
+        Returns:
+            The symbols in processing order: ones deferred from the last cycle first
+        """
+        self._cycle_started = time.perf_counter()
+        self._slow_symbols = []
+        symbols = list(symbols)
+        self._cycle_symbols = max(len(symbols), 1)
+
+        deferred = [s for s in self._deferred if s in symbols]
+        self._deferred = []
+        return deferred + [s for s in symbols if s not in deferred]
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._cycle_started if self._cycle_started is not None else 0.0
+
+    def should_defer(self, remaining: Sequence[str]) -> bool:
+        """
+        At the reduce_symbols level, stop the cycle once it is past its deadline
+
+        The remaining symbols go first next cycle.
+        """
+        if not self.reduce_symbols or self.elapsed() <= self.cycle_budget:
+            return False
+        self._deferred = list(remaining)
+        return True
+
+    def record_symbol(self, symbol: str, seconds: float) -> bool:
+        """Record one symbol's processing time; True when it overran its budget"""
+        if seconds <= self.symbol_budget:
+            return False
+        self.symbol_overruns += 1
+        self._slow_symbols.append((symbol, seconds))
+        return True
+
+    def end_cycle(self) -> Dict:
+        """
+        Finish the cycle and adapt the degradation level
+
+        Returns:
+            {'seconds', 'overrun', 'level', 'previous_level', 'slow_symbols', 'deferred'}
+        """
+        seconds = self.elapsed()
+        self._cycle_started = None
+        self.cycles += 1
+        self.last_cycle_seconds = seconds
+        self.max_cycle_seconds = max(self.max_cycle_seconds, seconds)
+
+        previous = self.level
+        overrun = seconds > self.cycle_budget
+        if overrun:
+            self.overruns += 1
+            self.consecutive_overruns += 1
+            self.consecutive_fast = 0
+            if self.consecutive_overruns >= self.escalate_after and self.level < len(LEVELS) - 1:
+                self.level += 1
+                self.consecutive_overruns = 0
+        else:
+            self.consecutive_overruns = 0
+            if seconds < self.cycle_budget * self.recover_fraction:
+                self.consecutive_fast += 1
+                if self.consecutive_fast >= self.recover_after and self.level > 0:
+                    self.level -= 1
+                    self.consecutive_fast = 0
+            else:
+                self.consecutive_fast = 0
+
+        return {
+            'seconds': seconds,
+            'overrun': overrun,
+            'level': self.level,
+            'previous_level': previous,
+            'slow_symbols': list(self._slow_symbols),
+            'deferred': list(self._deferred),
+        }
+
+    def get_stats(self) -> Dict:
+        return {
+            'level': self.level_name,
+            'cycle_budget': self.cycle_budget,
+            'symbol_budget': self.symbol_budget,
+            'cycles': self.cycles,
+            'overruns': self.overruns,
+            'symbol_overruns': self.symbol_overruns,
+            'last_cycle_seconds': self.last_cycle_seconds,
+            'max_cycle_seconds': self.max_cycle_seconds,
+            'deferred_symbols': list(self._deferred),
+        }
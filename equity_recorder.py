@@ -0,0 +1,161 @@
+import numpy as np
+import os
+import math
+import logging
+from typing import Dict, Optional
+
+from performance_metrics import ANNUALIZATION_15M
+
+
+class EquityRecorder:
+    """
+    Streaming equity curve with online return and drawdown statistics
+    ثبت جریانی منحنی سرمایه با آمار بازده و افت سرمایه به‌صورت آنلاین
+
+    Returns use Welford's algorithm, so Sharpe/Sortino, peak and max drawdown
+    are available without keeping the curve. The curve itself is optionally
+    stored as float64 in a growable array or a memory-mapped file.
+    """
+
+    def __init__(self, initial_equity: float, path: Optional[str] = None,
+                 keep_curve: bool = True, initial_capacity: int = 65536,
+                 annualization: float = ANNUALIZATION_15M):
+        """
+        Initialize the recorder
+
+        Args:
+            initial_equity: First point of the curve
+            path: Write the curve to this memory-mapped float64 file
+            keep_curve: Keep the curve in memory when no path is given (False = statistics only)
+            initial_capacity: Initial number of points allocated
+            annualization: Factor applied to Sharpe and Sortino ratios
+        """
+        self.path = path
+        self.keep_curve = keep_curve or path is not None
+        self.annualization = annualization
+
+        self.count = 0
+        self.last = None
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+
+        # Welford accumulators for all returns and for negative returns
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._neg_n = 0
+        self._neg_mean = 0.0
+        self._neg_m2 = 0.0
+
+        self._capacity = 0
+        self._buffer = None
+        if self.keep_curve:
+            self._allocate(max(int(initial_capacity), 1))
+
+        self.logger = logging.getLogger(__name__)
+        self.record(initial_equity)
+
+    def _allocate(self, capacity: int):
+        """Allocate (or grow) the curve storage"""
+        if self.path is None:
+            buffer = np.empty(capacity, dtype=np.float64)
+            if self._buffer is not None:
+                buffer[:self.count] = self._buffer[:self.count]
+            self._buffer = buffer
+        else:
+            if self._buffer is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                mode = 'w+'
+            else:
+                self._buffer.flush()
+                self._buffer = None
+                with open(self.path, 'r+b') as f:
+                    f.truncate(capacity * 8)
+                mode = 'r+'
+            self._buffer = np.memmap(self.path, dtype=np.float64, mode=mode, shape=(capacity,))
+        self._capacity = capacity
+
+    def record(self, equity: float):
+        """Add one point to the curve"""
+        equity = float(equity)
+
+        if self.last is not None and self.last != 0:
+            r = (equity - self.last) / self.last
+            self._n += 1
+            delta = r - self._mean
+            self._mean += delta / self._n
+            self._m2 += delta * (r - self._mean)
+
+            if r < 0:
+                self._neg_n += 1
+                delta = r - self._neg_mean
+                self._neg_mean += delta / self._neg_n
+                self._neg_m2 += delta * (r - self._neg_mean)
+
+        if equity > self.peak:
+            self.peak = equity
+        if self.peak > 0:
+            drawdown = (equity - self.peak) / self.peak * 100
+            if drawdown < self.max_drawdown:
+                self.max_drawdown = drawdown
+
+        if self.keep_curve:
+            if self.count == self._capacity:
+                self._allocate(self._capacity * 2)
+            self._buffer[self.count] = equity
+
+        self.last = equity
+        self.count += 1
+
+    def get_stats(self) -> Dict:
+        """Drawdown and risk-adjusted return metrics (same keys as equity_metrics)"""
+        sharpe_ratio = 0
+        if self._n > 1:
+            std = math.sqrt(self._m2 / (self._n - 1))
+            if std > 0:
+                sharpe_ratio = self._mean / std * self.annualization
+
+        sortino_ratio = 0
+        if self._neg_n > 1:
+            downside = math.sqrt(self._neg_m2 / (self._neg_n - 1))
+            if downside > 0:
+                sortino_ratio = self._mean / downside * self.annualization
+
+        return {
+            'max_drawdown': self.max_drawdown,
+            'sharpe_ratio': sharpe_ratio,
+            'sortino_ratio': sortino_ratio,
+            'peak_balance': self.peak
+        }
+
+    def get_curve(self) -> np.ndarray:
+        """Recorded curve as a float64 array (a read-only memmap when file-backed)"""
+        if not self.keep_curve:
+            return np.empty(0, dtype=np.float64)
+        return self._buffer[:self.count]
+
+    def close(self) -> np.ndarray:
+        """Trim storage to the recorded length and return the final curve"""
+        try:
+            if not self.keep_curve:
+                return self.get_curve()
+
+            if self.path is None:
+                self._buffer = self._buffer[:self.count].copy()
+            else:
+                self._buffer.flush()
+                self._buffer = None
+                with open(self.path, 'r+b') as f:
+                    f.truncate(self.count * 8)
+                self._buffer = np.memmap(self.path, dtype=np.float64, mode='r', shape=(self.count,))
+            self._capacity = self.count
+            return self._buffer
+
+        except Exception as e:
+            self.logger.error(f"Error closing equity recorder: {e}")
+            return self.get_curve()
+
+    def __len__(self) -> int:
+        return self.count
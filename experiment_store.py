@@ -0,0 +1,399 @@
+import numpy as np
+import pandas as pd
+import sqlite3
+import hashlib
+import io
+import json
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from compact_bars import ACTIONS, ACTION_CODES
+
+# Trade record fields stored as float64 arrays
+TRADE_FLOAT_FIELDS = ('size', 'entry_price', 'exit_price', 'stop_loss', 'take_profit',
+                      'pnl', 'pnl_pct', 'duration', 'confidence')
+
+FILTER_OPERATORS = ('=', '!=', '<', '<=', '>', '>=')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_key TEXT NOT NULL UNIQUE,
+    symbol TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    n_bars INTEGER,
+    data_fingerprint TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    elapsed REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_symbol ON runs (symbol, start_date);
+CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs (data_fingerprint);
+
+CREATE TABLE IF NOT EXISTS params (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_params_value ON params (name, value);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_metrics_value ON metrics (name, value);
+
+CREATE TABLE IF NOT EXISTS trades (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (id) ON DELETE CASCADE,
+    n_trades INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a bar frame (timestamps and numeric columns)"""
+    digest = hashlib.blake2b(digest_size=20)
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        digest.update(str(index.tz).encode())
+        digest.update(np.ascontiguousarray(index.values.astype('datetime64[ns]')).tobytes())
+    for column in sorted(df.select_dtypes(include=[np.number]).columns, key=str):
+        digest.update(str(column).encode())
+        digest.update(np.ascontiguousarray(df[column].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+def _scalar(value):
+    """Python number for storage, or None for values that are not numeric"""
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    return None
+
+
+def pack_trades(trades: List[Dict]) -> bytes:
+    """Trade records -> compressed column arrays"""
+    times = pd.DatetimeIndex([t['entry_time'] for t in trades] + [t['exit_time'] for t in trades])
+    tz = str(times.tz) if times.tz is not None else ''
+    if times.tz is not None:
+        times = times.tz_convert('UTC').tz_localize(None)
+    ns = times.values.astype('datetime64[ns]').view(np.int64)
+    arrays = {
+        'entry_time': ns[:len(trades)],
+        'exit_time': ns[len(trades):],
+        'type': np.array([ACTION_CODES[t['type']] for t in trades], dtype=np.int8),
+        'exit_reason': np.array([t['exit_reason'] for t in trades], dtype=str),
+        'tz': np.array(tz),
+    }
+    for field in TRADE_FLOAT_FIELDS:
+        arrays[field] = np.fromiter((t[field] for t in trades), dtype=np.float64, count=len(trades))
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def unpack_trades(blob: bytes, symbol: str) -> List[Dict]:
+    """Compressed column arrays -> trade records as run_backtest builds them"""
+    with np.load(io.BytesIO(blob)) as data:
+        arrays = {name: data[name] for name in data.files}
+
+    tz = str(arrays['tz'])
+    times = {}
+    for field in ('entry_time', 'exit_time'):
+        index = pd.DatetimeIndex(arrays[field].astype('datetime64[ns]'))
+        times[field] = index.tz_localize('UTC').tz_convert(tz) if tz else index
+
+    trades = []
+    for i in range(len(arrays['type'])):
+        trades.append({
+            'entry_time': times['entry_time'][i],
+            'exit_time': times['exit_time'][i],
+            'symbol': symbol,
+            'type': ACTIONS[arrays['type'][i]],
+            'size': float(arrays['size'][i]),
+            'entry_price': float(arrays['entry_price'][i]),
+            'exit_price': float(arrays['exit_price'][i]),
+            'stop_loss': float(arrays['stop_loss'][i]),
+            'take_profit': float(arrays['take_profit'][i]),
+            'pnl': float(arrays['pnl'][i]),
+            'pnl_pct': float(arrays['pnl_pct'][i]),
+            'exit_reason': str(arrays['exit_reason'][i]),
+            'duration': float(arrays['duration'][i]),
+            'confidence': float(arrays['confidence'][i]),
+        })
+    return trades
+
+
+class ExperimentStore:
+    """
+    Persistent SQLite store of backtest runs with parameter and metric indexes
+    پایگاه داده ماندگار نتایج بک‌تست با ایندکس پارامترها و معیارها
+
+    Every run is stored once under a key hashing the symbol, the bar data
+    fingerprint, the strategy parameters and the backtest settings, so a run
+    that was already computed is loaded instead of repeated. Parameters and
+    metrics are kept one row per value with (name, value) indexes, which
+    keeps filtered and sorted queries over tens of thousands of runs fast.
+    Trades are stored as compressed column arrays.
+    """
+
+    def __init__(self, path: str = 'data/experiments.sqlite'):
+        """
+        Open (or create) the store
+
+        Args:
+            path: SQLite database file; several processes may write to it at once
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def run_key(symbol: str, fingerprint: str, params: Dict, settings: Dict) -> str:
+        """Hash identifying a run: same key, same result"""
+        payload = json.dumps(
+            {'symbol': symbol, 'data': fingerprint, 'params': params, 'settings': settings},
+            sort_keys=True, default=str
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+    def __contains__(self, run_key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM runs WHERE run_key = ?", (run_key,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def record(self, run_key: str, symbol: str, start_date: str, end_date: str, fingerprint: str,
+               params: Dict, metrics: Dict, trades: List[Dict], settings: Optional[Dict] = None,
+               n_bars: Optional[int] = None, elapsed: Optional[float] = None) -> Optional[int]:
+        """
+        Store a finished run (no-op if the key is already stored)
+
+        Only numeric metrics are indexed; nested results are not stored.
+
+        Returns:
+            The run id, or None if the run was already stored or could not be written
+        """
+        try:
+            param_rows = [(name, _scalar(value)) for name, value in params.items()]
+            metric_rows = [(name, _scalar(value)) for name, value in metrics.items()]
+            metric_rows = [(name, value) for name, value in metric_rows if value is not None]
+            blob = pack_trades(trades)
+
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO runs (run_key, symbol, start_date, end_date, n_bars, "
+                    "data_fingerprint, settings, created_at, elapsed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_key, symbol, start_date, end_date, n_bars, fingerprint,
+                     json.dumps(settings or {}, sort_keys=True, default=str),
+                     datetime.now().isoformat(timespec='seconds'), elapsed)
+                )
+                if cursor.rowcount == 0:
+                    return None
+                run_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO params (run_id, name, value) VALUES (?, ?, ?)",
+                    [(run_id, name, value) for name, value in param_rows]
+                )
+                self._conn.executemany(
+                    "INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+                    [(run_id, name, value) for name, value in metric_rows]
+                )
+                self._conn.execute(
+                    "INSERT INTO trades (run_id, n_trades, data) VALUES (?, ?, ?)",
+                    (run_id, len(trades), sqlite3.Binary(blob))
+                )
+            return run_id
+
+        except Exception as e:
+            self.logger.error(f"Error recording experiment run: {e}")
+            return None
+
+    def load(self, run_key: str) -> Optional[Dict]:
+        """Stored run for this key (id, symbol, dates, params, metrics, trades), or None"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT id, symbol, start_date, end_date, elapsed FROM runs WHERE run_key = ?",
+                    (run_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                run_id, symbol, start_date, end_date, elapsed = row
+                params = dict(self._conn.execute(
+                    "SELECT name, value FROM params WHERE run_id = ?", (run_id,)).fetchall())
+                metrics = dict(self._conn.execute(
+                    "SELECT name, value FROM metrics WHERE run_id = ?", (run_id,)).fetchall())
+                blob = self._conn.execute(
+                    "SELECT data FROM trades WHERE run_id = ?", (run_id,)).fetchone()
+
+            return {
+                'id': run_id,
+                'symbol': symbol,
+                'start_date': start_date,
+                'end_date': end_date,
+                'elapsed': elapsed,
+                'params': params,
+                'metrics': metrics,
+                'trades': unpack_trades(blob[0], symbol) if blob else []
+            }
+
+        except Exception as e:
+            self.logger.error(f"Error loading experiment run: {e}")
+            return None
+
+    def load_trades(self, run_id: int) -> List[Dict]:
+        """Trade records of a stored run"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT r.symbol, t.data FROM runs r JOIN trades t ON t.run_id = r.id WHERE r.id = ?",
+                (run_id,)
+            ).fetchone()
+        return unpack_trades(row[1], row[0]) if row else []
+
+    @staticmethod
+    def _filters(table: str, filters: Optional[Dict]):
+        """SQL conditions for {name: value or (operator, value)} filters"""
+        clauses, args = [], []
+        for name, condition in (filters or {}).items():
+            operator, value = condition if isinstance(condition, tuple) else ('=', condition)
+            if operator == '==':
+                operator = '='
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+            clauses.append(f"r.id IN (SELECT run_id FROM {table} WHERE name = ? AND value {operator} ?)")
+            number = _scalar(value)
+            args += [name, value if number is None else number]
+        return clauses, args
+
+    def query(self, params: Optional[Dict] = None, metrics: Optional[Dict] = None,
+              symbol: Optional[str] = None, order_by: Optional[str] = None, ascending: bool = False,
+              limit: Optional[int] = None, run_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        Find stored runs, one row per run with its parameters and metrics as columns
+        جستجوی اجراهای ذخیره شده بر اساس پارامترها و معیارها
+
+        Args:
+            params: Parameter filters, {name: value} or {name: (operator, value)}
+            metrics: Metric filters in the same form, e.g. {'sharpe_ratio': ('>=', 1.0)}
+            symbol: Only runs on this symbol
+            order_by: Metric (or parameter) to sort by
+            ascending: Sort direction (default: best first for higher-is-better metrics)
+            limit: Maximum number of runs
+            run_ids: Only these runs
+
+        Example:
+            store.query(params={'FastMA': 9}, metrics={'total_trades': ('>', 50)},
+                        order_by='sharpe_ratio', limit=20)
+        """
+        try:
+            clauses, args = [], []
+            if symbol:
+                clauses.append("r.symbol = ?")
+                args.append(symbol)
+            if run_ids is not None:
+                run_ids = [int(i) for i in run_ids]
+                clauses.append(f"r.id IN ({', '.join('?' * len(run_ids))})" if run_ids else "0")
+                args += run_ids
+            for table, filters in (('params', params), ('metrics', metrics)):
+                table_clauses, table_args = self._filters(table, filters)
+                clauses += table_clauses
+                args += table_args
+
+            sql = "SELECT r.id FROM runs r"
+            if order_by:
+                with self._lock:
+                    is_param = self._conn.execute(
+                        "SELECT 1 FROM params WHERE name = ? LIMIT 1", (order_by,)).fetchone() is not None
+                sql += f" LEFT JOIN {'params' if is_param else 'metrics'} o ON o.run_id = r.id AND o.name = ?"
+                args = [order_by] + args
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            if order_by:
+                sql += f" ORDER BY o.value IS NULL, o.value {'ASC' if ascending else 'DESC'}, r.id"
+            else:
+                sql += " ORDER BY r.id"
+            if limit is not None:
+                sql += " LIMIT ?"
+                args.append(int(limit))
+
+            with self._lock:
+                ids = [row[0] for row in self._conn.execute(sql, args)]
+                if not ids:
+                    return pd.DataFrame()
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected (id INTEGER PRIMARY KEY)")
+                self._conn.execute("DELETE FROM selected")
+                self._conn.executemany("INSERT INTO selected (id) VALUES (?)", ((i,) for i in ids))
+                runs = pd.read_sql_query(
+                    "SELECT r.id, r.symbol, r.start_date, r.end_date, r.n_bars, r.created_at, r.elapsed, "
+                    "t.n_trades FROM runs r LEFT JOIN trades t ON t.run_id = r.id "
+                    "WHERE r.id IN (SELECT id FROM selected)", self._conn
+                )
+                values = pd.read_sql_query(
+                    "SELECT run_id, name, value FROM params WHERE run_id IN (SELECT id FROM selected) "
+                    "UNION ALL "
+                    "SELECT run_id, name, value FROM metrics WHERE run_id IN (SELECT id FROM selected)",
+                    self._conn
+                )
+                self._conn.execute("DELETE FROM selected")
+
+            wide = values.pivot(index='run_id', columns='name', values='value')
+            frame = runs.set_index('id').join(wide)
+            frame.index.name = 'run_id'
+            return frame.loc[ids]
+
+        except ValueError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error querying experiment runs: {e}")
+            return pd.DataFrame()
+
+    def compare(self, run_ids: Iterable[int], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Side-by-side parameters and metrics of chosen runs (one column per run)"""
+        run_ids = list(run_ids)
+        frame = self.query(run_ids=run_ids)
+        frame = frame.loc[[i for i in run_ids if i in frame.index]]
+        if columns:
+            frame = frame[columns]
+        return frame.T
+
+    def delete(self, run_ids: Iterable[int]):
+        """Remove runs (and their parameters, metrics and trades)"""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM runs WHERE id = ?", ((int(i),) for i in run_ids))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'ExperimentStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
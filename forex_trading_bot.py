@@ -1,22 +1,40 @@
 import pandas as pd
 import numpy as np
 import MetaTrader5 as mt5
-import talib
 from datetime import datetime, timedelta
 import logging
 import json
 import time
+from concurrent.futures import Future
 from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+from order_executor import OrderExecutor
+from indicators import IndicatorEngine
+from indicator_cache import IndicatorCache
+from position_tracker import PositionTracker
+from log_pipeline import LogPipeline
+from market_snapshot import MarketSnapshot
+
 class AdvancedForexTradingBot:
     """
     Advanced Forex Trading Bot with Multi-Strategy Approach
     استراتژی پیشرفته معاملات فارکس با دقت بالا
     """
     
-    def __init__(self, account: int, password: str, server: str, symbol: str = "EURUSD"):
+    # Indicator columns read by the signal logic on each timeframe; only these
+    # (and their dependencies) are computed
+    REQUIRED_INDICATORS = {
+        'M15': ['EMA_9', 'EMA_21', 'RSI', 'MACD', 'MACD_signal', 'Stoch_K', 'Stoch_D', 'Williams_R',
+                'OBV', 'BB_upper', 'BB_middle', 'BB_lower', 'SAR', 'ATR'],
+        'H1': ['EMA_9', 'EMA_21', 'RSI', 'MACD', 'MACD_signal', 'OBV', 'ADX', 'DI_plus', 'DI_minus'],
+        'H4': ['EMA_21', 'EMA_50', 'Support', 'Resistance', 'ADX'],
+        'D1': ['EMA_21', 'EMA_50'],
+    }
+    
+    def __init__(self, account: int, password: str, server: str, symbol: str = "EURUSD",
+                 indicator_cache: Optional[IndicatorCache] = None):
         """
         Initialize the trading bot
         
@@ -25,6 +43,7 @@ class AdvancedForexTradingBot:
             password: MT5 password
             server: MT5 server name
             symbol: Trading symbol (default: EURUSD)
+            indicator_cache: Optional cache for indicator results
         """
         self.account = account
         self.password = password
@@ -45,21 +64,32 @@ class AdvancedForexTradingBot:
             'D1': mt5.TIMEFRAME_D1
         }
         
+        # Indicator engine
+        self.indicators = IndicatorEngine(cache=indicator_cache)
+        
         # Performance tracking
         self.trades_today = []
         self.daily_pnl = 0.0
         self.total_trades = 0
         self.winning_trades = 0
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('forex_bot.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Optional metrics registry (set by LiveForexTrader)
+        self.metrics = None
+        
+        # Shared latest quotes (polled once its thread is started)
+        self.market = MarketSnapshot([symbol])
+        
+        # Order execution
+        self.order_executor = OrderExecutor()
+        self.order_executor.market = self.market
+        self.order_timeout = 30  # seconds to wait for a synchronous fill
+        
+        # Incremental deal/position tracking
+        self.position_tracker = PositionTracker()
+        
+        # Setup logging (standalone use; the live trader has already started its pipeline)
+        if not logging.getLogger().handlers:
+            LogPipeline(main_log='forex_bot.log').start()
         self.logger = logging.getLogger(__name__)
         
     def initialize_mt5(self) -> bool:
@@ -80,11 +110,11 @@ class AdvancedForexTradingBot:
             self.logger.error(f"MT5 initialization error: {e}")
             return False
     
-    def get_market_data(self, timeframe: str, count: int = 500) -> pd.DataFrame:
-        """Get market data for analysis"""
+    def get_market_data(self, timeframe: str, count: int = 500, symbol: Optional[str] = None) -> pd.DataFrame:
+        """Get market data for analysis (defaults to the bot's symbol)"""
         try:
             rates = mt5.copy_rates_from_pos(
-                self.symbol, 
+                symbol or self.symbol, 
                 self.timeframes[timeframe], 
                 0, 
                 count
@@ -92,7 +122,12 @@ class AdvancedForexTradingBot:
             
             if rates is None:
                 self.logger.error(f"Failed to get market data: {mt5.last_error()}")
+                if self.metrics is not None:
+                    self.metrics.inc('market_data_fetches_total', timeframe=timeframe, status='error')
                 return pd.DataFrame()
+            
+            if self.metrics is not None:
+                self.metrics.inc('market_data_fetches_total', timeframe=timeframe, status='ok')
                 
             df = pd.DataFrame(rates)
             df['time'] = pd.to_datetime(df['time'], unit='s')
@@ -104,91 +139,34 @@ class AdvancedForexTradingBot:
             self.logger.error(f"Error getting market data: {e}")
             return pd.DataFrame()
     
-    def calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate comprehensive technical indicators"""
-        try:
-            # Price data
-            high = df['high'].values
-            low = df['low'].values
-            close = df['close'].values
-            volume = df['tick_volume'].values
-            
-            # Moving Averages
-            df['EMA_9'] = talib.EMA(close, timeperiod=9)
-            df['EMA_21'] = talib.EMA(close, timeperiod=21)
-            df['EMA_50'] = talib.EMA(close, timeperiod=50)
-            df['EMA_200'] = talib.EMA(close, timeperiod=200)
-            
-            df['SMA_20'] = talib.SMA(close, timeperiod=20)
-            df['SMA_50'] = talib.SMA(close, timeperiod=50)
-            
-            # MACD
-            df['MACD'], df['MACD_signal'], df['MACD_hist'] = talib.MACD(close)
-            
-            # RSI
-            df['RSI'] = talib.RSI(close, timeperiod=14)
-            df['RSI_9'] = talib.RSI(close, timeperiod=9)
-            
-            # Stochastic
-            df['Stoch_K'], df['Stoch_D'] = talib.STOCH(high, low, close)
-            
-            # Bollinger Bands
-            df['BB_upper'], df['BB_middle'], df['BB_lower'] = talib.BBANDS(close)
-            
-            # ATR for volatility
-            df['ATR'] = talib.ATR(high, low, close, timeperiod=14)
-            
-            # ADX for trend strength
-            df['ADX'] = talib.ADX(high, low, close, timeperiod=14)
-            df['DI_plus'] = talib.PLUS_DI(high, low, close, timeperiod=14)
-            df['DI_minus'] = talib.MINUS_DI(high, low, close, timeperiod=14)
-            
-            # Williams %R
-            df['Williams_R'] = talib.WILLR(high, low, close, timeperiod=14)
-            
-            # CCI
-            df['CCI'] = talib.CCI(high, low, close, timeperiod=14)
-            
-            # Parabolic SAR
-            df['SAR'] = talib.SAR(high, low)
-            
-            # Volume indicators
-            df['OBV'] = talib.OBV(close, volume)
-            df['AD'] = talib.AD(high, low, close, volume)
-            
-            # Support and Resistance levels
-            df = self.calculate_support_resistance(df)
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating indicators: {e}")
-            return df
+    def calculate_technical_indicators(self, df: pd.DataFrame, timeframe: Optional[str] = None,
+                                       columns: Optional[List[str]] = None,
+                                       symbol: Optional[str] = None) -> pd.DataFrame:
+        """Calculate the technical indicators the strategy reads on a timeframe (all timeframes if None)"""
+        if columns is None:
+            if timeframe is None:
+                columns = list(dict.fromkeys(c for cols in self.REQUIRED_INDICATORS.values() for c in cols))
+            else:
+                columns = self.REQUIRED_INDICATORS[timeframe]
+        return self.indicators.compute(df, columns, symbol=symbol or self.symbol, timeframe=timeframe)
     
     def calculate_support_resistance(self, df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
         """Calculate dynamic support and resistance levels"""
-        try:
-            df['Support'] = df['low'].rolling(window=window).min()
-            df['Resistance'] = df['high'].rolling(window=window).max()
-            
-            # Pivot points
-            df['Pivot'] = (df['high'] + df['low'] + df['close']) / 3
-            df['R1'] = 2 * df['Pivot'] - df['low']
-            df['S1'] = 2 * df['Pivot'] - df['high']
-            df['R2'] = df['Pivot'] + (df['high'] - df['low'])
-            df['S2'] = df['Pivot'] - (df['high'] - df['low'])
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating support/resistance: {e}")
-            return df
+        return self.indicators.compute(
+            df, ['Support', 'Resistance', 'Pivot', 'R1', 'S1', 'R2', 'S2'],
+            params={'SR': {'window': window}}
+        )
     
     def advanced_signal_generation(self, df_m15: pd.DataFrame, df_h1: pd.DataFrame, 
-                                 df_h4: pd.DataFrame, df_d1: pd.DataFrame) -> Dict:
+                                 df_h4: pd.DataFrame, df_d1: pd.DataFrame,
+                                 symbol: Optional[str] = None) -> Dict:
         """
         Advanced multi-timeframe signal generation
         تولید سیگنال پیشرفته با تحلیل چند تایم فریم
+        
+        With a symbol whose quote is fresh in the market snapshot, entries
+        (and their stop loss and take profit) are priced at the live ask/bid
+        instead of the last M15 close.
         """
         try:
             signal = {
@@ -227,13 +205,20 @@ class AdvancedForexTradingBot:
             signal['strength'] = total_score
             signal['confidence'] = min(abs(total_score) * 10, 100)
             
+            # Live quote, if the snapshot has a fresh one
+            quote = self.market.quote(symbol) if symbol else None
+            
             # Generate trading decision
             if total_score > 0.6:
                 signal['action'] = 'BUY'
+                if quote is not None:
+                    signal['entry_price'] = current_price = quote.ask
                 signal['stop_loss'] = current_price - (df_m15['ATR'].iloc[-1] * 2)
                 signal['take_profit'] = current_price + (df_m15['ATR'].iloc[-1] * 4)
             elif total_score < -0.6:
                 signal['action'] = 'SELL'
+                if quote is not None:
+                    signal['entry_price'] = current_price = quote.bid
                 signal['stop_loss'] = current_price + (df_m15['ATR'].iloc[-1] * 2)
                 signal['take_profit'] = current_price - (df_m15['ATR'].iloc[-1] * 4)
             
@@ -457,33 +442,51 @@ class AdvancedForexTradingBot:
             self.logger.error(f"Error calculating position size: {e}")
             return self.lot_size
     
-    def execute_trade(self, signal: Dict) -> bool:
-        """Execute trade based on signal"""
+    def execute_trade(self, signal: Dict, symbol: Optional[str] = None) -> bool:
+        """Execute trade based on signal and wait for the result"""
         try:
-            if signal['action'] == 'HOLD':
+            future = self.submit_trade(signal, symbol)
+            if future is None:
                 return False
             
-            # Get account info
-            account_info = mt5.account_info()
+            report = future.result(timeout=self.order_timeout)
+            return report['success']
+            
+        except Exception as e:
+            self.logger.error(f"Error executing trade: {e}")
+            return False
+    
+    def submit_trade(self, signal: Dict, symbol: Optional[str] = None) -> Optional[Future]:
+        """
+        Queue a trade on the order executor thread
+        
+        Returns a future resolving to the execution report, or None if no order was sent.
+        """
+        try:
+            if signal['action'] == 'HOLD':
+                return None
+            
+            # Get account info (cached for a few seconds)
+            account_info = self.order_executor.get_account_info()
             if account_info is None:
                 self.logger.error("Failed to get account info")
-                return False
+                return None
             
             # Check daily loss limit
             if abs(self.daily_pnl) >= account_info.balance * self.max_daily_loss:
                 self.logger.warning("Daily loss limit reached. No new trades.")
-                return False
+                return None
             
             # Calculate position size
             stop_loss_pips = abs(signal['entry_price'] - signal['stop_loss']) * 10000
             position_size = self.calculate_position_size(stop_loss_pips, account_info.balance)
             
-            # Prepare trade request
+            # Prepare trade request (price is refreshed from the tick at send time)
             trade_type = mt5.ORDER_TYPE_BUY if signal['action'] == 'BUY' else mt5.ORDER_TYPE_SELL
             
             request = {
                 "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": self.symbol,
+                "symbol": symbol or self.symbol,
                 "volume": position_size,
                 "type": trade_type,
                 "price": signal['entry_price'],
@@ -496,15 +499,26 @@ class AdvancedForexTradingBot:
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
             
-            # Send trade request
-            result = mt5.order_send(request)
+            future = self.order_executor.submit(request, signal['entry_price'])
+            future.add_done_callback(lambda f: self._on_trade_result(signal, f))
+            return future
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
-                self.logger.error(f"Trade failed: {result.retcode} - {result.comment}")
-                return False
+        except Exception as e:
+            self.logger.error(f"Error submitting trade: {e}")
+            return None
+    
+    def _on_trade_result(self, signal: Dict, future: Future):
+        """Log the execution report and update statistics"""
+        try:
+            report = future.result()
+            
+            if not report['success']:
+                self.logger.error(f"Trade failed: {report['retcode']} - {report['comment']}")
+                return
             
             # Log successful trade
-            self.logger.info(f"Trade executed: {signal['action']} {position_size} lots at {signal['entry_price']}")
+            self.logger.info(f"Trade executed: {signal['action']} {report['volume']} lots at {report['fill_price']} "
+                           f"(latency {report['latency_ms']:.1f}ms, slippage {report['slippage_pips']:.1f} pips)")
             self.logger.info(f"SL: {signal['stop_loss']}, TP: {signal['take_profit']}, Confidence: {signal['confidence']:.1f}%")
             
             # Update statistics
@@ -512,46 +526,33 @@ class AdvancedForexTradingBot:
             self.trades_today.append({
                 'time': datetime.now(),
                 'action': signal['action'],
-                'volume': position_size,
-                'price': signal['entry_price'],
+                'volume': report['volume'],
+                'price': report['fill_price'],
                 'sl': signal['stop_loss'],
                 'tp': signal['take_profit'],
-                'confidence': signal['confidence']
+                'confidence': signal['confidence'],
+                'latency_ms': report['latency_ms'],
+                'slippage_pips': report['slippage_pips']
             })
             
-            return True
-            
         except Exception as e:
-            self.logger.error(f"Error executing trade: {e}")
-            return False
+            self.logger.error(f"Error handling trade result: {e}")
     
     def monitor_positions(self):
         """Monitor open positions and update statistics"""
         try:
-            positions = mt5.positions_get(symbol=self.symbol)
-            
-            if positions is None:
-                return
+            # Only deals after the last seen ticket are fetched
+            new_deals = self.position_tracker.update()
             
-            for position in positions:
-                # Check for position updates
-                if position.profit != 0:
-                    self.daily_pnl += position.profit
+            # Realized today plus current floating P&L (recomputed, not accumulated)
+            self.daily_pnl = self.position_tracker.get_daily_pnl()
             
             # Update win rate
-            history_deals = mt5.history_deals_get(
-                datetime.now().replace(hour=0, minute=0, second=0),
-                datetime.now()
-            )
-            
-            if history_deals:
-                today_deals = [deal for deal in history_deals if deal.symbol == self.symbol]
-                profitable_deals = [deal for deal in today_deals if deal.profit > 0]
-                
-                if len(today_deals) > 0:
-                    self.winning_trades = len(profitable_deals)
-                    win_rate = (self.winning_trades / len(today_deals)) * 100
-                    self.logger.info(f"Today's Win Rate: {win_rate:.1f}% ({self.winning_trades}/{len(today_deals)})")
+            if new_deals and self.position_tracker.daily_closed > 0:
+                self.winning_trades = self.position_tracker.daily_wins
+                win_rate = self.position_tracker.get_daily_win_rate()
+                self.logger.info(f"Today's Win Rate: {win_rate:.1f}% "
+                               f"({self.winning_trades}/{self.position_tracker.daily_closed})")
             
         except Exception as e:
             self.logger.error(f"Error monitoring positions: {e}")
@@ -578,10 +579,10 @@ class AdvancedForexTradingBot:
                         continue
                     
                     # Calculate indicators for all timeframes
-                    df_m15 = self.calculate_technical_indicators(df_m15)
-                    df_h1 = self.calculate_technical_indicators(df_h1)
-                    df_h4 = self.calculate_technical_indicators(df_h4)
-                    df_d1 = self.calculate_technical_indicators(df_d1)
+                    df_m15 = self.calculate_technical_indicators(df_m15, 'M15')
+                    df_h1 = self.calculate_technical_indicators(df_h1, 'H1')
+                    df_h4 = self.calculate_technical_indicators(df_h4, 'H4')
+                    df_d1 = self.calculate_technical_indicators(df_d1, 'D1')
                     
                     # Generate trading signal
                     signal = self.advanced_signal_generation(df_m15, df_h1, df_h4, df_d1)
@@ -609,6 +610,7 @@ class AdvancedForexTradingBot:
         except Exception as e:
             self.logger.error(f"Critical error: {e}")
         finally:
+            self.order_executor.stop()
             mt5.shutdown()
             self.logger.info("MT5 connection closed")
 
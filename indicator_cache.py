@@ -0,0 +1,245 @@
+import numpy as np
+import os
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class IndicatorCache:
+    """
+    Content-addressed indicator cache with an LRU memory tier and a disk tier
+    کش اندیکاتورها بر اساس محتوا با حافظه LRU و ذخیره روی دیسک
+
+    Entries are keyed by a hash of the symbol, timeframe, bar range, indicator
+    columns/parameters and the price data itself, so a hit always returns what
+    a fresh computation would. Indicators are causal, so a request for a
+    shorter series with the same first bars is also served from a longer
+    cached entry.
+    """
+
+    def __init__(self, max_memory_mb: float = 128, cache_dir: Optional[str] = None,
+                 max_disk_mb: float = 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_memory_mb: Memory tier budget; least recently used entries are evicted beyond it
+            cache_dir: Directory for the disk tier (None = memory only)
+            max_disk_mb: Disk tier budget; least recently used files are deleted beyond it
+        """
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.cache_dir = cache_dir
+
+        # key -> (arrays, prices, nbytes, namespace)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+
+        # (symbol, timeframe, first bar, spec key) -> keys, for prefix reuse
+        self._namespaces = {}
+
+        self._disk_files = {}
+        self._disk_bytes = 0
+
+        self.stats = {'hits': 0, 'prefix_hits': 0, 'disk_hits': 0, 'misses': 0,
+                      'evictions': 0, 'disk_evictions': 0}
+
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    @staticmethod
+    def make_key(prices: Dict[str, np.ndarray], spec_key: str, symbol: Optional[str] = None,
+                 timeframe: Optional[str] = None, bar_range: Optional[Tuple] = None) -> str:
+        """Content hash of the inputs and the requested indicators"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((symbol, timeframe, bar_range, spec_key)).encode())
+        for name in sorted(prices):
+            values = np.ascontiguousarray(prices[name], dtype=np.float64)
+            digest.update(name.encode())
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def get_or_compute(self, prices: Dict[str, np.ndarray], spec_key: str,
+                       compute: Callable[[], Dict[str, np.ndarray]], symbol: Optional[str] = None,
+                       timeframe: Optional[str] = None, bar_range: Optional[Tuple] = None) -> Dict[str, np.ndarray]:
+        """
+        Return cached indicator arrays for these inputs, computing them on a miss
+
+        Returned arrays are read-only and shared; copy before modifying.
+        """
+        key = self.make_key(prices, spec_key, symbol, timeframe, bar_range)
+        namespace = (symbol, timeframe, bar_range[0], spec_key) if bar_range else None
+
+        arrays = self._get_memory(key)
+        if arrays is not None:
+            return arrays
+
+        if namespace is not None:
+            arrays = self._get_prefix(namespace, prices)
+            if arrays is not None:
+                return arrays
+
+        arrays = self._get_disk(key)
+        if arrays is not None:
+            self._put_memory(key, arrays, prices, namespace)
+            return arrays
+
+        with self._lock:
+            self.stats['misses'] += 1
+
+        arrays = compute()
+        for values in arrays.values():
+            values.flags.writeable = False
+
+        self._put_memory(key, arrays, prices, namespace)
+        self._put_disk(key, arrays)
+        return arrays
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Exact lookup in the memory tier"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def _get_prefix(self, namespace: Tuple, prices: Dict[str, np.ndarray]) -> Optional[Dict[str, np.ndarray]]:
+        """Serve a request from a longer cached series that starts with the same bars"""
+        n = len(next(iter(prices.values()))) if prices else 0
+        with self._lock:
+            for key in self._namespaces.get(namespace, ()):
+                arrays, cached_prices, _, _ = self._memory[key]
+                if len(next(iter(cached_prices.values()))) < n or set(cached_prices) != set(prices):
+                    continue
+                if all(np.array_equal(cached_prices[c][:n], prices[c]) for c in prices):
+                    self._memory.move_to_end(key)
+                    self.stats['prefix_hits'] += 1
+                    return {c: values[:n] for c, values in arrays.items()}
+        return None
+
+    def _put_memory(self, key: str, arrays: Dict[str, np.ndarray],
+                    prices: Dict[str, np.ndarray], namespace: Optional[Tuple]):
+        """Insert into the memory tier and evict least recently used entries over budget"""
+        prices = {c: np.array(v, dtype=np.float64) for c, v in prices.items()}
+        nbytes = sum(v.nbytes for v in arrays.values()) + sum(v.nbytes for v in prices.values())
+        if nbytes > self.max_memory_bytes:
+            return
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+
+            self._memory[key] = (arrays, prices, nbytes, namespace)
+            self._memory_bytes += nbytes
+            if namespace is not None:
+                self._namespaces.setdefault(namespace, []).append(key)
+
+            while self._memory_bytes > self.max_memory_bytes:
+                old_key, (_, _, old_bytes, old_namespace) = self._memory.popitem(last=False)
+                self._memory_bytes -= old_bytes
+                self.stats['evictions'] += 1
+                if old_namespace is not None:
+                    keys = self._namespaces.get(old_namespace, [])
+                    if old_key in keys:
+                        keys.remove(old_key)
+                    if not keys:
+                        self._namespaces.pop(old_namespace, None)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _scan_disk(self):
+        """Index existing cache files"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                size = entry.stat().st_size
+                self._disk_files[entry.path] = size
+                self._disk_bytes += size
+
+    def _get_disk(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Exact lookup in the disk tier"""
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Discarding unreadable indicator cache file {path}: {e}")
+            return None
+
+        for values in arrays.values():
+            values.flags.writeable = False
+        os.utime(path)
+        with self._lock:
+            self.stats['disk_hits'] += 1
+        return arrays
+
+    def _put_disk(self, key: str, arrays: Dict[str, np.ndarray]):
+        """Write to the disk tier and delete least recently used files over budget"""
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            self.logger.error(f"Error writing indicator cache file: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_bytes += size - self._disk_files.get(path, 0)
+            self._disk_files[path] = size
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+
+            # Least recently used first (hits refresh the modification time)
+            by_age = sorted(self._disk_files, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            for old_path in by_age:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                if old_path == path:
+                    continue
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+                self._disk_bytes -= self._disk_files.pop(old_path)
+                self.stats['disk_evictions'] += 1
+
+    def clear(self):
+        """Drop all memory entries (disk files are kept)"""
+        with self._lock:
+            self._memory.clear()
+            self._namespaces.clear()
+            self._memory_bytes = 0
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = sum(self.stats[k] for k in ('hits', 'prefix_hits', 'disk_hits', 'misses'))
+            hits = lookups - self.stats['misses']
+            return {
+                **self.stats,
+                'hit_rate': hits / lookups * 100 if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_mb': self._memory_bytes / (1024 * 1024),
+                'disk_files': len(self._disk_files),
+                'disk_mb': self._disk_bytes / (1024 * 1024)
+            }
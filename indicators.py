@@ -0,0 +1,346 @@
+import numpy as np
+import pandas as pd
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy_indicators
+from indicator_cache import IndicatorCache
+
+try:
+    import talib
+except ImportError:
+    talib = None
+
+# Raw bar columns indicators can depend on
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'tick_volume')
+
+
+@dataclass
+class IndicatorSpec:
+    """A registered indicator: the columns it produces and what it needs"""
+    name: str
+    outputs: Tuple[str, ...]
+    depends: Tuple[str, ...]
+    compute: Callable
+    params: Dict = field(default_factory=dict)
+    intermediate: bool = False
+
+
+def get_backend(name: Optional[str] = None):
+    """
+    Resolve an indicator backend module
+
+    Args:
+        name: 'talib', 'numpy' or None (TA-Lib when installed, else NumPy)
+    """
+    if name is None:
+        return talib if talib is not None else numpy_indicators
+    if name == 'talib':
+        if talib is None:
+            raise ImportError("TA-Lib is not installed; use the 'numpy' indicator backend")
+        return talib
+    if name == 'numpy':
+        return numpy_indicators
+    raise ValueError(f"Unknown indicator backend: {name}")
+
+
+def wilder(ta, values: np.ndarray, period: int, start: int, seed: float) -> np.ndarray:
+    """
+    Wilder smoothing (alpha = 1/period) seeded with ``seed`` at index ``start``
+
+    With TA-Lib this runs as an EMA of period 2 * period - 1 over a seed block
+    followed by the remaining values, so it stays in C.
+    """
+    if ta is not talib:
+        return numpy_indicators.wilder(values, period, start, seed)
+
+    out = np.full(len(values), np.nan)
+    if start >= len(values) or np.isnan(seed):
+        return out
+
+    span = 2 * period - 1
+    z = np.empty(span + len(values) - start - 1)
+    z[:span] = seed
+    z[span:] = values[start + 1:]
+    out[start:] = ta.EMA(z, timeperiod=span)[span - 1:]
+    return out
+
+
+# Indicator implementations: ta is the backend module, ctx maps column name -> float64 array
+
+def _ema(ta, ctx, timeperiod):
+    return ta.EMA(ctx['close'], timeperiod=timeperiod)
+
+
+def _sma(ta, ctx, timeperiod):
+    return ta.SMA(ctx['close'], timeperiod=timeperiod)
+
+
+def _macd(ta, ctx, fastperiod=12, slowperiod=26, signalperiod=9):
+    return ta.MACD(ctx['close'], fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod)
+
+
+def _rsi(ta, ctx, timeperiod):
+    return ta.RSI(ctx['close'], timeperiod=timeperiod)
+
+
+def _stoch(ta, ctx, fastk_period=5, slowk_period=3, slowd_period=3):
+    return ta.STOCH(ctx['high'], ctx['low'], ctx['close'], fastk_period=fastk_period,
+                    slowk_period=slowk_period, slowd_period=slowd_period)
+
+
+def _bbands(ta, ctx, timeperiod=20, nbdevup=2.0, nbdevdn=2.0):
+    return ta.BBANDS(ctx['close'], timeperiod=timeperiod, nbdevup=nbdevup, nbdevdn=nbdevdn)
+
+
+def _true_range(ta, ctx):
+    return ta.TRANGE(ctx['high'], ctx['low'], ctx['close'])
+
+
+def _directional_movement(ta, ctx):
+    return numpy_indicators.directional_movement(ctx['high'], ctx['low'])
+
+
+def _smoother(ta):
+    return lambda values, period, start, seed: wilder(ta, values, period, start, seed)
+
+
+def _atr(ta, ctx, timeperiod):
+    return numpy_indicators.atr_from_tr(ctx['TR'], timeperiod, _smoother(ta))
+
+
+def _directional_index(ta, ctx, timeperiod):
+    return numpy_indicators.di_from_dm(ctx['TR'], ctx['PLUS_DM'], ctx['MINUS_DM'], timeperiod, _smoother(ta))
+
+
+def _adx(ta, ctx, timeperiod):
+    return numpy_indicators.adx_from_di(ctx['DI_plus'], ctx['DI_minus'], timeperiod, _smoother(ta))
+
+
+def _willr(ta, ctx, timeperiod):
+    return ta.WILLR(ctx['high'], ctx['low'], ctx['close'], timeperiod=timeperiod)
+
+
+def _cci(ta, ctx, timeperiod):
+    return ta.CCI(ctx['high'], ctx['low'], ctx['close'], timeperiod=timeperiod)
+
+
+def _sar(ta, ctx, acceleration=0.02, maximum=0.2):
+    return ta.SAR(ctx['high'], ctx['low'], acceleration=acceleration, maximum=maximum)
+
+
+def _obv(ta, ctx):
+    return ta.OBV(ctx['close'], ctx['tick_volume'])
+
+
+def _ad(ta, ctx):
+    return ta.AD(ctx['high'], ctx['low'], ctx['close'], ctx['tick_volume'])
+
+
+def _support_resistance(ta, ctx, window=20):
+    support = pd.Series(ctx['low']).rolling(window=window).min().values
+    resistance = pd.Series(ctx['high']).rolling(window=window).max().values
+    return support, resistance
+
+
+def _pivots(ta, ctx):
+    high, low, close = ctx['high'], ctx['low'], ctx['close']
+    pivot = (high + low + close) / 3
+    return (pivot, 2 * pivot - low, 2 * pivot - high,
+            pivot + (high - low), pivot - (high - low))
+
+
+def default_specs() -> List[IndicatorSpec]:
+    """Indicators used by the bot and the backtester"""
+    specs = [
+        IndicatorSpec(f'EMA_{p}', (f'EMA_{p}',), ('close',), _ema, {'timeperiod': p})
+        for p in (9, 21, 50, 200)
+    ]
+    specs += [
+        IndicatorSpec(f'SMA_{p}', (f'SMA_{p}',), ('close',), _sma, {'timeperiod': p})
+        for p in (20, 50)
+    ]
+    specs += [
+        IndicatorSpec('MACD', ('MACD', 'MACD_signal', 'MACD_hist'), ('close',), _macd),
+        IndicatorSpec('RSI', ('RSI',), ('close',), _rsi, {'timeperiod': 14}),
+        IndicatorSpec('RSI_9', ('RSI_9',), ('close',), _rsi, {'timeperiod': 9}),
+        IndicatorSpec('STOCH', ('Stoch_K', 'Stoch_D'), ('high', 'low', 'close'), _stoch),
+        IndicatorSpec('BBANDS', ('BB_upper', 'BB_middle', 'BB_lower'), ('close',), _bbands, {'timeperiod': 20}),
+
+        # True range and directional movement are shared by ATR, DI and ADX
+        IndicatorSpec('TR', ('TR',), ('high', 'low', 'close'), _true_range, intermediate=True),
+        IndicatorSpec('DM', ('PLUS_DM', 'MINUS_DM'), ('high', 'low'), _directional_movement, intermediate=True),
+        IndicatorSpec('ATR', ('ATR',), ('TR',), _atr, {'timeperiod': 14}),
+        IndicatorSpec('DI', ('DI_plus', 'DI_minus'), ('TR', 'DM'), _directional_index, {'timeperiod': 14}),
+        IndicatorSpec('ADX', ('ADX',), ('DI',), _adx, {'timeperiod': 14}),
+
+        IndicatorSpec('WILLR', ('Williams_R',), ('high', 'low', 'close'), _willr, {'timeperiod': 14}),
+        IndicatorSpec('CCI', ('CCI',), ('high', 'low', 'close'), _cci, {'timeperiod': 14}),
+        IndicatorSpec('SAR', ('SAR',), ('high', 'low'), _sar),
+        IndicatorSpec('OBV', ('OBV',), ('close', 'tick_volume'), _obv),
+        IndicatorSpec('AD', ('AD',), ('high', 'low', 'close', 'tick_volume'), _ad),
+        IndicatorSpec('SR', ('Support', 'Resistance'), ('high', 'low'), _support_resistance, {'window': 20}),
+        IndicatorSpec('PIVOTS', ('Pivot', 'R1', 'S1', 'R2', 'S2'), ('high', 'low', 'close'), _pivots),
+    ]
+    return specs
+
+
+class IndicatorEngine:
+    """
+    Dependency-aware indicator computation
+    محاسبه اندیکاتورها بر اساس وابستگی‌ها
+
+    Strategies declare the columns they read; only those indicators and
+    their dependencies are computed, and shared intermediates (such as true
+    range) are computed once per frame.
+    """
+
+    def __init__(self, specs: Optional[Iterable[IndicatorSpec]] = None, backend: Optional[str] = None,
+                 cache: Optional[IndicatorCache] = None):
+        """
+        Initialize the engine
+
+        Args:
+            specs: Indicator specs to register (default: default_specs())
+            backend: 'talib', 'numpy' or None (TA-Lib when installed, else NumPy)
+            cache: Optional IndicatorCache shared with other engines
+        """
+        self.backend = get_backend(backend)
+        self.cache = cache
+        self.specs = {}
+        self.column_owner = {}
+        self.logger = logging.getLogger(__name__)
+
+        for spec in (default_specs() if specs is None else specs):
+            self.register(spec)
+
+    def register(self, spec: IndicatorSpec):
+        """Register (or replace) an indicator"""
+        for dep in spec.depends:
+            if dep not in PRICE_COLUMNS and dep not in self.specs:
+                raise ValueError(f"Unknown dependency '{dep}' for indicator {spec.name}")
+        self.specs[spec.name] = spec
+        for column in spec.outputs:
+            self.column_owner[column] = spec.name
+
+    @property
+    def columns(self) -> List[str]:
+        """All public (non-intermediate) output columns"""
+        return [c for spec in self.specs.values() if not spec.intermediate for c in spec.outputs]
+
+    def resolve(self, columns: Iterable[str]) -> List[str]:
+        """Indicator names needed for the requested columns, in dependency order"""
+        order = []
+        visiting = set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Circular indicator dependency at {name}")
+            visiting.add(name)
+            for dep in self.specs[name].depends:
+                if dep in self.specs:
+                    visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for column in columns:
+            if column in PRICE_COLUMNS:
+                continue
+            if column not in self.column_owner:
+                raise ValueError(f"Unknown indicator column '{column}'")
+            visit(self.column_owner[column])
+
+        return order
+
+    def compute_arrays(self, prices: Dict[str, np.ndarray], columns: Optional[Iterable[str]] = None,
+                       params: Optional[Dict[str, Dict]] = None) -> Dict[str, np.ndarray]:
+        """
+        Compute indicator arrays from raw price arrays
+
+        Args:
+            prices: Raw bar columns (high, low, close, tick_volume, ...)
+            columns: Requested output columns (None = all public columns)
+            params: Per-indicator parameter overrides, e.g. {'SR': {'window': 50}}
+
+        Returns:
+            Dict of requested column name -> array
+        """
+        requested = self.columns if columns is None else list(columns)
+        params = params or {}
+
+        ctx = {name: np.asarray(values, dtype=np.float64) for name, values in prices.items()}
+        for name in self.resolve(requested):
+            spec = self.specs[name]
+            result = spec.compute(self.backend, ctx, **{**spec.params, **params.get(name, {})})
+            if len(spec.outputs) == 1:
+                result = (result,)
+            for column, values in zip(spec.outputs, result):
+                ctx[column] = values
+
+        return {column: ctx[column] for column in requested if column not in PRICE_COLUMNS}
+
+    def cache_key(self, columns: Iterable[str], params: Optional[Dict[str, Dict]] = None) -> Tuple[str, List[str]]:
+        """
+        Describe a request for the indicator cache
+
+        Returns:
+            (spec key covering backend, columns and effective parameters,
+             raw price columns the request depends on)
+        """
+        params = params or {}
+        order = self.resolve(columns)
+        effective = [(name, sorted({**self.specs[name].params, **params.get(name, {})}.items()))
+                     for name in order]
+        inputs = sorted({dep for name in order for dep in self.specs[name].depends if dep in PRICE_COLUMNS})
+        return repr((self.backend.__name__, sorted(columns), effective)), inputs
+
+    def frame_arrays(self, df: pd.DataFrame, columns: Optional[Iterable[str]] = None,
+                     params: Optional[Dict[str, Dict]] = None, symbol: Optional[str] = None,
+                     timeframe: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Compute indicator arrays for a bar DataFrame without modifying it
+
+        With a cache attached, results are looked up by symbol, timeframe,
+        bar range, indicator parameters and price content before computing;
+        cached arrays are read-only.
+        """
+        requested = self.columns if columns is None else [c for c in columns if c not in PRICE_COLUMNS]
+
+        if self.cache is None:
+            prices = {c: df[c].values for c in PRICE_COLUMNS if c in df.columns}
+            return self.compute_arrays(prices, requested, params)
+
+        spec_key, inputs = self.cache_key(requested, params)
+        prices = {c: np.asarray(df[c].values, dtype=np.float64) for c in inputs if c in df.columns}
+        return self.cache.get_or_compute(
+            prices, spec_key, lambda: self.compute_arrays(prices, requested, params),
+            symbol=symbol, timeframe=timeframe, bar_range=self._bar_range(df)
+        )
+
+    def compute(self, df: pd.DataFrame, columns: Optional[Iterable[str]] = None,
+                params: Optional[Dict[str, Dict]] = None, symbol: Optional[str] = None,
+                timeframe: Optional[str] = None) -> pd.DataFrame:
+        """Add the requested indicator columns to a bar DataFrame"""
+        try:
+            for column, values in self.frame_arrays(df, columns, params, symbol, timeframe).items():
+                df[column] = values if values.flags.writeable else values.copy()
+            return df
+
+        except Exception as e:
+            self.logger.error(f"Error calculating indicators: {e}")
+            return df
+
+    @staticmethod
+    def _bar_range(df: pd.DataFrame) -> Optional[Tuple[str, str]]:
+        """First and last bar time, from the 'time' column or a DatetimeIndex"""
+        if len(df) == 0:
+            return None
+        if 'time' in df.columns:
+            times = df['time']
+            return str(times.iloc[0]), str(times.iloc[-1])
+        if isinstance(df.index, pd.DatetimeIndex):
+            return str(df.index[0]), str(df.index[-1])
+        return None
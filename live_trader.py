@@ -7,6 +7,9 @@ import time
 import json
 import schedule
 import threading
+import signal as os_signal
+import multiprocessing
+from multiprocessing.connection import wait as wait_connections
 from typing import Dict, List, Optional
 import warnings
 import os
@@ -14,12 +17,30 @@ from dotenv import load_dotenv
 import requests
 
 from forex_trading_bot import AdvancedForexTradingBot
+from indicator_cache import IndicatorCache
 from risk_manager import AdvancedRiskManager
-from backtester import ForexBacktester
+from backtester import ForexBacktester, run_backtest_job
+from metrics import MetricsRegistry, MetricsServer
+from profiler import SamplingProfiler
+from cycle_budget import CycleBudget, LEVELS, SHEDDABLE_ALERTS
+from log_pipeline import LogPipeline, log_event
+from session_calendar import SessionCalendar
 
 warnings.filterwarnings('ignore')
 load_dotenv()
 
+def _validation_worker(conn, job_args: tuple):
+    """
+    Body of a validation process: report the start, then the backtest result
+    """
+    try:
+        conn.send(('started', None))
+        conn.send(('done', run_backtest_job(*job_args)))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
 class LiveForexTrader:
     """
     Live Forex Trading Manager with Real-time Monitoring
@@ -42,8 +63,17 @@ class LiveForexTrader:
         
         # Trading state
         self.is_trading = False
+        self.stop_event = threading.Event()
+        
+        # Trading sessions, with open/close transitions precomputed
+        self.session_calendar = SessionCalendar.from_config(self.config['trading'].get('trading_hours'))
         self.trading_thread = None
         self.monitoring_thread = None
+        self.validation_thread = None
+        
+        # Symbols cleared for trading (filled as startup validation completes)
+        self.active_symbols = set()
+        self.symbols_lock = threading.Lock()
         
         # Performance metrics
         self.daily_stats = {}
@@ -55,9 +85,37 @@ class LiveForexTrader:
         self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
         
+        # Instrumentation
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        
+        # Sampling profiler (started with trading when profiling.enabled)
+        profiling_config = self.config.get('profiling', {})
+        self.profiler = SamplingProfiler(
+            interval=profiling_config.get('interval_ms', 50) / 1000,
+            output_dir=profiling_config.get('output_dir', 'logs/profiles'),
+            max_stacks=profiling_config.get('max_stacks', 20000),
+            slow_dump_interval=profiling_config.get('slow_dump_interval', 300)
+        )
+        
+        # Cycle deadlines and load shedding
+        latency_config = self.config.get('latency', {})
+        update_interval = self.config.get('monitoring', {}).get('update_interval', 300)
+        self.cycle_budget = CycleBudget(
+            cycle_budget=(latency_config.get('cycle_budget_seconds') or
+                          update_interval * latency_config.get('cycle_budget_fraction', 0.5)),
+            symbol_budget=latency_config.get('symbol_budget_seconds'),
+            escalate_after=latency_config.get('escalate_after', 2),
+            recover_after=latency_config.get('recover_after', 5)
+        )
+        self.slow_timeframes = {}  # symbol -> (fetched at, H4 frame, D1 frame)
+        
         # Setup logging
+        self.log_pipeline = None
         self.setup_logging()
         self.logger = logging.getLogger(__name__)
+        self.signal_logger = logging.getLogger('signals')
+        self.trade_logger = logging.getLogger('trades')
         
         # Initialize trading bot
         self.initialize_trading_bot()
@@ -78,7 +136,10 @@ class LiveForexTrader:
                     "trading_hours": {
                         "start": "08:00",
                         "end": "17:00",
-                        "timezone": "UTC"
+                        "timezone": "UTC",
+                        "days": [0, 1, 2, 3, 4],  # Monday=0
+                        "holidays": [],  # "YYYY-MM-DD" dates with no session
+                        "symbols": {}  # per-symbol sessions, e.g. {"USDJPY": ["tokyo", "london"]}
                     }
                 },
                 "risk": {
@@ -87,6 +148,27 @@ class LiveForexTrader:
                     "max_drawdown": 0.15,
                     "initial_balance": 10000
                 },
+                "validation": {
+                    "days": 30,
+                    "max_workers": 4,
+                    "timeout": 300,  # seconds per symbol
+                    "require_pass": False,
+                    "cache_dir": "data/cache",
+                    "compact": False,  # float32 bar storage for parallel validation
+                    "results_db": "data/experiments.sqlite",  # experiment store (None = don't record)
+                    "bar_store": "data/bars",  # imported history, read before yfinance (None = yfinance only)
+                    "costs": {  # execution costs charged on validation fills (see execution_costs.py)
+                        "spread": "session",
+                        "spread_pips": 1.0,
+                        "slippage_atr": 0.02,
+                        "commission_pips": 0.7
+                    },
+                    "apply_sessions": True  # only enter validation trades during trading_hours
+                },
+                "indicator_cache": {
+                    "enabled": True,
+                    "max_memory_mb": 64  # memory only; validation keeps its disk tier under validation.cache_dir
+                },
                 "alerts": {
                     "max_drawdown_alert": 0.10,
                     "daily_loss_alert": 0.03,
@@ -96,7 +178,39 @@ class LiveForexTrader:
                 "monitoring": {
                     "update_interval": 300,  # 5 minutes
                     "save_stats_interval": 3600,  # 1 hour
-                    "backup_interval": 86400  # 24 hours
+                    "backup_interval": 86400,  # 24 hours
+                    "metrics_enabled": True,
+                    "metrics_host": "127.0.0.1",
+                    "metrics_port": 9108
+                },
+                "latency": {
+                    "cycle_budget_seconds": None,  # None = cycle_budget_fraction of update_interval
+                    "cycle_budget_fraction": 0.5,
+                    "symbol_budget_seconds": None,  # None = an even share of the cycle budget
+                    "escalate_after": 2,  # consecutive overruns before shedding more work
+                    "recover_after": 5,  # consecutive fast cycles before restoring it
+                    "slow_timeframe_refresh": 3600  # max age of reused H4/D1 data when behind
+                },
+                "profiling": {
+                    "enabled": False,
+                    "interval_ms": 50,  # 20 samples/s is cheap enough to leave on
+                    "output_dir": "logs/profiles",
+                    "slow_cycle_seconds": 60,  # dump a cycle's profile when it takes longer
+                    "slow_dump_interval": 300,  # seconds; at most one slow-cycle dump per interval
+                    "max_stacks": 20000
+                },
+                "market_data": {
+                    "snapshot_interval_ms": 100,  # one symbol_info_tick pass over all symbols
+                    "max_quote_age": 1.0,  # seconds; older quotes are not used for signals
+                    "order_quote_max_age": 0.25  # older quotes are re-read from MT5 before sending
+                },
+                "logging": {
+                    "dir": "logs",
+                    "level": "INFO",  # DEBUG records are discarded at the call site below this
+                    "max_bytes": 50 * 1024 * 1024,  # rotate each log file at this size
+                    "backup_count": 5,
+                    "queue_size": 10000,  # records buffered before DEBUG records are dropped
+                    "console": True
                 }
             }
             
@@ -117,35 +231,17 @@ class LiveForexTrader:
             return {}
     
     def setup_logging(self):
-        """Setup comprehensive logging"""
+        """Route logging through the background writer (rotating text log plus trades/signals JSONL)"""
         try:
-            # Create logs directory
-            os.makedirs('logs', exist_ok=True)
-            
-            # Configure logging
-            log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            
-            # Main log file
-            logging.basicConfig(
-                level=logging.INFO,
-                format=log_format,
-                handlers=[
-                    logging.FileHandler(f'logs/forex_trader_{datetime.now().strftime("%Y%m%d")}.log'),
-                    logging.StreamHandler()
-                ]
-            )
-            
-            # Trade log
-            trade_logger = logging.getLogger('trades')
-            trade_handler = logging.FileHandler(f'logs/trades_{datetime.now().strftime("%Y%m%d")}.log')
-            trade_handler.setFormatter(logging.Formatter(log_format))
-            trade_logger.addHandler(trade_handler)
-            
-            # Performance log
-            perf_logger = logging.getLogger('performance')
-            perf_handler = logging.FileHandler(f'logs/performance_{datetime.now().strftime("%Y%m%d")}.log')
-            perf_handler.setFormatter(logging.Formatter(log_format))
-            perf_logger.addHandler(perf_handler)
+            log_config = self.config.get('logging', {})
+            self.log_pipeline = LogPipeline(
+                log_dir=log_config.get('dir', 'logs'),
+                level=log_config.get('level', 'INFO'),
+                max_bytes=log_config.get('max_bytes', 50 * 1024 * 1024),
+                backup_count=log_config.get('backup_count', 5),
+                queue_size=log_config.get('queue_size', 10000),
+                console=log_config.get('console', True)
+            ).start()
             
         except Exception as e:
             print(f"Error setting up logging: {e}")
@@ -155,19 +251,45 @@ class LiveForexTrader:
         try:
             mt5_config = self.config['mt5']
             risk_config = self.config['risk']
+            cache_config = self.config.get('indicator_cache', {})
+            
+            # Indicator results are reused while the bars are unchanged. Live frames
+            # change every cycle, so there is no disk tier: spilling them would add
+            # file writes and eviction scans to the trading thread for entries that
+            # are never read back.
+            indicator_cache = None
+            if cache_config.get('enabled', True):
+                indicator_cache = IndicatorCache(
+                    max_memory_mb=cache_config.get('max_memory_mb', 64),
+                    cache_dir=None
+                )
             
             # Initialize trading bot
             self.trading_bot = AdvancedForexTradingBot(
                 account=mt5_config['account'],
                 password=mt5_config['password'],
-                server=mt5_config['server']
+                server=mt5_config['server'],
+                indicator_cache=indicator_cache
             )
+            self.trading_bot.metrics = self.metrics
+            self.trading_bot.order_executor.metrics = self.metrics
+            
+            # One snapshot thread polls quotes for every configured symbol
+            market_config = self.config.get('market_data', {})
+            self.trading_bot.market.set_symbols(self.config['trading']['symbols'])
+            self.trading_bot.market.interval = market_config.get('snapshot_interval_ms', 100) / 1000
+            self.trading_bot.market.max_age = market_config.get('max_quote_age', 1.0)
+            self.trading_bot.market.metrics = self.metrics
+            self.trading_bot.order_executor.quote_max_age = market_config.get('order_quote_max_age', 0.25)
             
             # Initialize risk manager
             self.risk_manager = AdvancedRiskManager(
                 initial_balance=risk_config['initial_balance']
             )
             
+            # Closed deals are fed back into the risk manager
+            self.trading_bot.position_tracker.risk_manager = self.risk_manager
+            
             # Update risk parameters
             self.risk_manager.max_risk_per_trade = risk_config['max_risk_per_trade']
             self.risk_manager.max_daily_risk = risk_config['max_daily_loss']
@@ -181,6 +303,11 @@ class LiveForexTrader:
     def send_telegram_alert(self, message: str, priority: str = "INFO"):
         """Send alert via Telegram"""
         try:
+            # Low-priority alerts are dropped while the trading loop is behind
+            if self.cycle_budget.shed_alerts and priority in SHEDDABLE_ALERTS:
+                self.metrics.inc('alerts_shed_total', priority=priority)
+                return False
+            
             if not self.telegram_bot_token or not self.telegram_chat_id:
                 return False
             
@@ -203,69 +330,59 @@ class LiveForexTrader:
                 'parse_mode': 'Markdown'
             }
             
-            response = requests.post(url, data=data, timeout=10)
+            with self.profiler.stage('alert'), self.metrics.time('send_telegram_alert'):
+                response = requests.post(url, data=data, timeout=10)
+            
+            self.metrics.inc('telegram_alerts_total', priority=priority, status=response.status_code)
             return response.status_code == 200
             
         except Exception as e:
             self.logger.error(f"Error sending Telegram alert: {e}")
             return False
     
-    def check_trading_hours(self) -> bool:
-        """Check if current time is within trading hours"""
+    def check_trading_hours(self, symbol: Optional[str] = None) -> bool:
+        """Check whether the symbol's session (by default any configured symbol's) is open"""
         try:
-            trading_config = self.config['trading']['trading_hours']
-            current_time = datetime.now().time()
-            
-            start_time = datetime.strptime(trading_config['start'], "%H:%M").time()
-            end_time = datetime.strptime(trading_config['end'], "%H:%M").time()
-            
-            return start_time <= current_time <= end_time
+            symbols = [symbol] if symbol else self.config['trading']['symbols']
+            return any(self.session_calendar.is_open(s) for s in symbols)
             
         except Exception as e:
             self.logger.error(f"Error checking trading hours: {e}")
             return True  # Default to allow trading
     
+    def wait_for_session_open(self):
+        """Sleep until the next session of a configured symbol opens (or trading stops)"""
+        symbols = self.config['trading']['symbols']
+        wait = self.session_calendar.seconds_until_open(symbols)
+        opens_at = pd.Timestamp.now(tz='UTC') + pd.Timedelta(seconds=wait)
+        self.logger.info(f"Outside trading hours - sleeping until {opens_at:%Y-%m-%d %H:%M} UTC")
+        self.stop_event.wait(wait)
+    
+    def get_session_symbols(self) -> List[str]:
+        """Active symbols whose session is open now"""
+        return [symbol for symbol in self.get_active_symbols() if self.session_calendar.is_open(symbol)]
+    
     def run_backtest_validation(self, symbol: str, days: int = 30) -> Dict:
         """Run quick backtest validation before live trading"""
         try:
             self.logger.info(f"Running backtest validation for {symbol}")
             
-            backtester = ForexBacktester(self.config['risk']['initial_balance'])
-            
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            results = backtester.run_backtest(
-                symbol=symbol,
-                start_date=start_date.strftime('%Y-%m-%d'),
-                end_date=end_date.strftime('%Y-%m-%d'),
-                confidence_threshold=self.config['trading']['confidence_threshold']
+            start_date, end_date = self._validation_window(days)
+            validation_config = self.config.get('validation', {})
+            
+            results = run_backtest_job(
+                symbol, start_date, end_date,
+                initial_balance=self.config['risk']['initial_balance'],
+                confidence_threshold=self.config['trading']['confidence_threshold'],
+                cache_dir=validation_config.get('cache_dir'),
+                compact=validation_config.get('compact', False),
+                results_db=validation_config.get('results_db'),
+                bar_store=validation_config.get('bar_store'),
+                costs=validation_config.get('costs'),
+                sessions=self.validation_sessions()
             )
             
-            if results:
-                self.logger.info(f"Backtest validation completed for {symbol}")
-                self.logger.info(f"Win Rate: {results.get('win_rate', 0):.1f}%")
-                self.logger.info(f"Profit Factor: {results.get('profit_factor', 0):.2f}")
-                self.logger.info(f"Max Drawdown: {results.get('max_drawdown', 0):.2f}%")
-                
-                # Send validation results
-                if results.get('win_rate', 0) >= 50 and results.get('profit_factor', 0) >= 1.2:
-                    message = f"✅ *Backtest Validation Passed*\n\n"
-                    message += f"Symbol: {symbol}\n"
-                    message += f"Win Rate: {results.get('win_rate', 0):.1f}%\n"
-                    message += f"Profit Factor: {results.get('profit_factor', 0):.2f}\n"
-                    message += f"Max Drawdown: {results.get('max_drawdown', 0):.2f}%\n"
-                    message += f"Total Trades: {results.get('total_trades', 0)}"
-                    
-                    self.send_telegram_alert(message, "SUCCESS")
-                else:
-                    message = f"⚠️ *Backtest Validation Warning*\n\n"
-                    message += f"Symbol: {symbol}\n"
-                    message += f"Win Rate: {results.get('win_rate', 0):.1f}% (Target: ≥50%)\n"
-                    message += f"Profit Factor: {results.get('profit_factor', 0):.2f} (Target: ≥1.2)\n"
-                    message += "Strategy may need optimization"
-                    
-                    self.send_telegram_alert(message, "WARNING")
+            self.report_validation_results(symbol, results)
             
             return results
             
@@ -273,6 +390,159 @@ class LiveForexTrader:
             self.logger.error(f"Error running backtest validation: {e}")
             return {}
     
+    def validation_sessions(self) -> Optional[Dict]:
+        """trading_hours config for validation backtests, None when they may enter at any time"""
+        if not self.config.get('validation', {}).get('apply_sessions', True):
+            return None
+        return self.config['trading'].get('trading_hours')
+    
+    def _validation_window(self, days: int):
+        """Get start and end dates for a validation backtest"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+    
+    def report_validation_results(self, symbol: str, results: Dict) -> bool:
+        """Log and alert validation results, returning whether the symbol passed"""
+        try:
+            if not results:
+                return False
+            
+            self.logger.info(f"Backtest validation completed for {symbol}")
+            self.logger.info(f"Win Rate: {results.get('win_rate', 0):.1f}%")
+            self.logger.info(f"Profit Factor: {results.get('profit_factor', 0):.2f}")
+            self.logger.info(f"Max Drawdown: {results.get('max_drawdown', 0):.2f}%")
+            
+            # Send validation results
+            if results.get('win_rate', 0) >= 50 and results.get('profit_factor', 0) >= 1.2:
+                message = f"✅ *Backtest Validation Passed*\n\n"
+                message += f"Symbol: {symbol}\n"
+                message += f"Win Rate: {results.get('win_rate', 0):.1f}%\n"
+                message += f"Profit Factor: {results.get('profit_factor', 0):.2f}\n"
+                message += f"Max Drawdown: {results.get('max_drawdown', 0):.2f}%\n"
+                message += f"Total Trades: {results.get('total_trades', 0)}"
+                
+                self.send_telegram_alert(message, "SUCCESS")
+                return True
+            
+            message = f"⚠️ *Backtest Validation Warning*\n\n"
+            message += f"Symbol: {symbol}\n"
+            message += f"Win Rate: {results.get('win_rate', 0):.1f}% (Target: ≥50%)\n"
+            message += f"Profit Factor: {results.get('profit_factor', 0):.2f} (Target: ≥1.2)\n"
+            message += "Strategy may need optimization"
+            
+            self.send_telegram_alert(message, "WARNING")
+            return False
+            
+        except Exception as e:
+            self.logger.error(f"Error reporting validation results: {e}")
+            return False
+    
+    def activate_symbol(self, symbol: str):
+        """Allow the trading loop to start processing a symbol"""
+        with self.symbols_lock:
+            self.active_symbols.add(symbol)
+        self.logger.info(f"Trading enabled for {symbol}")
+    
+    def get_active_symbols(self) -> List[str]:
+        """Get symbols cleared for trading, in configured order"""
+        with self.symbols_lock:
+            active = set(self.active_symbols)
+        return [symbol for symbol in self.config['trading']['symbols'] if symbol in active]
+    
+    def validation_loop(self, symbols: List[str]):
+        """
+        Validate symbols in worker processes and enable each one as soon as it finishes
+        اعتبارسنجی موازی نمادها و فعال‌سازی هر نماد پس از اتمام
+        """
+        validation_config = self.config.get('validation', {})
+        days = validation_config.get('days', 30)
+        timeout = validation_config.get('timeout', 300)
+        require_pass = validation_config.get('require_pass', False)
+        max_workers = max(1, min(validation_config.get('max_workers', 4), len(symbols)))
+        start_date, end_date = self._validation_window(days)
+        
+        job_args = (
+            start_date, end_date,
+            self.config['risk']['initial_balance'],
+            self.config['trading']['confidence_threshold'],
+            validation_config.get('cache_dir'),
+            validation_config.get('compact', False),
+            validation_config.get('results_db'),
+            validation_config.get('bar_store'),
+            validation_config.get('costs'),
+            self.validation_sessions()
+        )
+        
+        # One process per symbol, so a job past its timeout can be terminated
+        queued = list(symbols)
+        running = {}  # result pipe -> [symbol, process, monotonic start reported by the job]
+        try:
+            self.logger.info(f"Validating {len(symbols)} symbols with {max_workers} workers")
+            
+            while (queued or running) and self.is_trading:
+                while queued and len(running) < max_workers:
+                    symbol = queued.pop(0)
+                    reader, writer = multiprocessing.Pipe(duplex=False)
+                    process = multiprocessing.Process(
+                        target=_validation_worker, args=(writer, (symbol,) + job_args),
+                        name=f"validate-{symbol}", daemon=True
+                    )
+                    process.start()
+                    writer.close()
+                    running[reader] = [symbol, process, None]
+                
+                for reader in wait_connections(list(running), timeout=1.0):
+                    job = running[reader]
+                    symbol, process = job[0], job[1]
+                    try:
+                        kind, payload = reader.recv()
+                    except EOFError:
+                        process.join()
+                        kind, payload = 'error', f"worker exited with code {process.exitcode}"
+                    
+                    # Timeouts are counted from when the job reports that it started
+                    if kind == 'started':
+                        job[2] = time.monotonic()
+                        continue
+                    
+                    running.pop(reader)
+                    reader.close()
+                    process.join()
+                    
+                    if kind == 'error':
+                        self.logger.error(f"Backtest validation error for {symbol}: {payload}")
+                    results = payload if kind == 'done' else {}
+                    
+                    passed = self.report_validation_results(symbol, results)
+                    if not results:
+                        self.logger.warning(f"Backtest validation failed for {symbol}")
+                    
+                    if passed or not require_pass:
+                        self.activate_symbol(symbol)
+                    else:
+                        self.logger.warning(f"{symbol} did not pass validation - not trading it")
+                
+                now = time.monotonic()
+                for reader, (symbol, process, started) in list(running.items()):
+                    if started is not None and now - started > timeout:
+                        running.pop(reader)
+                        process.terminate()
+                        process.join()
+                        reader.close()
+                        self.logger.warning(f"Backtest validation timed out for {symbol} after {timeout}s")
+                        if not require_pass:
+                            self.activate_symbol(symbol)
+            
+        except Exception as e:
+            self.logger.error(f"Error in validation loop: {e}")
+        finally:
+            for reader, (symbol, process, _) in running.items():
+                process.terminate()
+                process.join(timeout=5)
+                reader.close()
+            self.logger.info("Startup validation finished")
+    
     def monitor_performance(self):
         """Monitor trading performance and send alerts"""
         try:
@@ -415,16 +685,17 @@ class LiveForexTrader:
         """Main trading loop"""
         try:
             self.logger.info("Starting trading loop...")
+            self.profiler.register_thread('trading')
             
-            symbols = self.config['trading']['symbols']
             confidence_threshold = self.config['trading']['confidence_threshold']
+            slow_cycle = self.config.get('profiling', {}).get('slow_cycle_seconds')
             
             while self.is_trading:
                 try:
-                    # Check trading hours
+                    # Sleep through closed sessions, weekends and holidays
                     if not self.check_trading_hours():
-                        self.logger.info("Outside trading hours - sleeping...")
-                        time.sleep(300)  # Sleep 5 minutes
+                        with self.profiler.stage('idle'):
+                            self.wait_for_session_open()
                         continue
                     
                     # Check if trading should be stopped due to risk limits
@@ -435,89 +706,124 @@ class LiveForexTrader:
                         self.stop_trading()
                         break
                     
-                    # Process each symbol
-                    for symbol in symbols:
-                        try:
-                            if not self.is_trading:
+                    # Samples of a cycle slower than the budget are dumped when profiling
+                    with self.profiler.cycle(budget=slow_cycle, name='trading_cycle'):
+                        # Process each symbol cleared by validation (symbols deferred last cycle first)
+                        symbols = self.cycle_budget.start_cycle(self.get_session_symbols())
+                        for n, symbol in enumerate(symbols):
+                            if self.cycle_budget.should_defer(symbols[n:]):
+                                self.logger.info(f"Cycle deadline reached; deferring {len(symbols) - n} "
+                                                    f"symbols to the next cycle")
                                 break
                             
-                            # Get market data for multiple timeframes
-                            df_m15 = self.trading_bot.get_market_data('M15', 200)
-                            df_h1 = self.trading_bot.get_market_data('H1', 200)
-                            df_h4 = self.trading_bot.get_market_data('H4', 200)
-                            df_d1 = self.trading_bot.get_market_data('D1', 100)
-                            
-                            if any(df.empty for df in [df_m15, df_h1, df_h4, df_d1]):
-                                self.logger.warning(f"Failed to get data for {symbol}")
-                                continue
-                            
-                            # Calculate indicators
-                            df_m15 = self.trading_bot.calculate_technical_indicators(df_m15)
-                            df_h1 = self.trading_bot.calculate_technical_indicators(df_h1)
-                            df_h4 = self.trading_bot.calculate_technical_indicators(df_h4)
-                            df_d1 = self.trading_bot.calculate_technical_indicators(df_d1)
-                            
-                            # Generate signal
-                            signal = self.trading_bot.advanced_signal_generation(
-                                df_m15, df_h1, df_h4, df_d1
-                            )
-                            
-                            self.logger.info(f"{symbol} Signal: {signal['action']} | "
-                                           f"Confidence: {signal['confidence']:.1f}% | "
-                                           f"Strength: {signal['strength']:.2f}")
-                            
-                            # Execute trade if confidence is high enough
-                            if (signal['confidence'] >= confidence_threshold and 
-                                signal['action'] in ['BUY', 'SELL']):
+                            symbol_started = time.perf_counter()
+                            try:
+                                if not self.is_trading:
+                                    break
                                 
-                                # Check with risk manager
-                                volatility = df_m15['ATR'].iloc[-1] / df_m15['close'].iloc[-1]
-                                position_size = self.risk_manager.calculate_position_size(
-                                    symbol, signal['entry_price'], signal['stop_loss'],
-                                    self.risk_manager.current_balance, volatility
-                                )
+                                # H4/D1 are reused between refreshes while the loop is behind
+                                slow_frames = self.cached_slow_timeframes(symbol)
+                                
+                                # Get market data for multiple timeframes
+                                with self.profiler.stage('fetch'), self.metrics.time('get_market_data'):
+                                    df_m15 = self.trading_bot.get_market_data('M15', 200, symbol)
+                                    df_h1 = self.trading_bot.get_market_data('H1', 200, symbol)
+                                    if slow_frames is None:
+                                        df_h4 = self.trading_bot.get_market_data('H4', 200, symbol)
+                                        df_d1 = self.trading_bot.get_market_data('D1', 100, symbol)
+                                    else:
+                                        df_h4, df_d1 = slow_frames
+                                
+                                if any(df.empty for df in [df_m15, df_h1, df_h4, df_d1]):
+                                    self.logger.warning(f"Failed to get data for {symbol}")
+                                    continue
+                                
+                                # Calculate indicators
+                                with self.profiler.stage('indicators'), self.metrics.time('calculate_technical_indicators'):
+                                    df_m15 = self.trading_bot.calculate_technical_indicators(df_m15, 'M15', symbol=symbol)
+                                    df_h1 = self.trading_bot.calculate_technical_indicators(df_h1, 'H1', symbol=symbol)
+                                    if slow_frames is None:
+                                        df_h4 = self.trading_bot.calculate_technical_indicators(df_h4, 'H4', symbol=symbol)
+                                        df_d1 = self.trading_bot.calculate_technical_indicators(df_d1, 'D1', symbol=symbol)
+                                        self.slow_timeframes[symbol] = (time.time(), df_h4, df_d1)
+                                
+                                # Generate signal
+                                with self.profiler.stage('signal'), self.metrics.time('advanced_signal_generation'):
+                                    signal = self.trading_bot.advanced_signal_generation(
+                                        df_m15, df_h1, df_h4, df_d1, symbol=symbol
+                                    )
+                                self.metrics.inc('signals_total', symbol=symbol, action=signal['action'])
                                 
-                                can_open, reason = self.risk_manager.can_open_position(
-                                    symbol, position_size, signal['entry_price']
+                                log_event(
+                                    self.signal_logger, 'signal',
+                                    f"{symbol} Signal: {signal['action']} | "
+                                    f"Confidence: {signal['confidence']:.1f}% | "
+                                    f"Strength: {signal['strength']:.2f}",
+                                    symbol=symbol, action=signal['action'],
+                                    confidence=signal['confidence'], strength=signal['strength'],
+                                    stop_loss=signal.get('stop_loss'), take_profit=signal.get('take_profit')
                                 )
                                 
-                                if can_open:
-                                    # Execute trade
-                                    if self.trading_bot.execute_trade(signal):
-                                        # Update risk manager
-                                        self.risk_manager.add_position(
+                                # Execute trade if confidence is high enough
+                                if (signal['confidence'] >= confidence_threshold and 
+                                    signal['action'] in ['BUY', 'SELL']):
+                                    
+                                    # Check with risk manager
+                                    with self.profiler.stage('risk'):
+                                        volatility = df_m15['ATR'].iloc[-1] / df_m15['close'].iloc[-1]
+                                        position_size = self.risk_manager.calculate_position_size(
+                                            symbol, signal['entry_price'], signal['stop_loss'],
+                                            self.risk_manager.current_balance, volatility
+                                        )
+                                        
+                                        with self.metrics.time('can_open_position'):
+                                            can_open, reason = self.risk_manager.can_open_position(
+                                                symbol, position_size, signal['entry_price']
+                                            )
+                                    
+                                    if can_open:
+                                        # Reserve the position now so later symbols in this cycle see it;
+                                        # the fill callback moves it to the fill price or releases it
+                                        position_id = self.risk_manager.add_position(
                                             symbol, position_size, signal['entry_price'],
                                             signal['stop_loss'], signal['take_profit'],
                                             signal['action']
                                         )
                                         
-                                        # Send trade alert
-                                        message = f"💰 *Trade Executed*\n\n"
-                                        message += f"Symbol: {symbol}\n"
-                                        message += f"Action: {signal['action']}\n"
-                                        message += f"Size: {position_size:.2f} lots\n"
-                                        message += f"Entry: {signal['entry_price']:.5f}\n"
-                                        message += f"SL: {signal['stop_loss']:.5f}\n"
-                                        message += f"TP: {signal['take_profit']:.5f}\n"
-                                        message += f"Confidence: {signal['confidence']:.1f}%"
+                                        # Queue the order (send latency is timed by the executor as order_send)
+                                        with self.profiler.stage('execute'), self.metrics.time('submit_trade'):
+                                            future = self.trading_bot.submit_trade(signal, symbol)
                                         
-                                        self.send_telegram_alert(message, "TRADE")
-                                        
-                                        trade_logger = logging.getLogger('trades')
-                                        trade_logger.info(f"Trade executed: {symbol} {signal['action']} "
-                                                        f"{position_size} lots at {signal['entry_price']}")
-                                else:
-                                    self.logger.info(f"Trade rejected for {symbol}: {reason}")
-                            
-                        except Exception as e:
-                            self.logger.error(f"Error processing {symbol}: {e}")
-                            continue
-                    
-                    # Monitor existing positions
-                    self.trading_bot.monitor_positions()
+                                        if future is None:
+                                            self.risk_manager.release_position(position_id)
+                                        else:
+                                            future.add_done_callback(
+                                                lambda f, symbol=symbol, signal=signal, size=position_size,
+                                                       position_id=position_id:
+                                                    self.on_trade_executed(symbol, signal, size, position_id, f)
+                                            )
+                                    else:
+                                        self.metrics.inc('trade_rejections_total', symbol=symbol, reason=reason)
+                                        self.logger.info(f"Trade rejected for {symbol}: {reason}")
+                                
+                            except Exception as e:
+                                self.logger.error(f"Error processing {symbol}: {e}")
+                                continue
+                            finally:
+                                if self.cycle_budget.record_symbol(symbol, time.perf_counter() - symbol_started):
+                                    self.metrics.inc('symbol_overruns_total', symbol=symbol)
+                        
+                        # Monitor existing positions
+                        with self.profiler.stage('positions'):
+                            self.trading_bot.monitor_positions()
+                        
+                        self.metrics.inc('trading_cycles_total')
+                        self.report_cycle(self.cycle_budget.end_cycle())
                     
-                    # Sleep before next iteration
-                    time.sleep(self.config['monitoring']['update_interval'])
+                    # Sleep out the rest of the interval so cycles keep their cadence
+                    with self.profiler.stage('idle'):
+                        time.sleep(max(self.config['monitoring']['update_interval'] -
+                                       self.cycle_budget.last_cycle_seconds, 0))
                     
                 except Exception as e:
                     self.logger.error(f"Error in trading loop: {e}")
@@ -528,18 +834,109 @@ class LiveForexTrader:
         finally:
             self.logger.info("Trading loop stopped")
     
+    def cached_slow_timeframes(self, symbol: str):
+        """(H4, D1) frames with indicators to reuse this cycle, or None to refresh them"""
+        if not self.cycle_budget.skip_slow_timeframes:
+            return None
+        cached = self.slow_timeframes.get(symbol)
+        max_age = self.config.get('latency', {}).get('slow_timeframe_refresh', 3600)
+        if cached is None or time.time() - cached[0] > max_age:
+            return None
+        return cached[1], cached[2]
+    
+    def report_cycle(self, cycle: Dict):
+        """Record a cycle's timing; log overruns and alert when the degradation level changes"""
+        try:
+            self.metrics.observe('trading_cycle', cycle['seconds'])
+            budget = self.cycle_budget.cycle_budget
+            slow = ', '.join(f"{symbol} {seconds:.1f}s" for symbol, seconds in
+                             sorted(cycle['slow_symbols'], key=lambda item: -item[1])[:5])
+            
+            if cycle['overrun']:
+                self.metrics.inc('cycle_overruns_total')
+                self.logger.warning(f"Trading cycle took {cycle['seconds']:.1f}s (budget {budget:.1f}s)"
+                                    + (f"; slow symbols: {slow}" if slow else ""))
+            
+            level, previous = cycle['level'], cycle['previous_level']
+            if level > previous:
+                self.logger.warning(f"Trading loop behind schedule; degrading to '{LEVELS[level]}'")
+                message = f"⏱️ *Cycle Overrun*\n\n"
+                message += f"Cycle: {cycle['seconds']:.1f}s (budget {budget:.1f}s)\n"
+                message += f"Overruns: {self.cycle_budget.overruns} of {self.cycle_budget.cycles} cycles\n"
+                message += f"Now: {LEVELS[level]}"
+                if slow:
+                    message += f"\nSlow symbols: {slow}"
+                self.send_telegram_alert(message, "WARNING")
+            elif level < previous:
+                self.logger.info(f"Trading loop within budget; recovering to '{LEVELS[level]}'")
+                if level == 0:
+                    self.send_telegram_alert(f"⏱️ Trading cycles back within budget ({budget:.1f}s)", "INFO")
+            
+        except Exception as e:
+            self.logger.error(f"Error reporting cycle: {e}")
+    
+    def on_trade_executed(self, symbol: str, signal: Dict, position_size: float,
+                          position_id: Optional[str], future):
+        """Settle the reserved position and send alerts once an order has been sent"""
+        try:
+            try:
+                report = future.result()
+            except Exception:
+                self.risk_manager.release_position(position_id)
+                raise
+            if not report['success']:
+                self.risk_manager.release_position(position_id)
+                return
+            
+            entry_price = report['fill_price']
+            
+            # Move the reservation to the fill and link the MT5 position so its close is tracked
+            self.risk_manager.update_position_entry(position_id, entry_price)
+            if position_id and report['order']:
+                self.trading_bot.position_tracker.register_position(report['order'], position_id)
+            
+            # Send trade alert
+            message = f"💰 *Trade Executed*\n\n"
+            message += f"Symbol: {symbol}\n"
+            message += f"Action: {signal['action']}\n"
+            message += f"Size: {position_size:.2f} lots\n"
+            message += f"Entry: {entry_price:.5f}\n"
+            message += f"SL: {signal['stop_loss']:.5f}\n"
+            message += f"TP: {signal['take_profit']:.5f}\n"
+            message += f"Confidence: {signal['confidence']:.1f}%\n"
+            message += f"Latency: {report['latency_ms']:.0f}ms | Slippage: {report['slippage_pips']:.1f} pips"
+            
+            # Keep the HTTP call off the order executor thread
+            threading.Thread(target=self.send_telegram_alert, args=(message, "TRADE"), daemon=True).start()
+            
+            log_event(
+                self.trade_logger, 'trade_executed',
+                f"Trade executed: {symbol} {signal['action']} {position_size} lots at {entry_price} "
+                f"(latency {report['latency_ms']:.1f}ms, slippage {report['slippage_pips']:.1f} pips)",
+                symbol=symbol, action=signal['action'], size=position_size, price=entry_price,
+                stop_loss=signal['stop_loss'], take_profit=signal['take_profit'],
+                confidence=signal['confidence'], order=report['order'], position_id=position_id,
+                latency_ms=report['latency_ms'], slippage_pips=report['slippage_pips']
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error handling executed trade for {symbol}: {e}")
+    
     def monitoring_loop(self):
         """Performance monitoring loop"""
         try:
             self.logger.info("Starting monitoring loop...")
+            self.profiler.register_thread('monitoring')
             
             while self.is_trading:
                 try:
                     # Monitor performance
-                    self.monitor_performance()
+                    with self.profiler.stage('monitor'):
+                        self.monitor_performance()
                     
                     # Sleep for monitoring interval
-                    time.sleep(self.config['monitoring']['update_interval'])
+                    with self.profiler.stage('idle'):
+                        time.sleep(self.config['monitoring']['update_interval'])
                     
                 except Exception as e:
                     self.logger.error(f"Error in monitoring loop: {e}")
@@ -564,18 +961,34 @@ class LiveForexTrader:
                 self.logger.error("Failed to initialize MT5 connection")
                 return False
             
-            # Run backtest validation if requested
-            if run_validation:
-                for symbol in self.config['trading']['symbols']:
-                    validation_results = self.run_backtest_validation(symbol, 30)
-                    if not validation_results:
-                        self.logger.warning(f"Backtest validation failed for {symbol}")
-            
             # Load performance statistics
             self.load_performance_stats()
             
+            # Start metrics endpoint
+            self.start_metrics_server()
+            
+            # Start the sampling profiler
+            self.start_profiler()
+            
+            # Start polling quotes for all symbols
+            self.trading_bot.market.start()
+            
             # Start trading
             self.is_trading = True
+            self.stop_event.clear()
+            
+            # Validate symbols in the background; each symbol trades once it is validated
+            symbols = self.config['trading']['symbols']
+            if run_validation:
+                with self.symbols_lock:
+                    self.active_symbols = set()
+                self.validation_thread = threading.Thread(
+                    target=self.validation_loop, args=(list(symbols),), daemon=True
+                )
+                self.validation_thread.start()
+            else:
+                with self.symbols_lock:
+                    self.active_symbols = set(symbols)
             
             # Start trading thread
             self.trading_thread = threading.Thread(target=self.trading_loop, daemon=True)
@@ -612,6 +1025,7 @@ class LiveForexTrader:
             
             # Stop trading flag
             self.is_trading = False
+            self.stop_event.set()
             
             # Wait for threads to finish
             if self.trading_thread and self.trading_thread.is_alive():
@@ -620,9 +1034,24 @@ class LiveForexTrader:
             if self.monitoring_thread and self.monitoring_thread.is_alive():
                 self.monitoring_thread.join(timeout=10)
             
-            # Close MT5 connection
+            if self.validation_thread and self.validation_thread.is_alive():
+                self.validation_thread.join(timeout=10)
+            
+            # Drain queued orders and close MT5 connection
+            self.trading_bot.order_executor.stop()
+            self.trading_bot.market.stop()
             mt5.shutdown()
             
+            # Stop metrics endpoint
+            if self.metrics_server:
+                self.metrics_server.stop()
+                self.metrics_server = None
+            
+            # Keep the session's profile
+            if self.profiler.running:
+                self.profiler.stop()
+                self.dump_profile()
+            
             # Send stop notification
             if self.risk_manager:
                 portfolio_metrics = self.risk_manager.get_portfolio_metrics()
@@ -640,6 +1069,66 @@ class LiveForexTrader:
         except Exception as e:
             self.logger.error(f"Error stopping trading: {e}")
     
+    def start_metrics_server(self) -> bool:
+        """Serve the metrics registry on a local Prometheus endpoint"""
+        try:
+            monitoring_config = self.config.get('monitoring', {})
+            if not monitoring_config.get('metrics_enabled', True):
+                return False
+            
+            if self.metrics_server is None:
+                self.metrics_server = MetricsServer(
+                    self.metrics,
+                    host=monitoring_config.get('metrics_host', '127.0.0.1'),
+                    port=monitoring_config.get('metrics_port', 9108)
+                )
+            
+            return self.metrics_server.start()
+            
+        except Exception as e:
+            self.logger.error(f"Error starting metrics server: {e}")
+            return False
+    
+    def start_profiler(self) -> bool:
+        """Start the sampling profiler when profiling is enabled; SIGUSR2 dumps a profile"""
+        try:
+            if not self.config.get('profiling', {}).get('enabled', False):
+                return False
+            
+            if not self.profiler.start():
+                return False
+            
+            if hasattr(os_signal, 'SIGUSR2'):
+                try:
+                    os_signal.signal(os_signal.SIGUSR2, lambda signum, frame: threading.Thread(
+                        target=self.dump_profile, daemon=True).start())
+                except ValueError:
+                    # Signal handlers can only be set from the main thread
+                    self.logger.info("Profile dumps on SIGUSR2 unavailable; use dump_profile()")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error starting profiler: {e}")
+            return False
+    
+    def dump_profile(self, reset: bool = False) -> Dict[str, str]:
+        """Write the profile collected so far as collapsed stacks and an SVG flamegraph"""
+        try:
+            counts = self.profiler.snapshot(reset=reset)
+            if not counts:
+                self.logger.info("No profile samples to dump")
+                return {}
+            
+            paths = self.profiler.write(counts)
+            stages = ', '.join(f"{stage} {share:.0%}" for stage, share in
+                               self.profiler.stage_breakdown(counts).items())
+            self.logger.info(f"Profile written to {paths['svg']} ({stages})")
+            return paths
+            
+        except Exception as e:
+            self.logger.error(f"Error dumping profile: {e}")
+            return {}
+    
     def get_status(self) -> Dict:
         """Get current trading status"""
         try:
@@ -658,7 +1147,17 @@ class LiveForexTrader:
                 "current_drawdown": portfolio_metrics.get('current_drawdown', 0),
                 "daily_risk": risk_summary.get('daily_risk', 0),
                 "open_positions": risk_summary.get('open_positions', 0),
+                "execution": self.trading_bot.order_executor.get_execution_stats(),
+                "indicator_cache": (self.trading_bot.indicators.cache.get_stats()
+                                    if self.trading_bot.indicators.cache else None),
+                "profiler": self.profiler.get_stats() if self.profiler.running else None,
+                "latency": self.cycle_budget.get_stats(),
+                "sessions": self.session_calendar.status(self.config['trading']['symbols']),
+                "market": self.trading_bot.market.get_stats(),
+                "unrealized_pnl": self.risk_manager.get_unrealized_pnl(self.trading_bot.market.quotes()),
+                "logging": self.log_pipeline.get_stats() if self.log_pipeline else None,
                 "symbols": self.config['trading']['symbols'],
+                "active_symbols": self.get_active_symbols(),
                 "confidence_threshold": self.config['trading']['confidence_threshold']
             }
             
@@ -0,0 +1,221 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Loggers written as JSON lines to <log_dir>/<name>.jsonl
+STRUCTURED_LOGGERS = ('trades', 'signals', 'performance')
+
+# Loggers whose records are never dropped, whatever their level (the trade audit trail)
+NEVER_DROP = ('trades',)
+
+
+def log_event(logger: logging.Logger, event: str, message: Optional[str] = None,
+              level: int = logging.INFO, **fields):
+    """
+    Log a structured event
+
+    Text logs show ``message``; JSONL logs get ``event`` and every field as
+    its own key.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message or event, extra={'event': event, 'fields': fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time (UTC), level, logger, event, message and event fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        event = getattr(record, 'event', None)
+        if event:
+            entry['event'] = event
+        entry['message'] = record.getMessage()
+        for key, value in (getattr(record, 'fields', None) or {}).items():
+            entry.setdefault(key, value)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the logging thread on I/O
+
+    Only the message is merged on the calling thread; formatting and writing
+    happen on the listener thread. When the queue is full, records below
+    ``drop_below`` are dropped (and counted) instead of waiting, except those
+    of the ``never_drop`` loggers, which wait for room like the rest. Forked
+    child processes (e.g. validation workers) have no writer thread, so they
+    write records themselves, to their own copies of the log files
+    (``<name>.<pid><ext>``) rather than rotating the parent's files under it.
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers: Sequence[logging.Handler] = (),
+                 drop_below: int = logging.INFO, never_drop: Sequence[str] = NEVER_DROP):
+        super().__init__(log_queue)
+        self.handlers = list(handlers)
+        self.drop_below = drop_below
+        self.never_drop = tuple(never_drop)
+        self.dropped = 0
+        self.pid = os.getpid()
+        self._child_pid = None
+        self._child_handlers = []
+
+    def emit(self, record: logging.LogRecord):
+        if os.getpid() != self.pid:
+            for handler in self._process_handlers():
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+        super().emit(record)
+
+    def _process_handlers(self) -> list:
+        """Handlers of a forked child: rotating files reopened under the child's pid"""
+        pid = os.getpid()
+        if self._child_pid != pid:
+            self._child_pid = pid
+            self._child_handlers = [self._for_process(handler, pid) for handler in self.handlers]
+        return self._child_handlers
+
+    @staticmethod
+    def _for_process(handler: logging.Handler, pid: int) -> logging.Handler:
+        if not isinstance(handler, logging.handlers.RotatingFileHandler):
+            return handler
+        root, ext = os.path.splitext(handler.baseFilename)
+        own = logging.handlers.RotatingFileHandler(
+            f"{root}.{pid}{ext}", maxBytes=handler.maxBytes, backupCount=handler.backupCount,
+            encoding=handler.encoding, delay=True
+        )
+        own.setFormatter(handler.formatter)
+        own.setLevel(handler.level)
+        for log_filter in handler.filters:
+            own.addFilter(log_filter)
+        return own
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments may change after the call returns; tracebacks stay valid in-process
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < self.drop_below and not self._kept(record.name):
+                self.dropped += 1
+            else:
+                self.queue.put(record)
+
+    def _kept(self, name: str) -> bool:
+        return any(name == keep or name.startswith(keep + '.') for keep in self.never_drop)
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: a full queue must still be drained before stopping
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """
+    Queue-based logging with a background writer and size-based rotation
+    سامانه ثبت رویداد غیرهمزمان با صف و نوشتن در پس‌زمینه
+
+    The root logger gets a single non-blocking queue handler; one listener
+    thread formats and writes every record to the rotating main log (and the
+    console), and records of the structured loggers to JSONL files.
+    """
+
+    def __init__(self, log_dir: str = 'logs', level: str = 'INFO', max_bytes: int = 50 * 1024 * 1024,
+                 backup_count: int = 5, queue_size: int = 10000, console: bool = True,
+                 main_log: str = 'forex_trader.log'):
+        """
+        Args:
+            log_dir: Directory for all log files
+            level: Root level; records below it are discarded at the call site
+            max_bytes: Rotate a file when it reaches this size
+            backup_count: Rotated files kept per log
+            queue_size: Records buffered before DEBUG ones are dropped
+            console: Also write to stderr
+            main_log: File name of the main text log
+        """
+        self.log_dir = log_dir
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.console = console
+        self.main_log = main_log
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = None
+        self.listener = None
+        self._file_handlers = []
+
+    def _rotating(self, name: str, formatter: logging.Formatter) -> logging.Handler:
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(self.log_dir, name), maxBytes=self.max_bytes,
+            backupCount=self.backup_count, encoding='utf-8', delay=True
+        )
+        handler.setFormatter(formatter)
+        self._file_handlers.append(handler)
+        return handler
+
+    def start(self) -> 'LogPipeline':
+        """Route all logging through the queue (replaces the root logger's handlers)"""
+        if self.listener is not None:
+            return self
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        text_format = logging.Formatter(LOG_FORMAT)
+        handlers = [self._rotating(self.main_log, text_format)]
+        for name in STRUCTURED_LOGGERS:
+            handler = self._rotating(f"{name}.jsonl", JsonFormatter())
+            handler.addFilter(logging.Filter(name))
+            handlers.append(handler)
+        if self.console:
+            console = logging.StreamHandler()
+            console.setFormatter(text_format)
+            handlers.append(console)
+
+        self.listener = _Listener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        self.handler = AsyncQueueHandler(self.queue, handlers)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Flush queued records and close the files"""
+        if self.listener is None:
+            return
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        self.listener = None
+        for handler in self._file_handlers:
+            handler.close()
+        self._file_handlers = []
+
+    def get_stats(self) -> Dict:
+        return {
+            'queued': self.queue.qsize(),
+            'dropped': self.handler.dropped if self.handler is not None else 0,
+            'running': self.listener is not None,
+        }
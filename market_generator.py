@@ -0,0 +1,470 @@
+import numpy as np
+import pandas as pd
+import os
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+from bar_store import BAR_DTYPE
+
+# Internal generation unit; output is identical for any chunk size because
+# each block draws from its own seeded stream
+BLOCK_BARS = 65_536
+
+# Trading week: Sunday 22:00 UTC to Friday 22:00 UTC
+WEEK_SECONDS = 7 * 86400
+TRADING_WEEK_SECONDS = 5 * 86400
+WEEK_OPEN_OFFSET = 22 * 3600   # from Sunday 00:00
+TRADING_YEAR_SECONDS = 52 * TRADING_WEEK_SECONDS
+
+# Volatility (and tick activity) by UTC hour: Asia, London, New York overlap, late US
+INTRADAY_PROFILE = np.array([
+    0.70, 0.70, 0.75, 0.75, 0.75, 0.80, 0.90, 1.20,
+    1.35, 1.30, 1.20, 1.10, 1.25, 1.45, 1.50, 1.40,
+    1.20, 1.05, 0.95, 0.85, 0.80, 0.75, 0.65, 0.65,
+])
+
+# Spread multiplier by UTC hour (rollover widening around 21:00-23:00)
+ROLLOVER_SPREAD = np.ones(24)
+ROLLOVER_SPREAD[[21, 22, 23]] = [2.0, 3.0, 1.5]
+
+MAJORS = {'EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD', 'USDCAD', 'NZDUSD'}
+
+DEFAULT_PRICES = {
+    'EURUSD': 1.08, 'GBPUSD': 1.27, 'USDJPY': 150.0, 'USDCHF': 0.88,
+    'AUDUSD': 0.66, 'USDCAD': 1.36, 'NZDUSD': 0.61, 'EURGBP': 0.85,
+    'EURJPY': 162.0, 'GBPJPY': 190.0,
+}
+
+
+@dataclass(frozen=True)
+class Regime:
+    """Market regime shared by all symbols"""
+    name: str
+    drift: float        # annualized log drift (sign drawn per symbol and run)
+    volatility: float   # multiplier on each symbol's base volatility
+    mean_bars: float    # average run length in bars
+
+
+DEFAULT_REGIMES = (
+    Regime('range', 0.0, 0.7, 2000),
+    Regime('trend', 0.15, 1.0, 1000),
+    Regime('volatile', 0.0, 1.8, 300),
+)
+
+
+def currency_correlation(symbols: Sequence[str], idiosyncratic: float = 0.25) -> np.ndarray:
+    """
+    Correlation implied by a currency factor model
+
+    Each currency has an independent factor and a pair moves with base minus
+    quote, so EURUSD and GBPUSD correlate positively, EURUSD and USDCHF
+    negatively. ``idiosyncratic`` is the pair-specific variance share.
+    """
+    currencies = sorted({c for s in symbols for c in (s[:3], s[3:6])})
+    loadings = np.zeros((len(symbols), len(currencies)))
+    for i, symbol in enumerate(symbols):
+        loadings[i, currencies.index(symbol[:3])] += 1
+        loadings[i, currencies.index(symbol[3:6])] -= 1
+    shared = loadings @ loadings.T / 2
+    return (1 - idiosyncratic) * shared + idiosyncratic * np.eye(len(symbols))
+
+
+def _ar1(noise: np.ndarray, phi: float, x0: np.ndarray, step: int = 1024) -> np.ndarray:
+    """x[t] = phi * x[t-1] + noise[t] along axis 0, vectorized in sub-blocks"""
+    out = np.empty_like(noise)
+    # Keep phi ** step above ~1e-150 so its inverse stays inside the float64 range
+    step = int(max(1, min(step, 345 / -np.log(phi))))
+    powers = phi ** np.arange(1, step + 1)[:, None]
+    inverse = 1.0 / powers * phi   # phi ** -k for k = 0..step-1
+    x = x0
+    for start in range(0, len(noise), step):
+        block = noise[start:start + step]
+        n = len(block)
+        response = powers[:n] / phi * np.cumsum(block * inverse[:n], axis=0)
+        out[start:start + n] = response + powers[:n] * x
+        x = out[start + n - 1]
+    return out
+
+
+class MarketGenerator:
+    """
+    Synthetic correlated multi-symbol bars and ticks for scale testing
+    تولید داده‌های مصنوعی همبسته چند نمادی برای تست مقیاس
+
+    Prices follow geometric Brownian motion whose volatility is the product
+    of a regime (Markov switching between range, trend and volatile
+    phases), a persistent stochastic log-volatility (volatility clustering)
+    and an intraday session profile. Returns are correlated across symbols
+    through a currency factor model or a given correlation matrix. Spreads
+    widen with volatility and at rollover.
+
+    Output is deterministic for a seed, identical for any chunk size, and
+    generated in vectorized blocks, so streams of 100M+ bars can be written
+    to disk in chunks.
+    """
+
+    def __init__(self, symbols: Sequence[str] = ('EURUSD',), timeframe: str = '15min',
+                 start: str = '2020-01-05', seed: int = 0,
+                 correlation: Union[None, float, np.ndarray] = None,
+                 regimes: Sequence[Regime] = DEFAULT_REGIMES, annual_volatility: Optional[Dict[str, float]] = None,
+                 vol_persistence: float = 0.995, vol_of_vol: float = 0.35,
+                 ticks_per_minute: float = 60.0, skip_weekends: bool = True):
+        """
+        Initialize the generator
+
+        Args:
+            symbols: Symbols to generate (six-letter pairs use the currency factor model)
+            timeframe: Bar period as a pandas frequency string
+            start: First bar time (UTC); moved back to the week open when skipping weekends
+            seed: Random seed
+            correlation: None (currency factor model for FX pairs), a constant pairwise
+                correlation, or a full correlation matrix
+            regimes: Regimes the market switches between
+            annual_volatility: Base annualized volatility per symbol (default 8%, 10% for JPY crosses)
+            vol_persistence: Per-bar autocorrelation of log volatility
+            vol_of_vol: Stationary standard deviation of log volatility
+            ticks_per_minute: Average tick rate (scales tick_volume)
+            skip_weekends: Only generate bars inside the Sunday-Friday trading week
+        """
+        self.symbols = list(symbols)
+        self.period = int(pd.Timedelta(timeframe).total_seconds())
+        self.seed = seed
+        self.regimes = list(regimes)
+        self.vol_persistence = vol_persistence
+        self.vol_of_vol = vol_of_vol
+        self.ticks_per_minute = ticks_per_minute
+        self.skip_weekends = skip_weekends
+        self.logger = logging.getLogger(__name__)
+
+        if not 0 < vol_persistence < 1:
+            raise ValueError(f"vol_persistence must be between 0 and 1 (exclusive), got {vol_persistence}")
+        if skip_weekends and TRADING_WEEK_SECONDS % self.period:
+            raise ValueError(f"Timeframe {timeframe} does not divide the trading week")
+
+        start_ts = int(pd.Timestamp(start).timestamp())
+        if skip_weekends:
+            # Anchor on the most recent week open (Sunday 22:00 UTC)
+            sunday = start_ts - ((start_ts // 86400 + 4) % 7) * 86400 - start_ts % 86400
+            anchor = sunday + WEEK_OPEN_OFFSET
+            self.anchor = anchor if anchor <= start_ts else anchor - WEEK_SECONDS
+            self.bars_per_week = TRADING_WEEK_SECONDS // self.period
+            first = (start_ts - self.anchor) // self.period
+            self.first_bar = min(first, self.bars_per_week)
+        else:
+            self.anchor = start_ts // self.period * self.period
+            self.first_bar = 0
+
+        # Per-symbol constants
+        annual_volatility = annual_volatility or {}
+        self.base_volatility = np.array([
+            annual_volatility.get(s, 0.10 if 'JPY' in s and s not in MAJORS else 0.08) for s in self.symbols
+        ])
+        self.sigma = self.base_volatility * np.sqrt(self.period / TRADING_YEAR_SECONDS)
+        self.digits = np.array([3 if 'JPY' in s else 5 for s in self.symbols])
+        self.base_spread = np.array([12.0 if s in MAJORS else 22.0 for s in self.symbols])
+        self.initial_prices = np.array([self._initial_price(s) for s in self.symbols])
+
+        self.correlation = self._correlation(correlation)
+        self._cholesky = np.linalg.cholesky(self.correlation)
+
+        # Regime transitions: leave with probability 1/mean_bars, to another regime uniformly
+        self._leave = np.array([1.0 / r.mean_bars for r in self.regimes])
+
+        self.reset()
+
+    def _initial_price(self, symbol: str) -> float:
+        if symbol in DEFAULT_PRICES:
+            return DEFAULT_PRICES[symbol]
+        rng = np.random.default_rng([self.seed, sum(map(ord, symbol))])
+        return float(rng.uniform(100, 200)) if 'JPY' in symbol else float(rng.uniform(0.6, 1.8))
+
+    def _correlation(self, correlation) -> np.ndarray:
+        n = len(self.symbols)
+        if correlation is None:
+            if all(len(s) >= 6 and s[:6].isalpha() for s in self.symbols):
+                return currency_correlation(self.symbols)
+            return np.eye(n)
+        if np.isscalar(correlation):
+            return np.full((n, n), float(correlation)) + (1 - float(correlation)) * np.eye(n)
+        matrix = np.asarray(correlation, dtype=np.float64)
+        if matrix.shape != (n, n):
+            raise ValueError(f"Correlation matrix must be {n}x{n}")
+        return matrix
+
+    def reset(self):
+        """Restart the stream from the first bar"""
+        self._block = 0
+        self._log_price = np.log(self.initial_prices)
+        self._log_vol = np.zeros(len(self.symbols))
+        self._regime = 0
+        self._regime_left = 0
+        self._drift_sign = np.ones(len(self.symbols))
+        self._pending = None
+
+    # ------------------------------------------------------------ bar stream
+
+    def bar_times(self, first: int, count: int) -> np.ndarray:
+        """Epoch seconds of bars first..first+count-1"""
+        k = np.arange(first, first + count, dtype=np.int64) + self.first_bar
+        if not self.skip_weekends:
+            return self.anchor + k * self.period
+        weeks, offset = np.divmod(k, self.bars_per_week)
+        return self.anchor + weeks * WEEK_SECONDS + offset * self.period
+
+    def _regime_path(self, rng: np.random.Generator, count: int):
+        """Regime index per bar and drift sign per (bar, symbol)"""
+        regimes = np.empty(count, dtype=np.int64)
+        signs = np.empty((count, len(self.symbols)))
+        filled = 0
+        while filled < count:
+            if self._regime_left == 0:
+                # Switch regime and draw its length and per-symbol direction
+                if filled or self._block:
+                    others = [i for i in range(len(self.regimes)) if i != self._regime]
+                    self._regime = int(rng.choice(others)) if others else self._regime
+                self._regime_left = int(rng.geometric(self._leave[self._regime]))
+                self._drift_sign = rng.choice([-1.0, 1.0], len(self.symbols))
+            run = min(self._regime_left, count - filled)
+            regimes[filled:filled + run] = self._regime
+            signs[filled:filled + run] = self._drift_sign
+            self._regime_left -= run
+            filled += run
+        return regimes, signs
+
+    def _next_block(self) -> Dict[str, np.ndarray]:
+        """Generate the next BLOCK_BARS bars for all symbols as arrays of shape (bars, symbols)"""
+        rng = np.random.default_rng([self.seed, self._block])
+        count = BLOCK_BARS
+        n = len(self.symbols)
+
+        times = self.bar_times(self._block * BLOCK_BARS, count)
+        hours = (times % 86400) // 3600
+
+        regimes, signs = self._regime_path(rng, count)
+        regime_vol = np.array([r.volatility for r in self.regimes])[regimes]
+        regime_drift = np.array([r.drift for r in self.regimes])[regimes]
+
+        # Volatility clustering: persistent AR(1) log volatility, mean multiplier 1
+        innovation = self.vol_of_vol * np.sqrt(1 - self.vol_persistence ** 2)
+        log_vol = _ar1(rng.standard_normal((count, n)) * innovation, self.vol_persistence, self._log_vol)
+        self._log_vol = log_vol[-1].copy()
+        vol_multiplier = np.exp(log_vol - self.vol_of_vol ** 2 / 2)
+
+        activity = (regime_vol * INTRADAY_PROFILE[hours])[:, None] * vol_multiplier
+        sigma = self.sigma * activity
+
+        # Correlated GBM log returns
+        shocks = rng.standard_normal((count, n)) @ self._cholesky.T
+        drift = (regime_drift[:, None] * signs) * (self.period / TRADING_YEAR_SECONDS)
+        log_close = self._log_price + np.cumsum(drift - 0.5 * sigma ** 2 + sigma * shocks, axis=0)
+        log_open = np.vstack([self._log_price, log_close[:-1]])
+        self._log_price = log_close[-1].copy()
+
+        # Wicks scale with the bar's volatility
+        wicks = np.abs(rng.standard_normal((2, count, n))) * sigma * 0.6
+        scale = 10.0 ** self.digits
+        open_ = np.round(np.exp(log_open) * scale) / scale
+        close = np.round(np.exp(log_close) * scale) / scale
+        high = np.round(np.exp(np.maximum(log_open, log_close) + wicks[0]) * scale) / scale
+        low = np.round(np.exp(np.minimum(log_open, log_close) - wicks[1]) * scale) / scale
+        high = np.maximum(high, np.maximum(open_, close))
+        low = np.minimum(low, np.minimum(open_, close))
+
+        tick_volume = rng.poisson(self.ticks_per_minute * self.period / 60 * activity) + 1
+        spread = np.maximum(1, np.round(
+            self.base_spread * (0.8 + 0.2 * activity) * ROLLOVER_SPREAD[hours][:, None]
+        )).astype(np.int32)
+
+        self._block += 1
+        return {'time': times, 'open': open_, 'high': high, 'low': low, 'close': close,
+                'tick_volume': tick_volume, 'spread': spread}
+
+    def iter_arrays(self, n_bars: int, chunk_size: int = 1_000_000) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield chunks of raw arrays: 'time' (epoch seconds, shape (bars,)) and
+        open/high/low/close/tick_volume/spread of shape (bars, symbols)
+        """
+        self.reset()
+        produced = 0
+        buffer = []
+        buffered = 0
+        while produced < n_bars:
+            target = min(chunk_size, n_bars - produced)
+            while buffered < target:
+                block = self._next_block()
+                buffer.append(block)
+                buffered += len(block['time'])
+            merged = {k: np.concatenate([b[k] for b in buffer]) for k in buffer[0]}
+            chunk = {k: v[:target] for k, v in merged.items()}
+            rest = {k: v[target:] for k, v in merged.items()}
+            buffered -= target
+            buffer = [rest] if buffered else []
+            produced += target
+            yield chunk
+
+    def iter_chunks(self, n_bars: int, chunk_size: int = 1_000_000,
+                    with_spread: bool = False) -> Iterator[Dict[str, pd.DataFrame]]:
+        """Yield {symbol: frame} chunks covering n_bars bars"""
+        for arrays in self.iter_arrays(n_bars, chunk_size):
+            index = pd.DatetimeIndex(pd.to_datetime(arrays['time'], unit='s'), name='time')
+            columns = ['open', 'high', 'low', 'close', 'tick_volume'] + (['spread'] if with_spread else [])
+            yield {
+                symbol: pd.DataFrame({c: arrays[c][:, i] for c in columns}, index=index)
+                for i, symbol in enumerate(self.symbols)
+            }
+
+    def bars(self, n_bars: int, with_spread: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        n_bars bars per symbol, shaped like get_market_data / get_forex_data
+        (open/high/low/close/tick_volume on a 'time' DatetimeIndex)
+        """
+        frames = None
+        for chunk in self.iter_chunks(n_bars, chunk_size=max(n_bars, 1), with_spread=with_spread):
+            frames = chunk
+        return frames or {}
+
+    # ----------------------------------------------------------- tick stream
+
+    def iter_ticks(self, n_bars: int, chunk_size: int = 10_000,
+                   max_ticks_per_bar: int = 2000) -> Iterator[Dict[str, pd.DataFrame]]:
+        """
+        Yield {symbol: ticks} chunks (bid/ask on a millisecond 'time' index)
+        for the first n_bars bars
+
+        Each bar's ticks arrive at uniform random times within the bar and
+        follow a Brownian bridge from the bar's open to its close inside the
+        bar's range, so bid ticks aggregate back to the bar's open and close.
+        """
+        for arrays in self.iter_arrays(n_bars, chunk_size):
+            rng = np.random.default_rng([self.seed, int(arrays['time'][0]), 1])
+            frames = {}
+            for i, symbol in enumerate(self.symbols):
+                counts = np.minimum(arrays['tick_volume'][:, i], max_ticks_per_bar)
+                frames[symbol] = self._bar_ticks(
+                    rng, arrays['time'], counts, arrays['open'][:, i], arrays['high'][:, i],
+                    arrays['low'][:, i], arrays['close'][:, i], arrays['spread'][:, i], self.digits[i]
+                )
+            yield frames
+
+    def _bar_ticks(self, rng, times, counts, open_, high, low, close, spread, digits) -> pd.DataFrame:
+        """Ticks for a run of bars of one symbol"""
+        total = int(counts.sum())
+        bar = np.repeat(np.arange(len(counts)), counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        position = np.arange(total) - first                       # tick number within its bar
+        n = counts[bar]
+
+        # Sorted arrival offsets within the bar
+        offsets = np.sort(rng.random(total) + bar) - bar
+        offsets[position == 0] = 0.0
+
+        # Brownian bridge from open (first tick) to close (last tick)
+        steps = rng.standard_normal(total)
+        steps[position == 0] = 0.0
+        walk = np.cumsum(steps)
+        walk -= walk[first]
+        fraction = np.where(n > 1, position / np.maximum(n - 1, 1), 1.0)
+        bridge = walk - fraction * walk[first + n - 1]
+        scale = (high - low)[bar] / (4 * np.sqrt(np.maximum(n, 1)))
+        mid = open_[bar] + (close[bar] - open_[bar]) * fraction + bridge * scale
+        mid = np.clip(mid, low[bar], high[bar])
+
+        point = 10.0 ** -digits
+        bid = np.round(mid / point) * point
+        ask = bid + spread[bar] * point
+        time_ms = times[bar] * 1000 + (offsets * self.period * 1000).astype(np.int64)
+        index = pd.DatetimeIndex(pd.to_datetime(time_ms, unit='ms'), name='time')
+        return pd.DataFrame({'bid': bid, 'ask': ask}, index=index)
+
+    # --------------------------------------------------------------- output
+
+    def write_bars(self, directory: str, n_bars: int, chunk_size: int = 1_000_000,
+                   fmt: str = 'npy') -> List[str]:
+        """
+        Stream n_bars bars per symbol to disk, one file per symbol
+        ذخیره تدریجی کندل‌ها روی دیسک
+
+        Args:
+            fmt: 'npy' (memory-mappable BAR_DTYPE records, np.load(path, mmap_mode='r'))
+                 or 'mt5' (tab-separated MetaTrader history export)
+        """
+        if fmt not in ('npy', 'mt5'):
+            raise ValueError(f"Unknown format: {fmt}")
+        os.makedirs(directory, exist_ok=True)
+        paths = [os.path.join(directory, f"{symbol}_{self.period // 60}m.{'npy' if fmt == 'npy' else 'csv'}")
+                 for symbol in self.symbols]
+
+        if fmt == 'npy':
+            outputs = [np.lib.format.open_memmap(path, mode='w+', dtype=BAR_DTYPE, shape=(n_bars,))
+                       for path in paths]
+        else:
+            outputs = [open(path, 'w', newline='') for path in paths]
+            for f in outputs:
+                f.write('<DATE>\t<TIME>\t<OPEN>\t<HIGH>\t<LOW>\t<CLOSE>\t<TICKVOL>\t<VOL>\t<SPREAD>\n')
+
+        try:
+            written = 0
+            for arrays in self.iter_arrays(n_bars, chunk_size):
+                count = len(arrays['time'])
+                for i, output in enumerate(outputs):
+                    if fmt == 'npy':
+                        records = output[written:written + count]
+                        records['time'] = arrays['time']
+                        for field in ('open', 'high', 'low', 'close', 'tick_volume', 'spread'):
+                            records[field] = arrays[field][:, i]
+                    else:
+                        self._write_mt5_chunk(output, arrays, i)
+                written += count
+                self.logger.info(f"Wrote {written:,}/{n_bars:,} bars")
+        finally:
+            for output in outputs:
+                if fmt == 'npy':
+                    output.flush()
+                else:
+                    output.close()
+
+        return paths
+
+    def _write_mt5_chunk(self, f, arrays: Dict[str, np.ndarray], i: int):
+        date, time_of_day = _mt5_stamps(arrays['time'].astype('datetime64[s]'), 's')
+        pd.DataFrame({
+            'date': date, 'time': time_of_day,
+            'open': arrays['open'][:, i], 'high': arrays['high'][:, i],
+            'low': arrays['low'][:, i], 'close': arrays['close'][:, i],
+            'tickvol': arrays['tick_volume'][:, i], 'vol': 0, 'spread': arrays['spread'][:, i],
+        }).to_csv(f, sep='\t', header=False, index=False, float_format=f"%.{self.digits[i]}f")
+
+    def write_ticks(self, directory: str, n_bars: int, chunk_size: int = 10_000) -> List[str]:
+        """Stream the ticks of n_bars bars per symbol as MetaTrader tick exports"""
+        os.makedirs(directory, exist_ok=True)
+        paths = [os.path.join(directory, f"{symbol}_ticks.csv") for symbol in self.symbols]
+        outputs = [open(path, 'w', newline='') for path in paths]
+        try:
+            for f in outputs:
+                f.write('<DATE>\t<TIME>\t<BID>\t<ASK>\t<LAST>\t<VOLUME>\t<FLAGS>\n')
+            for frames in self.iter_ticks(n_bars, chunk_size):
+                for i, (f, symbol) in enumerate(zip(outputs, self.symbols)):
+                    ticks = frames[symbol]
+                    date, time_of_day = _mt5_stamps(ticks.index.values.astype('datetime64[ms]'), 'ms')
+                    pd.DataFrame({
+                        'date': date, 'time': time_of_day,
+                        'bid': ticks['bid'].values, 'ask': ticks['ask'].values,
+                        'last': '', 'volume': '', 'flags': 6,
+                    }).to_csv(f, sep='\t', header=False, index=False, float_format=f"%.{self.digits[i]}f")
+        finally:
+            for f in outputs:
+                f.close()
+        return paths
+
+
+def _mt5_stamps(times: np.ndarray, unit: str):
+    """MetaTrader export date ('2024.01.02') and time ('00:15:00') columns"""
+    stamps = pd.Series(np.datetime_as_string(times, unit=unit))
+    return stamps.str[:10].str.replace('-', '.', regex=False), stamps.str[11:]
+
+
+def generate_bars(symbol: str = 'EURUSD', n_bars: int = 10_000, timeframe: str = '15min',
+                  seed: int = 0, **kwargs) -> pd.DataFrame:
+    """Bars for one symbol (shortcut for MarketGenerator([symbol]).bars(n_bars))"""
+    return MarketGenerator([symbol], timeframe=timeframe, seed=seed, **kwargs).bars(n_bars)[symbol]
@@ -0,0 +1,143 @@
+import MetaTrader5 as mt5
+import time
+import threading
+import logging
+from typing import Dict, Iterable, NamedTuple, Optional
+
+
+class Quote(NamedTuple):
+    """Latest bid/ask of a symbol as of one snapshot poll"""
+    symbol: str
+    bid: float
+    ask: float
+    last: float
+    time_msc: int     # broker tick time
+    received: float   # time.monotonic() of the poll that read it
+
+    @property
+    def mid(self) -> float:
+        return (self.bid + self.ask) / 2
+
+    @property
+    def spread(self) -> float:
+        return self.ask - self.bid
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (time.monotonic() if now is None else now) - self.received
+
+
+class MarketSnapshot:
+    """
+    Shared view of current quotes for all traded symbols
+    نمای مشترک از آخرین قیمت‌های همه نمادها
+
+    A dedicated thread polls symbol_info_tick for every symbol in one tight
+    loop and publishes the results as a new immutable {symbol: Quote} dict.
+    Publishing is a single reference swap, so readers (signal generation,
+    order execution, floating P&L) never lock and never see a half-updated
+    snapshot; they read quotes without calling the broker and fall back to
+    it only when a quote is missing or older than they accept.
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), interval: float = 0.1, max_age: float = 1.0):
+        """
+        Args:
+            symbols: Symbols to poll
+            interval: Seconds between polls
+            max_age: Default age in seconds beyond which a quote is not served
+        """
+        self.symbols = tuple(symbols)
+        self.interval = interval
+        self.max_age = max_age
+
+        # Optional metrics registry (set by LiveForexTrader)
+        self.metrics = None
+
+        self._quotes: Dict[str, Quote] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.polls = 0
+        self.missing_ticks = 0
+        self.last_poll_ms = 0.0
+        self.total_poll_seconds = 0.0
+
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_symbols(self, symbols: Iterable[str]):
+        """Change the polled symbols (takes effect on the next poll)"""
+        self.symbols = tuple(symbols)
+
+    def start(self) -> bool:
+        if self.running:
+            return False
+        self._stop.clear()
+        self.poll()
+        self._thread = threading.Thread(target=self._run, name='market-snapshot', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Market snapshot started: {len(self.symbols)} symbols every {self.interval * 1000:.0f}ms")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(max(self.interval - self.last_poll_ms / 1000, 0)):
+            try:
+                self.poll()
+            except Exception as e:
+                self.logger.error(f"Error polling quotes: {e}")
+
+    def poll(self) -> Dict[str, Quote]:
+        """Read every symbol's tick once and publish the new snapshot"""
+        started = time.perf_counter()
+        received = time.monotonic()
+        quotes = {}
+        for symbol in self.symbols:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                self.missing_ticks += 1
+                continue
+            quotes[symbol] = Quote(symbol, tick.bid, tick.ask, tick.last, tick.time_msc, received)
+
+        self._quotes = quotes
+
+        seconds = time.perf_counter() - started
+        self.polls += 1
+        self.last_poll_ms = seconds * 1000
+        self.total_poll_seconds += seconds
+        if self.metrics is not None:
+            self.metrics.observe('market_snapshot_poll', seconds)
+        return quotes
+
+    def quote(self, symbol: str, max_age: Optional[float] = None) -> Optional[Quote]:
+        """Latest quote, or None when missing or older than max_age (default: self.max_age)"""
+        quote = self._quotes.get(symbol)
+        if quote is None or quote.age() > (self.max_age if max_age is None else max_age):
+            return None
+        return quote
+
+    def quotes(self) -> Dict[str, Quote]:
+        """The whole current snapshot (consistent across symbols; do not modify)"""
+        return self._quotes
+
+    def get_stats(self) -> Dict:
+        quotes = self._quotes
+        now = time.monotonic()
+        return {
+            'running': self.running,
+            'symbols': len(self.symbols),
+            'quoted_symbols': len(quotes),
+            'polls': self.polls,
+            'missing_ticks': self.missing_ticks,
+            'last_poll_ms': self.last_poll_ms,
+            'avg_poll_ms': 1000 * self.total_poll_seconds / self.polls if self.polls else 0.0,
+            'max_quote_age': max((q.age(now) for q in quotes.values()), default=None),
+        }
@@ -0,0 +1,285 @@
+import time
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with log-linear buckets
+    هیستوگرام تأخیر با باکت‌های لگاریتمی-خطی
+
+    Values are recorded in microseconds. Every power-of-two range is split
+    into ``2 ** (precision_bits - 1)`` linear sub-buckets, so the relative
+    error of any reported quantile is bounded by ``2 ** -(precision_bits - 1)``
+    while recording stays a couple of integer operations.
+    """
+
+    def __init__(self, precision_bits: int = 7, max_value_us: int = 3600 * 1_000_000):
+        self.precision_bits = precision_bits
+        self.sub_bucket_count = 1 << precision_bits
+        self.half_count = self.sub_bucket_count >> 1
+        self.max_value_us = max_value_us
+
+        self.counts = [0] * (self._index_for(max_value_us) + 1)
+        self.total_count = 0
+        self.total_sum_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+        self._lock = threading.Lock()
+
+    def _index_for(self, value_us: int) -> int:
+        """Map a value to its bucket index"""
+        if value_us < self.sub_bucket_count:
+            return value_us
+        shift = value_us.bit_length() - self.precision_bits
+        return shift * self.half_count + (value_us >> shift)
+
+    def _value_for(self, index: int) -> float:
+        """Midpoint of the values that map to a bucket index"""
+        if index < self.sub_bucket_count:
+            return float(index)
+        shift = index // self.half_count - 1
+        lowest = (index - shift * self.half_count) << shift
+        return lowest + ((1 << shift) - 1) / 2
+
+    def record(self, value_us: int):
+        """Record a single latency sample in microseconds"""
+        value_us = min(max(int(value_us), 0), self.max_value_us)
+        index = self._index_for(value_us)
+
+        with self._lock:
+            self.counts[index] += 1
+            self.total_count += 1
+            self.total_sum_us += value_us
+            if self.min_us is None or value_us < self.min_us:
+                self.min_us = value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+
+    def quantiles(self, qs: List[float]) -> Dict[float, float]:
+        """Return the requested quantiles in microseconds"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.total_count
+            max_us = self.max_us
+
+        result = {q: 0.0 for q in qs}
+        if total == 0:
+            return result
+
+        targets = sorted((max(1, int(q * total + 0.5)), q) for q in qs)
+        cumulative = 0
+        target_pos = 0
+
+        for index, count in enumerate(counts):
+            if count == 0:
+                continue
+            cumulative += count
+            while target_pos < len(targets) and cumulative >= targets[target_pos][0]:
+                result[targets[target_pos][1]] = min(self._value_for(index), float(max_us))
+                target_pos += 1
+            if target_pos == len(targets):
+                break
+
+        return result
+
+    def snapshot(self) -> Dict:
+        """Get count, sum and common percentiles"""
+        percentiles = self.quantiles([0.5, 0.9, 0.99, 0.999])
+        return {
+            'count': self.total_count,
+            'sum_us': self.total_sum_us,
+            'min_us': self.min_us or 0,
+            'max_us': self.max_us,
+            'p50_us': percentiles[0.5],
+            'p90_us': percentiles[0.9],
+            'p99_us': percentiles[0.99],
+            'p999_us': percentiles[0.999]
+        }
+
+
+class _StageTimer:
+    """Context manager recording elapsed time into a histogram"""
+
+    __slots__ = ('histogram', 'start_ns')
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.record((time.perf_counter_ns() - self.start_ns) // 1000)
+        return False
+
+
+class MetricsRegistry:
+    """
+    In-process metrics registry for stage latencies and event counters
+    رجیستری متریک‌ها برای تأخیر مراحل و شمارنده رویدادها
+    """
+
+    QUANTILES = [0.5, 0.9, 0.99, 0.999]
+
+    def __init__(self, namespace: str = "forex_bot"):
+        self.namespace = namespace
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        """Get or create the latency histogram for a stage"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def time(self, stage: str) -> _StageTimer:
+        """Time a block of code, e.g. ``with metrics.time('execute_trade'):``"""
+        return _StageTimer(self.histogram(stage))
+
+    def observe(self, stage: str, seconds: float):
+        """Record an externally measured duration"""
+        self.histogram(stage).record(seconds * 1_000_000)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increment a labelled counter"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def get_counter(self, name: str, **labels) -> float:
+        """Read a labelled counter"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        return self.counters.get(key, 0)
+
+    def get_summary(self) -> Dict:
+        """Get a JSON-friendly view of all metrics"""
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+
+        return {
+            'latency': {stage: hist.snapshot() for stage, hist in histograms.items()},
+            'counters': {
+                name + (('{' + ','.join(f'{k}={v}' for k, v in labels) + '}') if labels else ''): value
+                for (name, labels), value in counters.items()
+            }
+        }
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def _format_labels(self, labels: Tuple) -> str:
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{k}="{self._escape(v)}"' for k, v in labels) + '}'
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+
+        lines = []
+
+        if histograms:
+            metric = f"{self.namespace}_stage_latency_seconds"
+            lines.append(f"# HELP {metric} Latency of trading cycle stages")
+            lines.append(f"# TYPE {metric} summary")
+            for stage in sorted(histograms):
+                hist = histograms[stage]
+                quantiles = hist.quantiles(self.QUANTILES)
+                stage_label = self._escape(stage)
+                for q in self.QUANTILES:
+                    lines.append(f'{metric}{{stage="{stage_label}",quantile="{q}"}} {quantiles[q] / 1e6:.6f}')
+                lines.append(f'{metric}_sum{{stage="{stage_label}"}} {hist.total_sum_us / 1e6:.6f}')
+                lines.append(f'{metric}_count{{stage="{stage_label}"}} {hist.total_count}')
+
+        by_name = {}
+        for (name, labels), value in counters.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        for name in sorted(by_name):
+            metric = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(by_name[name]):
+                lines.append(f"{metric}{self._format_labels(labels)} {value:g}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint exposing a registry at ``/metrics``
+    سرور محلی برای ارائه متریک‌ها
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+        self.logger = logging.getLogger(__name__)
+
+    def _make_handler(self):
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return MetricsHandler
+
+    def start(self) -> bool:
+        """Start serving in a background thread"""
+        try:
+            if self.httpd is not None:
+                return True
+
+            self.httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+            self.httpd.daemon_threads = True
+            self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self.thread.start()
+
+            self.logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error starting metrics server: {e}")
+            self.httpd = None
+            return False
+
+    def stop(self):
+        """Stop the HTTP server"""
+        try:
+            if self.httpd is None:
+                return
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+        except Exception as e:
+            self.logger.error(f"Error stopping metrics server: {e}")
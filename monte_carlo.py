@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict, List, Optional
+
+
+class MonteCarloAnalyzer:
+    """
+    Monte Carlo robustness analysis over backtest trades
+    تحلیل استحکام مونت‌کارلو بر روی معاملات بک‌تست
+
+    Trade P&L sequences are resampled (bootstrap) or reshuffled and optionally
+    perturbed with random entry/exit slippage. Paths are generated in chunks
+    of 2-D NumPy arrays so memory stays bounded regardless of the path count.
+    """
+
+    PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+    def __init__(self, initial_balance: float = 10000, memory_budget_mb: float = 256,
+                 seed: Optional[int] = None):
+        """
+        Initialize the analyzer
+
+        Args:
+            initial_balance: Starting balance of every simulated path
+            memory_budget_mb: Approximate memory used per chunk of paths
+            seed: Random seed for reproducible runs
+        """
+        self.initial_balance = initial_balance
+        self.memory_budget_mb = memory_budget_mb
+        self.rng = np.random.default_rng(seed)
+        self.logger = logging.getLogger(__name__)
+
+    def _chunk_size(self, n_trades: int, n_paths: int) -> int:
+        """Paths per chunk so that the temporary (paths x trades) arrays fit the budget"""
+        bytes_per_path = max(n_trades, 1) * 8 * 8
+        return int(max(1, min(n_paths, self.memory_budget_mb * 1024 * 1024 // bytes_per_path)))
+
+    def _slippage_cost(self, trades: List[Dict]) -> np.ndarray:
+        """P&L cost of one pip of slippage on each trade (same P&L scale as the backtester)"""
+        sizes = np.array([t['size'] for t in trades], dtype=np.float64)
+        pips = np.array([0.01 if 'JPY' in str(t.get('symbol', '')) else 0.0001 for t in trades])
+        return sizes * pips * 10
+
+    def _simulate_chunk(self, pnl: np.ndarray, pip_cost: np.ndarray, n: int,
+                        method: str, slippage_pips: float) -> Dict[str, np.ndarray]:
+        """Simulate n paths and reduce them to per-path statistics"""
+        n_trades = len(pnl)
+
+        if method == 'bootstrap':
+            idx = self.rng.integers(0, n_trades, size=(n, n_trades))
+        else:
+            idx = self.rng.permuted(np.broadcast_to(np.arange(n_trades), (n, n_trades)), axis=1)
+
+        path_pnl = pnl[idx]
+
+        if slippage_pips > 0:
+            # Adverse half-normal slippage on both entry and exit
+            slip = np.abs(self.rng.standard_normal((n, n_trades))) + np.abs(self.rng.standard_normal((n, n_trades)))
+            path_pnl -= slip * slippage_pips * pip_cost[idx]
+
+        equity = np.cumsum(path_pnl, axis=1)
+        equity += self.initial_balance
+
+        peak = np.maximum.accumulate(equity, axis=1)
+        np.maximum(peak, self.initial_balance, out=peak)
+        drawdown = (equity - peak) / peak * 100
+
+        final = equity[:, -1]
+        returns = path_pnl / self.initial_balance
+        std = returns.std(axis=1)
+
+        return {
+            'max_drawdown': drawdown.min(axis=1),
+            'total_return': (final - self.initial_balance) / self.initial_balance * 100,
+            'final_balance': final,
+            'min_equity': equity.min(axis=1),
+            'sharpe': np.divide(returns.mean(axis=1), std, out=np.zeros(n), where=std > 0)
+        }
+
+    def run(self, trades: List[Dict], n_paths: int = 100_000, method: str = 'bootstrap',
+            slippage_pips: float = 0.0, ruin_threshold: float = 0.5,
+            trades_per_year: Optional[float] = None, keep_paths: bool = False) -> Dict:
+        """
+        Run the Monte Carlo simulation
+        اجرای شبیه‌سازی مونت‌کارلو
+
+        Args:
+            trades: Backtest trade records (ForexBacktester.trades)
+            n_paths: Number of simulated paths
+            method: 'bootstrap' (resample with replacement) or 'shuffle' (reorder)
+            slippage_pips: Scale of the adverse half-normal slippage drawn for each fill
+                (entry and exit), |N(0, 1)| * slippage_pips, in pips
+            ruin_threshold: Fraction of the initial balance lost that counts as ruin
+            trades_per_year: Annualization factor for Sharpe (estimated from trade times if None)
+            keep_paths: Include the per-path statistic arrays in the result
+        """
+        try:
+            if not trades:
+                return {}
+            if method not in ('bootstrap', 'shuffle'):
+                raise ValueError(f"Unknown method: {method}")
+
+            pnl = np.array([t['pnl'] for t in trades], dtype=np.float64)
+            pip_cost = self._slippage_cost(trades) if slippage_pips > 0 else np.zeros(len(pnl))
+
+            if trades_per_year is None:
+                times = pd.to_datetime([t['entry_time'] for t in trades])
+                years = (times.max() - times.min()).total_seconds() / (365.25 * 86400)
+                trades_per_year = len(trades) / years if years > 0 else 252
+
+            chunk = self._chunk_size(len(pnl), n_paths)
+            stats = {key: np.empty(n_paths) for key in
+                     ('max_drawdown', 'total_return', 'final_balance', 'min_equity', 'sharpe')}
+
+            done = 0
+            while done < n_paths:
+                n = min(chunk, n_paths - done)
+                chunk_stats = self._simulate_chunk(pnl, pip_cost, n, method, slippage_pips)
+                for key, values in chunk_stats.items():
+                    stats[key][done:done + n] = values
+                done += n
+
+            stats['sharpe'] *= np.sqrt(trades_per_year)
+            dd = np.abs(stats['max_drawdown'])
+            stats['calmar'] = np.divide(stats['total_return'], dd, out=np.zeros(n_paths), where=dd > 0)
+
+            ruin_level = self.initial_balance * (1 - ruin_threshold)
+
+            results = {
+                'n_paths': n_paths,
+                'n_trades': len(pnl),
+                'method': method,
+                'slippage_pips': slippage_pips,
+                'chunk_size': chunk,
+                'ruin_threshold': ruin_threshold,
+                'ruin_probability': float(np.mean(stats['min_equity'] <= ruin_level) * 100),
+                'loss_probability': float(np.mean(stats['total_return'] < 0) * 100),
+            }
+
+            for key in ('max_drawdown', 'total_return', 'sharpe', 'calmar'):
+                values = stats[key]
+                results[key] = {
+                    'mean': float(values.mean()),
+                    'std': float(values.std()),
+                    **{f'p{p}': float(v) for p, v in zip(self.PERCENTILES, np.percentile(values, self.PERCENTILES))}
+                }
+
+            if keep_paths:
+                results['paths'] = stats
+
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Error running Monte Carlo simulation: {e}")
+            return {}
+
+    def format_report(self, results: Dict) -> str:
+        """Format Monte Carlo results as text"""
+        if not results:
+            return "No Monte Carlo results available"
+
+        dd = results['max_drawdown']
+        ret = results['total_return']
+        sharpe = results['sharpe']
+
+        report = f"""
+            MONTE CARLO ROBUSTNESS ({results['n_paths']:,} {results['method']} paths, {results['n_trades']} trades):
+            - Max Drawdown (median / 95% worst / 99% worst): {dd['p50']:.2f}% / {dd['p5']:.2f}% / {dd['p1']:.2f}%
+            - Total Return (5th / median / 95th): {ret['p5']:.2f}% / {ret['p50']:.2f}% / {ret['p95']:.2f}%
+            - Sharpe Ratio (5th / median / 95th): {sharpe['p5']:.2f} / {sharpe['p50']:.2f} / {sharpe['p95']:.2f}
+            - Probability of Loss: {results['loss_probability']:.2f}%
+            - Probability of Ruin ({results['ruin_threshold']:.0%} loss): {results['ruin_probability']:.2f}%
+            """
+        return report
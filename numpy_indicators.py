@@ -0,0 +1,551 @@
+import numpy as np
+import time
+import argparse
+from functools import wraps
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict
+
+# Pure-NumPy implementations of the TA-Lib functions used by the bot.
+# Names, arguments, lookback periods and seeding follow TA-Lib so this module
+# can be used in its place: leading NaN inputs are skipped and outputs are
+# NaN until the indicator's lookback is complete.
+
+# TA-Lib treats values in (-1e-8, 1e-8) as zero in divisions
+ZERO = 1e-8
+
+# Rows per chunk for rolling-window reductions (bounds temporary memory)
+ROLLING_CHUNK = 1 << 16
+
+
+def _skip_leading_nan(n_inputs: int):
+    """Run the wrapped function on the inputs after their first NaN-free index"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            inputs = [np.asarray(a, dtype=np.float64) for a in args[:n_inputs]]
+            n = len(inputs[0])
+            begin = 0
+            for values in inputs:
+                valid = np.flatnonzero(~np.isnan(values))
+                begin = max(begin, valid[0] if len(valid) else n)
+
+            result = func(*[values[begin:] for values in inputs], *args[n_inputs:], **kwargs)
+            if begin == 0:
+                return result
+
+            def pad(values):
+                out = np.full(n, np.nan)
+                out[begin:] = values
+                return out
+
+            return tuple(pad(r) for r in result) if isinstance(result, tuple) else pad(result)
+        return wrapper
+    return decorator
+
+
+def ema_filter(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    y[t] = (1 - alpha) * y[t-1] + alpha * x[t] with y[-1] = initial
+
+    The recursion is solved in blocks: inside a block it becomes a scaled
+    cumulative sum, and only the block end values are carried sequentially.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return np.empty(0)
+
+    r = 1.0 - alpha
+    if r <= 0:
+        return values.copy()
+
+    # Keep r ** -block well inside the float64 range
+    block = int(max(1, min(n, 4096, 500 / -np.log(r))))
+    n_blocks = -(-n // block)
+
+    padded = np.zeros(n_blocks * block)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, block)
+
+    k = np.arange(block)
+    local = np.cumsum(blocks * r ** -k, axis=1)
+    local *= alpha * r ** k
+
+    # Carry each block's final value into the next block
+    block_decay = r ** block
+    starts = np.empty(n_blocks)
+    carry = initial
+    for b in range(n_blocks):
+        starts[b] = carry
+        carry = local[b, -1] + block_decay * carry
+
+    local += starts[:, None] * r ** (k + 1)
+    return local.ravel()[:n]
+
+
+def wilder(values: np.ndarray, period: int, start: int, seed: float) -> np.ndarray:
+    """Wilder smoothing (alpha = 1/period) seeded with ``seed`` at index ``start``"""
+    out = np.full(len(values), np.nan)
+    if start >= len(values) or np.isnan(seed):
+        return out
+    out[start] = seed
+    out[start + 1:] = ema_filter(values[start + 1:], 1.0 / period, seed)
+    return out
+
+
+def _seeded_ema(values: np.ndarray, period: int, seed_end: int) -> np.ndarray:
+    """EMA seeded with the SMA of the ``period`` values ending at ``seed_end``"""
+    out = np.full(len(values), np.nan)
+    if seed_end >= len(values) or seed_end < period - 1:
+        return out
+    seed = values[seed_end - period + 1:seed_end + 1].mean()
+    out[seed_end] = seed
+    out[seed_end + 1:] = ema_filter(values[seed_end + 1:], 2.0 / (period + 1), seed)
+    return out
+
+
+def _rolling(values: np.ndarray, window: int, func) -> np.ndarray:
+    """Apply a reduction over trailing windows, processing rows in bounded chunks"""
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    view = sliding_window_view(values, window)
+    for start in range(0, len(view), ROLLING_CHUNK):
+        part = view[start:start + ROLLING_CHUNK]
+        out[window - 1 + start:window - 1 + start + len(part)] = func(part)
+    return out
+
+
+def _rolling_extreme(values: np.ndarray, window: int, ufunc) -> np.ndarray:
+    """
+    Trailing-window max/min in O(n) (van Herk/Gil-Werman)
+
+    Within blocks of ``window`` values, a forward and a backward running
+    extreme are combined: every window spans the tail of one block and the
+    head of the next.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+
+    n_blocks = -(-n // window)
+    fill = -np.inf if ufunc is np.maximum else np.inf
+    padded = np.full(n_blocks * window, fill)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+
+    forward = ufunc.accumulate(blocks, axis=1).ravel()
+    backward = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    end = np.arange(window - 1, n)
+    out[window - 1:] = ufunc(backward[end - window + 1], forward[end])
+    return out
+
+
+def _rolling_max(values, window):
+    return _rolling_extreme(values, window, np.maximum)
+
+
+def _rolling_min(values, window):
+    return _rolling_extreme(values, window, np.minimum)
+
+
+def _mean_deviation(w):
+    return np.abs(w - w.mean(axis=1, keepdims=True)).mean(axis=1)
+
+
+@_skip_leading_nan(1)
+def SMA(real, timeperiod=30):
+    """Simple moving average"""
+    out = np.full(len(real), np.nan)
+    if len(real) < timeperiod:
+        return out
+    # Cumulative sums of values relative to the first one keep precision on long series
+    shifted = real - real[0]
+    totals = np.cumsum(shifted)
+    sums = totals[timeperiod - 1:].copy()
+    sums[1:] -= totals[:-timeperiod]
+    out[timeperiod - 1:] = sums / timeperiod + real[0]
+    return out
+
+
+@_skip_leading_nan(1)
+def EMA(real, timeperiod=30):
+    """Exponential moving average seeded with the SMA of the first period"""
+    return _seeded_ema(real, timeperiod, timeperiod - 1)
+
+
+@_skip_leading_nan(1)
+def MACD(real, fastperiod=12, slowperiod=26, signalperiod=9):
+    """MACD line, signal line and histogram"""
+    if slowperiod < fastperiod:
+        fastperiod, slowperiod = slowperiod, fastperiod
+
+    n = len(real)
+    start = slowperiod - 1
+    lookback = start + signalperiod - 1
+
+    # Both EMAs are seeded at the slow EMA's first output (as TA-Lib does)
+    slow = _seeded_ema(real, slowperiod, start)
+    fast = _seeded_ema(real, fastperiod, start)
+    macd = fast - slow
+
+    signal = np.full(n, np.nan)
+    if n > start:
+        signal[start:] = _seeded_ema(macd[start:], signalperiod, signalperiod - 1)
+
+    macd[:lookback] = np.nan
+    return macd, signal, macd - signal
+
+
+@_skip_leading_nan(1)
+def RSI(real, timeperiod=14):
+    """Relative strength index with Wilder smoothing"""
+    n = len(real)
+    out = np.full(n, np.nan)
+    if n <= timeperiod:
+        return out
+
+    change = np.diff(real, prepend=np.nan)
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+
+    avg_gain = wilder(gain, timeperiod, timeperiod, gain[1:timeperiod + 1].mean())
+    avg_loss = wilder(loss, timeperiod, timeperiod, loss[1:timeperiod + 1].mean())
+    total = avg_gain + avg_loss
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[timeperiod:] = np.where(np.abs(total[timeperiod:]) >= ZERO,
+                                    100 * avg_gain[timeperiod:] / total[timeperiod:], 0.0)
+    return out
+
+
+@_skip_leading_nan(3)
+def STOCH(high, low, close, fastk_period=5, slowk_period=3, slowd_period=3):
+    """Slow stochastic %K and %D (SMA smoothing)"""
+    n = len(close)
+    lookback = fastk_period - 1 + slowk_period - 1 + slowd_period - 1
+    if n <= lookback:
+        return np.full(n, np.nan), np.full(n, np.nan)
+
+    highest = _rolling_max(high, fastk_period)
+    lowest = _rolling_min(low, fastk_period)
+    diff = (highest - lowest) / 100.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fast_k = np.where(diff != 0.0, (close - lowest) / diff, 0.0)
+    fast_k[:fastk_period - 1] = np.nan
+
+    slow_k = SMA(fast_k, slowk_period)
+    slow_d = SMA(slow_k, slowd_period)
+    slow_k[:lookback] = np.nan
+    return slow_k, slow_d
+
+
+@_skip_leading_nan(1)
+def BBANDS(real, timeperiod=20, nbdevup=2.0, nbdevdn=2.0):
+    """Bollinger Bands around an SMA using the population standard deviation"""
+    middle = SMA(real, timeperiod)
+    std = _rolling(real, timeperiod, lambda w: w.std(axis=1))
+    return middle + nbdevup * std, middle, middle - nbdevdn * std
+
+
+@_skip_leading_nan(3)
+def TRANGE(high, low, close):
+    """True range"""
+    out = np.empty(len(close))
+    if len(close) == 0:
+        return out
+    prev_close = close[:-1]
+    out[1:] = np.maximum(high[1:] - low[1:],
+                         np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+    out[0] = np.nan
+    return out
+
+
+def directional_movement(high: np.ndarray, low: np.ndarray):
+    """One-bar +DM and -DM (NaN on the first bar)"""
+    n = len(high)
+    up = np.full(n, np.nan)
+    down = np.full(n, np.nan)
+    up[1:] = high[1:] - high[:-1]
+    down[1:] = low[:-1] - low[1:]
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    plus_dm[:1] = np.nan
+    minus_dm[:1] = np.nan
+    return plus_dm, minus_dm
+
+
+def atr_from_tr(tr: np.ndarray, timeperiod: int, smoother=wilder) -> np.ndarray:
+    """ATR from a precomputed true range"""
+    if len(tr) <= timeperiod:
+        return np.full(len(tr), np.nan)
+    return smoother(tr, timeperiod, timeperiod, tr[1:timeperiod + 1].mean())
+
+
+def di_from_dm(tr: np.ndarray, plus_dm: np.ndarray, minus_dm: np.ndarray,
+               timeperiod: int, smoother=wilder):
+    """+DI and -DI from precomputed true range and directional movement"""
+    n = len(tr)
+    if n <= timeperiod:
+        return np.full(n, np.nan), np.full(n, np.nan)
+
+    # Running Wilder sums (scaled by 1/period) seeded with the first period-1 values
+    start = timeperiod - 1
+    smooth_tr = smoother(tr, timeperiod, start, tr[1:timeperiod].sum() / timeperiod)
+    smooth_plus = smoother(plus_dm, timeperiod, start, plus_dm[1:timeperiod].sum() / timeperiod)
+    smooth_minus = smoother(minus_dm, timeperiod, start, minus_dm[1:timeperiod].sum() / timeperiod)
+
+    valid = smooth_tr * timeperiod >= ZERO
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_plus = np.where(valid, 100 * smooth_plus / smooth_tr, 0.0)
+        di_minus = np.where(valid, 100 * smooth_minus / smooth_tr, 0.0)
+    di_plus[:timeperiod] = np.nan
+    di_minus[:timeperiod] = np.nan
+    return di_plus, di_minus
+
+
+def adx_from_di(di_plus: np.ndarray, di_minus: np.ndarray, timeperiod: int, smoother=wilder) -> np.ndarray:
+    """ADX from precomputed +DI and -DI"""
+    n = len(di_plus)
+    start = 2 * timeperiod - 1
+    if n <= start:
+        return np.full(n, np.nan)
+
+    total = di_plus + di_minus
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx = np.where(total >= ZERO, 100 * np.abs(di_plus - di_minus) / total, 0.0)
+    return smoother(dx, timeperiod, start, dx[timeperiod:start + 1].mean())
+
+
+@_skip_leading_nan(3)
+def ATR(high, low, close, timeperiod=14):
+    """Average true range"""
+    return atr_from_tr(TRANGE(high, low, close), timeperiod)
+
+
+@_skip_leading_nan(3)
+def PLUS_DI(high, low, close, timeperiod=14):
+    """Plus directional indicator"""
+    return di_from_dm(TRANGE(high, low, close), *directional_movement(high, low), timeperiod)[0]
+
+
+@_skip_leading_nan(3)
+def MINUS_DI(high, low, close, timeperiod=14):
+    """Minus directional indicator"""
+    return di_from_dm(TRANGE(high, low, close), *directional_movement(high, low), timeperiod)[1]
+
+
+@_skip_leading_nan(3)
+def ADX(high, low, close, timeperiod=14):
+    """Average directional index"""
+    di_plus, di_minus = di_from_dm(TRANGE(high, low, close), *directional_movement(high, low), timeperiod)
+    return adx_from_di(di_plus, di_minus, timeperiod)
+
+
+@_skip_leading_nan(3)
+def WILLR(high, low, close, timeperiod=14):
+    """Williams %R"""
+    highest = _rolling_max(high, timeperiod)
+    lowest = _rolling_min(low, timeperiod)
+    diff = (highest - lowest) / -100.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(diff != 0.0, (highest - close) / diff, 0.0)
+    out[:timeperiod - 1] = np.nan
+    return out
+
+
+@_skip_leading_nan(3)
+def CCI(high, low, close, timeperiod=14):
+    """Commodity channel index"""
+    typical = (high + low + close) / 3
+    average = _rolling(typical, timeperiod, lambda w: w.mean(axis=1))
+    deviation = _rolling(typical, timeperiod, _mean_deviation)
+    delta = typical - average
+    # Flat windows leave rounding noise where TA-Lib's running sums give exact zeros
+    noise = 8 * np.finfo(np.float64).eps * np.abs(average)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where((deviation > noise) & (np.abs(delta) > noise), delta / (0.015 * deviation), 0.0)
+    out[:timeperiod - 1] = np.nan
+    return out
+
+
+@_skip_leading_nan(2)
+def SAR(high, low, acceleration=0.02, maximum=0.2):
+    """Parabolic SAR (sequential by nature; runs on Python floats)"""
+    n = len(high)
+    out = np.full(n, np.nan)
+    if n < 2:
+        return out
+
+    if acceleration > maximum:
+        acceleration = maximum
+    af = acceleration
+
+    highs = high.tolist()
+    lows = low.tolist()
+
+    # Initial direction from the first bar's directional movement
+    down = lows[0] - lows[1]
+    up = highs[1] - highs[0]
+    is_long = not (down > 0 and up < down)
+
+    if is_long:
+        ep, sar = highs[1], lows[0]
+    else:
+        ep, sar = lows[1], highs[0]
+
+    new_low, new_high = lows[1], highs[1]
+    result = [0.0] * (n - 1)
+
+    for i in range(1, n):
+        prev_low, prev_high = new_low, new_high
+        new_low, new_high = lows[i], highs[i]
+
+        if is_long:
+            if new_low <= sar:
+                # Switch to short
+                is_long = False
+                sar = max(ep, prev_high, new_high)
+                result[i - 1] = sar
+                af = acceleration
+                ep = new_low
+                sar = max(sar + af * (ep - sar), prev_high, new_high)
+            else:
+                result[i - 1] = sar
+                if new_high > ep:
+                    ep = new_high
+                    af = min(af + acceleration, maximum)
+                sar = min(sar + af * (ep - sar), prev_low, new_low)
+        else:
+            if new_high >= sar:
+                # Switch to long
+                is_long = True
+                sar = min(ep, prev_low, new_low)
+                result[i - 1] = sar
+                af = acceleration
+                ep = new_high
+                sar = min(sar + af * (ep - sar), prev_low, new_low)
+            else:
+                result[i - 1] = sar
+                if new_low < ep:
+                    ep = new_low
+                    af = min(af + acceleration, maximum)
+                sar = max(sar + af * (ep - sar), prev_high, new_high)
+
+    out[1:] = result
+    return out
+
+
+@_skip_leading_nan(2)
+def OBV(real, volume):
+    """On-balance volume"""
+    if len(real) == 0:
+        return np.empty(0)
+    direction = np.sign(np.diff(real))
+    out = np.empty(len(real))
+    out[0] = volume[0]
+    out[1:] = direction * volume[1:]
+    return np.cumsum(out)
+
+
+@_skip_leading_nan(4)
+def AD(high, low, close, volume):
+    """Chaikin accumulation/distribution line"""
+    spread = high - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flow = np.where(spread > 0, ((close - low) - (high - close)) / spread * volume, 0.0)
+    return np.cumsum(flow)
+
+
+def benchmark(n_bars: int = 1_000_000, repeat: int = 3, seed: int = 42) -> Dict[str, Dict]:
+    """
+    Compare throughput and accuracy against TA-Lib on a synthetic series
+
+    Returns per-indicator timings (best of ``repeat``), bars/second and the
+    maximum relative difference to TA-Lib (when TA-Lib is installed).
+    """
+    try:
+        import talib
+    except ImportError:
+        talib = None
+
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.0005, n_bars)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0003, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0003, n_bars)))
+    volume = rng.integers(100, 5000, n_bars).astype(np.float64)
+
+    cases = {
+        'EMA': ((close,), {'timeperiod': 21}),
+        'SMA': ((close,), {'timeperiod': 50}),
+        'MACD': ((close,), {}),
+        'RSI': ((close,), {'timeperiod': 14}),
+        'STOCH': ((high, low, close), {}),
+        'BBANDS': ((close,), {'timeperiod': 20}),
+        'ATR': ((high, low, close), {'timeperiod': 14}),
+        'ADX': ((high, low, close), {'timeperiod': 14}),
+        'PLUS_DI': ((high, low, close), {'timeperiod': 14}),
+        'MINUS_DI': ((high, low, close), {'timeperiod': 14}),
+        'WILLR': ((high, low, close), {'timeperiod': 14}),
+        'CCI': ((high, low, close), {'timeperiod': 14}),
+        'SAR': ((high, low), {}),
+        'OBV': ((close, volume), {}),
+        'AD': ((high, low, close, volume), {}),
+    }
+
+    def best_time(func, args, kwargs):
+        best, result = float('inf'), None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    results = {}
+    for name, (args, kwargs) in cases.items():
+        numpy_time, ours = best_time(globals()[name], args, kwargs)
+        entry = {'numpy_s': numpy_time, 'numpy_bars_per_s': n_bars / numpy_time}
+
+        if talib is not None:
+            talib_time, theirs = best_time(getattr(talib, name), args, kwargs)
+            ours = ours if isinstance(ours, tuple) else (ours,)
+            theirs = theirs if isinstance(theirs, tuple) else (theirs,)
+            max_rel = 0.0
+            for a, b in zip(ours, theirs):
+                mask = ~np.isnan(b)
+                if not np.array_equal(mask, ~np.isnan(a)):
+                    max_rel = float('inf')
+                    break
+                scale = np.maximum(np.abs(b[mask]), 1.0)
+                if mask.any():
+                    max_rel = max(max_rel, float(np.max(np.abs(a[mask] - b[mask]) / scale)))
+            entry.update({
+                'talib_s': talib_time,
+                'talib_bars_per_s': n_bars / talib_time,
+                'slowdown': numpy_time / talib_time,
+                'max_rel_diff': max_rel
+            })
+
+        results[name] = entry
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark NumPy indicators against TA-Lib")
+    parser.add_argument('--bars', type=int, default=1_000_000, help="Series length")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    report = benchmark(args.bars, args.repeat)
+    print(f"{'Indicator':<10} {'NumPy ms':>10} {'TA-Lib ms':>10} {'Slowdown':>9} {'Max rel diff':>13}")
+    for name, entry in report.items():
+        if 'talib_s' in entry:
+            print(f"{name:<10} {entry['numpy_s'] * 1000:>10.1f} {entry['talib_s'] * 1000:>10.1f} "
+                  f"{entry['slowdown']:>8.1f}x {entry['max_rel_diff']:>13.2e}")
+        else:
+            print(f"{name:<10} {entry['numpy_s'] * 1000:>10.1f} {'n/a':>10}")
@@ -0,0 +1,525 @@
+import numpy as np
+import logging
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+@dataclass
+class ParameterRange:
+    """A tunable parameter: values low, low + step, ..., high"""
+    name: str
+    low: float
+    high: float
+    step: float
+    is_int: bool = False
+
+    @property
+    def n_values(self) -> int:
+        if self.step <= 0 or self.high <= self.low:
+            return 1
+        return int(round((self.high - self.low) / self.step)) + 1
+
+    def decode(self, u: float):
+        """Unit interval -> nearest grid value"""
+        k = int(np.clip(np.round(u * (self.n_values - 1)), 0, self.n_values - 1))
+        value = self.low + k * self.step
+        return int(round(value)) if self.is_int else round(value, 10)
+
+    def encode(self, value) -> float:
+        """Grid value -> unit interval"""
+        if self.n_values == 1:
+            return 0.5
+        return float(np.clip((value - self.low) / (self.high - self.low), 0.0, 1.0))
+
+
+def load_set_file(path: str, names: Optional[Iterable[str]] = None) -> List[ParameterRange]:
+    """
+    Read the optimized inputs of an MT4/MT5 .set file
+
+    Lines look like ``Name=value||start||stop||step||Y``; only inputs flagged
+    Y are returned, restricted to ``names`` when given.
+    """
+    names = set(names) if names is not None else None
+    ranges = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(';') or '=' not in line:
+                continue
+            name, value = line.split('=', 1)
+            fields = value.split('||')
+            if len(fields) != 5 or fields[4].strip().upper() != 'Y':
+                continue
+            if names is not None and name not in names:
+                continue
+            try:
+                start, stop, step = (float(x) for x in fields[1:4])
+            except ValueError:
+                continue
+            is_int = not any('.' in x for x in fields[:4])
+            ranges.append(ParameterRange(name, start, stop, step, is_int))
+    return ranges
+
+
+class TPESampler:
+    """
+    Tree-structured Parzen estimator over the unit hypercube
+    نمونه‌گیر TPE برای پیشنهاد پارامترها
+
+    Trials are split into the best ``gamma`` fraction and the rest; each is
+    modelled by a per-dimension Parzen density (plus a uniform prior) and
+    candidates drawn from the good density are ranked by l(x) / g(x). Batches
+    are diversified by counting already chosen points as bad (constant liar).
+    """
+
+    def __init__(self, n_dims: int, gamma: float = 0.2, n_startup: int = 16,
+                 n_candidates: int = 64, seed: Optional[int] = None):
+        self.n_dims = n_dims
+        self.gamma = gamma
+        self.n_startup = n_startup
+        self.n_candidates = n_candidates
+        self.rng = np.random.default_rng(seed)
+
+    def _bandwidth(self, points: np.ndarray) -> np.ndarray:
+        n = len(points)
+        std = points.std(axis=0) if n > 1 else np.full(self.n_dims, 0.5)
+        return np.clip(std * n ** (-1.0 / (self.n_dims + 4)), 0.02, 0.5)
+
+    def _log_density(self, x: np.ndarray, points: np.ndarray, bandwidth: np.ndarray) -> np.ndarray:
+        """Sum over dimensions of log Parzen density (mixed with a uniform prior)"""
+        prior = 1.0 / (len(points) + 1)
+        z = (x[:, None, :] - points[None, :, :]) / bandwidth
+        kernels = np.exp(-0.5 * z * z) / (np.sqrt(2 * np.pi) * bandwidth)
+        density = prior + (1 - prior) * kernels.mean(axis=1)
+        return np.log(density).sum(axis=1)
+
+    def _sample(self, points: np.ndarray, bandwidth: np.ndarray, n: int) -> np.ndarray:
+        prior = 1.0 / (len(points) + 1)
+        centers = points[self.rng.integers(0, len(points), n)]
+        samples = centers + self.rng.standard_normal((n, self.n_dims)) * bandwidth
+        uniform = self.rng.random(n) < prior
+        samples[uniform] = self.rng.random((uniform.sum(), self.n_dims))
+        # Reflect into the unit cube
+        samples = np.abs(samples)
+        samples = 1 - np.abs(1 - samples)
+        return np.clip(samples, 0.0, 1.0)
+
+    def ask(self, x: np.ndarray, losses: np.ndarray, batch_size: int) -> np.ndarray:
+        """
+        Propose a batch of points
+
+        Args:
+            x: Observed points (n, n_dims) in [0, 1]
+            losses: Loss of each observed point (lower is better)
+            batch_size: Number of points to propose
+        """
+        if len(x) < self.n_startup:
+            return self.rng.random((batch_size, self.n_dims))
+
+        order = np.argsort(losses, kind='stable')
+        n_good = max(1, int(math.ceil(self.gamma * len(x))))
+        good, bad = x[order[:n_good]], x[order[n_good:]]
+        good_bw = self._bandwidth(good)
+
+        proposals = []
+        for _ in range(batch_size):
+            candidates = self._sample(good, good_bw, self.n_candidates)
+            score = (self._log_density(candidates, good, good_bw) -
+                     self._log_density(candidates, bad, self._bandwidth(bad)))
+            best = candidates[np.argmax(score)]
+            proposals.append(best)
+            bad = np.vstack([bad, best])
+
+        return np.array(proposals)
+
+
+def dominated_by(a: np.ndarray, b: np.ndarray, max_elements: int = 4_000_000) -> np.ndarray:
+    """
+    Mask of the rows of ``a`` dominated by at least one row of ``b``
+
+    All objectives are maximized. Comparisons are broadcast one objective at
+    a time over blocks of rows so the temporaries stay under ``max_elements``.
+    """
+    dominated = np.zeros(len(a), dtype=bool)
+    if len(a) == 0 or len(b) == 0:
+        return dominated
+
+    rows = max(1, max_elements // len(b))
+    for start in range(0, len(a), rows):
+        block = a[start:start + rows]
+        no_worse = np.ones((len(block), len(b)), dtype=bool)
+        better = np.zeros((len(block), len(b)), dtype=bool)
+        for j in range(a.shape[1]):
+            no_worse &= b[None, :, j] >= block[:, j, None]
+            better |= b[None, :, j] > block[:, j, None]
+        dominated[start:start + rows] = (no_worse & better).any(axis=1)
+    return dominated
+
+
+def _first_front(values: np.ndarray, block_size: int = 256) -> np.ndarray:
+    """
+    Mask of the non-dominated points
+
+    A dominating point has a strictly larger sum, so candidates are taken in
+    order of decreasing sum: the non-dominated points of each head block join
+    the front and every remaining candidate they dominate is discarded in
+    one vectorized pass. Sum ties (and rounding) can admit a dominated
+    point, so the front is re-checked at the end.
+    """
+    candidates = np.argsort(-values.sum(axis=1), kind='stable')
+    front = []
+    while len(candidates):
+        head, rest = candidates[:block_size], candidates[block_size:]
+        head = head[~dominated_by(values[head], values[head])]
+        front.append(head)
+        candidates = rest[~dominated_by(values[rest], values[head])]
+
+    front = np.concatenate(front) if front else np.empty(0, dtype=np.int64)
+    front = front[~dominated_by(values[front], values[front])]
+    mask = np.zeros(len(values), dtype=bool)
+    mask[front] = True
+    return mask
+
+
+def non_dominated_sort(values: np.ndarray, max_fronts: Optional[int] = None) -> np.ndarray:
+    """
+    Pareto front index of every point (0 = non-dominated), all objectives maximized
+
+    Fronts are peeled one at a time with vectorized dominance tests; points
+    beyond ``max_fronts`` share the last rank.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ranks = np.zeros(len(values), dtype=np.int64)
+    remaining = np.arange(len(values))
+    front = 0
+    while len(remaining):
+        if max_fronts is not None and front >= max_fronts:
+            ranks[remaining] = front
+            break
+        in_front = _first_front(values[remaining])
+        ranks[remaining[in_front]] = front
+        remaining = remaining[~in_front]
+        front += 1
+    return ranks
+
+
+def crowding_distance(values: np.ndarray) -> np.ndarray:
+    """Crowding distance of the points of one front (boundary points are infinite)"""
+    n, m = values.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+
+    for j in range(m):
+        order = np.argsort(values[:, j], kind='stable')
+        v = values[order, j]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        span = v[-1] - v[0]
+        if np.isfinite(span) and span > 0:
+            distance[order[1:-1]] += (v[2:] - v[:-2]) / span
+    return distance
+
+
+def pareto_order(values: np.ndarray) -> np.ndarray:
+    """Indices sorted by front, then by decreasing crowding distance"""
+    values = np.asarray(values, dtype=np.float64)
+    ranks = non_dominated_sort(values)
+    crowding = np.zeros(len(values))
+    for front in np.unique(ranks):
+        members = np.nonzero(ranks == front)[0]
+        crowding[members] = crowding_distance(values[members])
+    return np.lexsort((-np.nan_to_num(crowding, nan=0.0), ranks))
+
+
+class ParetoFront:
+    """
+    Incrementally maintained set of non-dominated backtest results
+    مجموعه نتایج غیرمغلوب (جبهه پارتو) با به‌روزرسانی تدریجی
+
+    Results can be added one at a time as workers finish; each addition is
+    a vectorized comparison against the current front only.
+    """
+
+    def __init__(self, objectives: Sequence[Tuple[str, str]]):
+        """
+        Args:
+            objectives: (metric name, 'max' or 'min') pairs
+        """
+        self.objectives = [(name, direction) for name, direction in objectives]
+        self.signs = np.array([1.0 if direction == 'max' else -1.0 for _, direction in self.objectives])
+        self.points = np.empty((0, len(self.objectives)))
+        self.items = []
+
+    def vector(self, metrics: Dict) -> np.ndarray:
+        """Metrics as a maximization vector (-inf for missing values)"""
+        if not metrics:
+            return np.full(len(self.objectives), -np.inf)
+        values = np.array([metrics.get(name, np.nan) for name, _ in self.objectives], dtype=np.float64)
+        values = values * self.signs
+        values[~np.isfinite(values)] = -np.inf
+        return values
+
+    def add(self, metrics: Dict, item=None) -> bool:
+        """Add one result; returns True if it joined the front"""
+        return self.add_many([metrics], [item]) > 0
+
+    def add_many(self, metrics: Sequence[Dict], items: Optional[Sequence] = None) -> int:
+        """Add a batch of results; returns how many joined the front"""
+        items = list(items) if items is not None else list(metrics)
+        vectors = np.array([self.vector(m) for m in metrics]).reshape(-1, len(self.objectives))
+        valid = np.isfinite(vectors).all(axis=1)
+        vectors, items = vectors[valid], [item for item, ok in zip(items, valid) if ok]
+
+        # Drop new results dominated by the front or by each other
+        keep = ~dominated_by(vectors, self.points)
+        keep[keep] = ~dominated_by(vectors[keep], vectors[keep])
+        vectors, items = vectors[keep], [item for item, ok in zip(items, keep) if ok]
+        if not len(vectors):
+            return 0
+
+        # Drop front members the new results dominate
+        survivors = ~dominated_by(self.points, vectors)
+        self.points = np.vstack([self.points[survivors], vectors])
+        self.items = [item for item, ok in zip(self.items, survivors) if ok] + items
+        return len(items)
+
+    def values(self) -> np.ndarray:
+        """Front points in the original metric units"""
+        return self.points * self.signs
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class StrategyOptimizer:
+    """
+    Adaptive parameter search with early pruning
+    بهینه‌سازی تطبیقی پارامترها با حذف زودهنگام
+
+    Parameter sets are proposed in batches by a TPE sampler and evaluated in
+    parallel. Each candidate is first run on a short prefix of the date range
+    (the first rung); only the best 1/eta of the results seen at a rung go
+    on to the next, longer range (successive halving), so most poor
+    candidates cost a fraction of a full backtest.
+
+    With several objectives, candidates are ranked by non-dominated sorting
+    (then crowding distance) and the Pareto front of full-range results is
+    updated as each backtest finishes.
+    """
+
+    def __init__(self, space: Sequence[ParameterRange], evaluate: Callable[[Dict, float], Dict],
+                 objective: Union[str, Callable[[Dict], float], Sequence] = 'sharpe_ratio', batch_size: int = 8,
+                 rungs: Sequence[float] = (0.25, 0.5, 1.0), eta: float = 3, max_workers: Optional[int] = None,
+                 n_startup: Optional[int] = None, seed: Optional[int] = None):
+        """
+        Initialize the optimizer
+
+        Args:
+            space: Parameter ranges to search
+            evaluate: Picklable function (params, fraction) -> metrics dict, where
+                fraction is the share of the date range to backtest
+            objective: Metric name or function of the metrics to maximize, or a
+                list of metric names / (name, 'max' or 'min') pairs for a
+                multi-objective (Pareto) search
+            batch_size: Parameter sets proposed and evaluated per batch
+            rungs: Increasing date range fractions; the last is the full evaluation
+            eta: Keep the best 1/eta of candidates at each rung
+            max_workers: Worker processes (1 = evaluate in this process)
+            n_startup: Random trials before TPE proposals (default: 2 batches)
+            seed: Random seed for reproducible searches
+        """
+        self.space = list(space)
+        self.evaluate = evaluate
+        self.objective = objective
+        self.batch_size = batch_size
+        self.rungs = list(rungs)
+        self.eta = eta
+        self.max_workers = max_workers
+        self.sampler = TPESampler(len(self.space), n_startup=n_startup or 2 * batch_size, seed=seed)
+
+        self.front = None
+        if isinstance(objective, (list, tuple)):
+            self.front = ParetoFront([(o, 'max') if isinstance(o, str) else tuple(o) for o in objective])
+
+        self.trials = []
+        self.rung_scores = [[] for _ in self.rungs]
+        self.logger = logging.getLogger(__name__)
+
+    def score(self, metrics: Dict):
+        """
+        Objective value of a backtest result (-inf when it has no trades)
+
+        A maximization vector in multi-objective mode.
+        """
+        if self.front is not None:
+            return self.front.vector(metrics)
+        if not metrics:
+            return -np.inf
+        value = self.objective(metrics) if callable(self.objective) else metrics.get(self.objective)
+        if value is None or not np.isfinite(value):
+            return -np.inf
+        return float(value)
+
+    def decode(self, u: np.ndarray) -> Dict:
+        return {p.name: p.decode(v) for p, v in zip(self.space, u)}
+
+    def encode(self, params: Dict) -> np.ndarray:
+        return np.array([p.encode(params[p.name]) for p in self.space])
+
+    @property
+    def grid_size(self) -> int:
+        return int(np.prod([p.n_values for p in self.space], dtype=np.float64))
+
+    def _order(self, scores: Sequence) -> np.ndarray:
+        """Indices of scores from best to worst"""
+        if self.front is not None:
+            return pareto_order(np.array(scores).reshape(len(scores), -1))
+        return np.argsort(-np.asarray(scores, dtype=np.float64), kind='stable')
+
+    def _losses(self) -> np.ndarray:
+        """Rank trials: deeper rungs first, then by score"""
+        n = len(self.trials)
+        losses = np.empty(n)
+        rungs = np.array([t['rung'] for t in self.trials])
+        for rung in np.unique(rungs):
+            members = np.nonzero(rungs == rung)[0]
+            order = self._order([self.trials[i]['score'] for i in members])
+            position = np.empty(len(members))
+            position[order] = np.arange(len(members))
+            losses[members] = (len(self.rungs) - rung) * n + position
+        return losses
+
+    def _propose(self, n: int) -> List[Dict]:
+        """Propose n parameter sets not evaluated before"""
+        seen = {tuple(sorted(t['params'].items())) for t in self.trials}
+        x = np.array([self.encode(t['params']) for t in self.trials]).reshape(-1, len(self.space))
+        proposals = []
+        for _ in range(10):
+            for u in self.sampler.ask(x, self._losses(), n - len(proposals)):
+                params = self.decode(u)
+                key = tuple(sorted(params.items()))
+                if key not in seen:
+                    seen.add(key)
+                    proposals.append(params)
+            if len(proposals) >= n:
+                break
+        return proposals
+
+    def _promoted(self, rung: int, active: List[Dict], positions: Dict[int, int]) -> List[Dict]:
+        """Trials of this batch whose rung result is in the best 1/eta seen at the rung"""
+        history = self.rung_scores[rung]
+        keep = max(1, int(len(history) / self.eta))
+        top = set(self._order(history)[:keep].tolist())
+        return [t for t in active
+                if positions[t['number']] in top and np.all(np.isfinite(t['score']))]
+
+    def _evaluate_rung(self, executor, active: List[Dict], fraction: float):
+        """Yield (trial, metrics) as the backtests finish"""
+        if executor is None:
+            for trial in active:
+                yield trial, self.evaluate(trial['params'], fraction)
+            return
+
+        futures = {executor.submit(self.evaluate, t['params'], fraction): t for t in active}
+        for future in as_completed(futures):
+            try:
+                metrics = future.result()
+            except Exception as e:
+                self.logger.error(f"Optimizer trial failed: {e}")
+                metrics = {}
+            yield futures[future], metrics
+
+    def _run_batch(self, executor, batch: List[Dict]):
+        """Evaluate a batch rung by rung, pruning between rungs"""
+        trials = [{'number': len(self.trials) + i, 'params': params, 'scores': [], 'metrics': {},
+                   'rung': -1, 'score': -np.inf, 'cost': 0.0}
+                  for i, params in enumerate(batch)]
+        active = trials
+        final = len(self.rungs) - 1
+
+        for rung, fraction in enumerate(self.rungs):
+            positions = {}
+            for trial, metrics in self._evaluate_rung(executor, active, fraction):
+                trial['metrics'] = metrics or {}
+                trial['score'] = self.score(trial['metrics'])
+                trial['scores'].append(trial['score'])
+                trial['rung'] = rung
+                trial['cost'] += fraction
+                positions[trial['number']] = len(self.rung_scores[rung])
+                self.rung_scores[rung].append(trial['score'])
+
+                if rung == final and self.front is not None and self.front.add(trial['metrics'], trial):
+                    self.logger.info(f"Pareto front updated: {len(self.front)} results")
+
+            if rung == final:
+                break
+            active = self._promoted(rung, active, positions)
+            if not active:
+                break
+
+        for trial in trials:
+            trial['pruned'] = trial['rung'] < final
+        self.trials.extend(trials)
+
+    def optimize(self, n_trials: int = 200) -> Dict:
+        """
+        Run the search
+
+        Returns:
+            Dict with the best parameters, score and metrics (single objective)
+            or the Pareto front (multi-objective), every trial, and the cost in
+            full-backtest equivalents
+        """
+        start = time.time()
+        executor = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers != 1 else None
+        try:
+            while len(self.trials) < n_trials:
+                batch = self._propose(min(self.batch_size, n_trials - len(self.trials)))
+                if not batch:
+                    break
+                self._run_batch(executor, batch)
+
+                if self.front is not None:
+                    self.logger.info(f"Optimizer: {len(self.trials)}/{n_trials} trials, "
+                                     f"{len(self.front)} on the Pareto front")
+                else:
+                    best = self.best_trial()
+                    self.logger.info(f"Optimizer: {len(self.trials)}/{n_trials} trials, "
+                                     f"best score {best['score'] if best else float('nan'):.4f}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        best = self.best_trial()
+        results = {
+            'best_params': best['params'] if best else {},
+            'best_score': best['score'] if best else -np.inf,
+            'best_metrics': best['metrics'] if best else {},
+            'n_trials': len(self.trials),
+            'n_complete': sum(1 for t in self.trials if t['rung'] == len(self.rungs) - 1),
+            'backtests_equivalent': sum(t['cost'] for t in self.trials),
+            'grid_size': self.grid_size,
+            'elapsed': time.time() - start,
+            'trials': self.trials
+        }
+        if self.front is not None:
+            results['pareto_front'] = self.pareto_front()
+        return results
+
+    def best_trial(self) -> Optional[Dict]:
+        """Best trial evaluated on the full date range (single objective only)"""
+        if self.front is not None:
+            return None
+        complete = [t for t in self.trials if t['rung'] == len(self.rungs) - 1 and np.isfinite(t['score'])]
+        return max(complete, key=lambda t: t['score']) if complete else None
+
+    def pareto_front(self) -> List[Dict]:
+        """Non-dominated full-range trials, sorted by the first objective (best first)"""
+        if self.front is None:
+            return []
+        order = np.argsort(-self.front.points[:, 0], kind='stable')
+        return [self.front.items[i] for i in order]
@@ -0,0 +1,251 @@
+import MetaTrader5 as mt5
+import time
+import queue
+import threading
+import logging
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class OrderExecutor:
+    """
+    Dedicated order execution thread with fresh pricing and latency tracking
+    اجرای سفارش‌ها در رشته اختصاصی با قیمت لحظه‌ای و ثبت تأخیر
+    """
+
+    # Retcodes that mean the price moved and the order can be re-priced and resent
+    RETRY_RETCODES = (
+        mt5.TRADE_RETCODE_REQUOTE,
+        mt5.TRADE_RETCODE_PRICE_CHANGED,
+        mt5.TRADE_RETCODE_PRICE_OFF,
+    )
+
+    def __init__(self, account_cache_ttl: float = 5.0, max_retries: int = 3,
+                 retry_delay: float = 0.05, max_history: int = 1000, quote_max_age: float = 0.25):
+        """
+        Initialize the order executor
+
+        Args:
+            account_cache_ttl: Seconds an account_info() snapshot stays valid
+            max_retries: Maximum send attempts on requotes
+            retry_delay: Pause between requote attempts in seconds
+            max_history: Number of recent executions kept for statistics
+            quote_max_age: Oldest market snapshot quote used to price a first attempt
+        """
+        self.account_cache_ttl = account_cache_ttl
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.quote_max_age = quote_max_age
+
+        # Optional metrics registry (set by LiveForexTrader)
+        self.metrics = None
+
+        # Optional shared quotes (MarketSnapshot); the broker is asked when none is fresh
+        self.market = None
+
+        # Account info cache
+        self._account_info = None
+        self._account_info_time = 0.0
+        self._account_lock = threading.Lock()
+
+        # Execution queue and worker
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        # Execution history
+        self.execution_history = deque(maxlen=max_history)
+
+        self.logger = logging.getLogger(__name__)
+
+    def get_account_info(self, force: bool = False):
+        """Get account info, served from cache while it is fresher than the TTL"""
+        try:
+            with self._account_lock:
+                now = time.monotonic()
+                if (force or self._account_info is None or
+                        now - self._account_info_time > self.account_cache_ttl):
+                    account_info = mt5.account_info()
+                    if account_info is None:
+                        return self._account_info
+                    self._account_info = account_info
+                    self._account_info_time = now
+
+                return self._account_info
+
+        except Exception as e:
+            self.logger.error(f"Error getting account info: {e}")
+            return None
+
+    def invalidate_account_info(self):
+        """Force the next get_account_info() call to hit the terminal"""
+        with self._account_lock:
+            self._account_info_time = 0.0
+
+    def start(self):
+        """Start the executor thread"""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="order-executor", daemon=True)
+                self._worker.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the executor thread after queued orders are sent"""
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                self._queue.put(None)
+                self._worker.join(timeout=timeout)
+            self._worker = None
+
+    def submit(self, request: Dict, signal_price: float = None) -> Future:
+        """
+        Queue an order request for sending
+
+        The request price is replaced with a fresh quote at send time.
+        The returned future resolves to an execution report dict.
+        """
+        future = Future()
+        self.start()
+        self._queue.put((request, signal_price, future, time.perf_counter()))
+        return future
+
+    def _run(self):
+        """Executor thread main loop"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            request, signal_price, future, queued_at = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                report = self._execute(request, signal_price)
+                report['queue_ms'] = (report.pop('_started_at') - queued_at) * 1000
+                future.set_result(report)
+            except Exception as e:
+                self.logger.error(f"Error executing order: {e}")
+                future.set_exception(e)
+
+    def _get_pip_value(self, symbol: str) -> float:
+        """Get pip value for symbol"""
+        return 0.01 if 'JPY' in symbol else 0.0001
+
+    def _execute(self, request: Dict, signal_price: Optional[float]) -> Dict:
+        """Send an order, re-pricing and retrying on requotes"""
+        request = dict(request)
+        symbol = request['symbol']
+        is_buy = request['type'] == mt5.ORDER_TYPE_BUY
+        pip_value = self._get_pip_value(symbol)
+
+        report = {
+            'success': False,
+            'symbol': symbol,
+            'side': 'BUY' if is_buy else 'SELL',
+            'volume': request['volume'],
+            'retcode': None,
+            'comment': '',
+            'attempts': 0,
+            'signal_price': signal_price,
+            'requested_price': None,
+            'fill_price': None,
+            'latency_ms': 0.0,
+            'slippage_pips': 0.0,
+            'signal_drift_pips': 0.0,
+            'order': None,
+            'price_source': None,
+            '_started_at': time.perf_counter()
+        }
+
+        result = None
+        for attempt in range(1, self.max_retries + 1):
+            report['attempts'] = attempt
+
+            # Fresh price at send time: the shared snapshot first, the broker on requotes
+            tick = None
+            if attempt == 1 and self.market is not None:
+                tick = self.market.quote(symbol, self.quote_max_age)
+                report['price_source'] = 'snapshot'
+            if tick is None:
+                tick = mt5.symbol_info_tick(symbol)
+                report['price_source'] = 'broker'
+            if tick is None:
+                report['comment'] = f"No tick for {symbol}"
+                break
+
+            price = tick.ask if is_buy else tick.bid
+            request['price'] = price
+            report['requested_price'] = price
+
+            send_start = time.perf_counter()
+            result = mt5.order_send(request)
+            send_seconds = time.perf_counter() - send_start
+            report['latency_ms'] += send_seconds * 1000
+
+            if self.metrics is not None:
+                self.metrics.observe('order_send', send_seconds)
+                self.metrics.inc('order_retcodes_total', retcode=result.retcode if result else 'none')
+
+            if result is None:
+                report['comment'] = f"order_send returned None: {mt5.last_error()}"
+                break
+
+            report['retcode'] = result.retcode
+            report['comment'] = result.comment
+
+            if result.retcode in self.RETRY_RETCODES and attempt < self.max_retries:
+                self.logger.warning(f"Requote on {symbol} (retcode {result.retcode}), retrying...")
+                time.sleep(self.retry_delay)
+                continue
+            break
+
+        if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+            fill_price = result.price or report['requested_price']
+            direction = 1 if is_buy else -1
+
+            report['success'] = True
+            report['order'] = result.order
+            report['fill_price'] = fill_price
+            # Positive values are adverse to us
+            report['slippage_pips'] = (fill_price - report['requested_price']) * direction / pip_value
+            if signal_price:
+                report['signal_drift_pips'] = (report['requested_price'] - signal_price) * direction / pip_value
+
+            self.invalidate_account_info()
+
+        self.execution_history.append({k: v for k, v in report.items() if k != '_started_at'})
+        return report
+
+    def get_execution_stats(self) -> Dict:
+        """Summarize latency and slippage over recent executions"""
+        try:
+            history = list(self.execution_history)
+            filled = [r for r in history if r['success']]
+
+            if not history:
+                return {'orders': 0}
+
+            latencies = np.array([r['latency_ms'] for r in history])
+            stats = {
+                'orders': len(history),
+                'filled': len(filled),
+                'requotes': sum(r['attempts'] - 1 for r in history),
+                'snapshot_priced': sum(r.get('price_source') == 'snapshot' for r in history),
+                'latency_ms_mean': float(latencies.mean()),
+                'latency_ms_p50': float(np.percentile(latencies, 50)),
+                'latency_ms_p99': float(np.percentile(latencies, 99)),
+            }
+
+            if filled:
+                slippage = np.array([r['slippage_pips'] for r in filled])
+                stats['slippage_pips_mean'] = float(slippage.mean())
+                stats['slippage_pips_max'] = float(slippage.max())
+
+            return stats
+
+        except Exception as e:
+            self.logger.error(f"Error calculating execution stats: {e}")
+            return {}
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+ANNUALIZATION_15M = np.sqrt(252 * 24 * 4)  # 15min intervals
+
+
+def _segment_ids(offsets: np.ndarray) -> np.ndarray:
+    """Configuration index of every trade"""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def _segment_reduce(ufunc, values: np.ndarray, offsets: np.ndarray, empty: float) -> np.ndarray:
+    """ufunc.reduceat over segments, filling empty segments with ``empty``"""
+    n = len(offsets) - 1
+    out = np.full(n, empty, dtype=np.float64)
+    nonempty = np.flatnonzero(np.diff(offsets) > 0)
+    if len(nonempty):
+        out[nonempty] = ufunc.reduceat(values, offsets[nonempty])
+    return out
+
+
+def _max_streaks(flags: np.ndarray, seg: np.ndarray, n_configs: int) -> np.ndarray:
+    """Longest run of True per segment using run-length encoding"""
+    n = len(flags)
+    if n == 0:
+        return np.zeros(n_configs, dtype=np.int64)
+
+    change = np.empty(n, dtype=bool)
+    change[0] = True
+    change[1:] = (flags[1:] != flags[:-1]) | (seg[1:] != seg[:-1])
+
+    run_starts = np.flatnonzero(change)
+    run_lengths = np.diff(np.append(run_starts, n))
+    run_lengths = np.where(flags[run_starts], run_lengths, 0)
+
+    out = np.zeros(n_configs, dtype=np.int64)
+    np.maximum.at(out, seg[run_starts], run_lengths)
+    return out
+
+
+def batch_trade_metrics(pnl: np.ndarray, offsets: np.ndarray,
+                        entry_times: Optional[np.ndarray] = None,
+                        durations: Optional[np.ndarray] = None,
+                        initial_balance=10000.0,
+                        final_balance: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Trade-based metrics for many configurations at once
+    محاسبه برداری معیارهای معاملات برای چندین پیکربندی
+
+    Trades of all configurations are concatenated; the trades of configuration
+    i are pnl[offsets[i]:offsets[i + 1]]. Streaks use run-length encoding and
+    monthly buckets use integer month keys with bincount, so there is no
+    Python loop over trades or configurations.
+
+    Args:
+        pnl: Concatenated trade P&L of all configurations
+        offsets: Segment boundaries, length n_configs + 1
+        entry_times: Trade entry times (datetime64 or epoch seconds)
+        durations: Trade durations in hours
+        initial_balance: Starting balance (scalar or per configuration)
+        final_balance: Ending balance per configuration (default: initial + total P&L)
+
+    Returns:
+        Dict of per-configuration metric arrays (same keys as the backtester report)
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n_configs = len(offsets) - 1
+    seg = _segment_ids(offsets)
+    counts = np.diff(offsets)
+
+    wins = pnl > 0
+    losses = pnl < 0
+
+    n_wins = np.bincount(seg, weights=wins, minlength=n_configs)
+    n_losses = np.bincount(seg, weights=losses, minlength=n_configs)
+    total_pnl = np.bincount(seg, weights=pnl, minlength=n_configs)
+    gross_profit = np.bincount(seg, weights=np.where(wins, pnl, 0.0), minlength=n_configs)
+    gross_loss = -np.bincount(seg, weights=np.where(losses, pnl, 0.0), minlength=n_configs)
+
+    safe_counts = np.maximum(counts, 1)
+    initial_balance = np.broadcast_to(np.asarray(initial_balance, dtype=np.float64), (n_configs,))
+    if final_balance is None:
+        final_balance = initial_balance + total_pnl
+    final_balance = np.asarray(final_balance, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss, np.inf)
+        avg_win = np.where(n_wins > 0, gross_profit / np.maximum(n_wins, 1), 0.0)
+        avg_loss = np.where(n_losses > 0, -gross_loss / np.maximum(n_losses, 1), 0.0)
+
+    largest_win = _segment_reduce(np.maximum, np.where(wins, pnl, -np.inf), offsets, 0.0)
+    largest_loss = _segment_reduce(np.minimum, np.where(losses, pnl, np.inf), offsets, 0.0)
+    largest_win[np.isinf(largest_win)] = 0.0
+    largest_loss[np.isinf(largest_loss)] = 0.0
+
+    metrics = {
+        'total_trades': counts,
+        'winning_trades': n_wins.astype(np.int64),
+        'losing_trades': n_losses.astype(np.int64),
+        'win_rate': n_wins / safe_counts * 100,
+        'loss_rate': n_losses / safe_counts * 100,
+        'total_pnl': total_pnl,
+        'total_return': (final_balance - initial_balance) / initial_balance * 100,
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'profit_factor': profit_factor,
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'largest_win': largest_win,
+        'largest_loss': largest_loss,
+        # A trade that is not a win breaks a winning streak (and extends a losing one)
+        'max_consecutive_wins': _max_streaks(wins, seg, n_configs),
+        'max_consecutive_losses': _max_streaks(~wins, seg, n_configs),
+    }
+
+    if durations is not None:
+        durations = np.asarray(durations, dtype=np.float64)
+        n_w = np.maximum(n_wins, 1)
+        n_l = np.maximum(n_losses, 1)
+        metrics['avg_trade_duration'] = np.where(
+            counts > 0, np.bincount(seg, weights=durations, minlength=n_configs) / safe_counts, np.nan)
+        metrics['avg_winning_duration'] = np.where(
+            n_wins > 0, np.bincount(seg, weights=np.where(wins, durations, 0.0), minlength=n_configs) / n_w, 0.0)
+        metrics['avg_losing_duration'] = np.where(
+            n_losses > 0, np.bincount(seg, weights=np.where(losses, durations, 0.0), minlength=n_configs) / n_l, 0.0)
+
+    if entry_times is not None and len(pnl):
+        entry_times = np.asarray(entry_times)
+        if not np.issubdtype(entry_times.dtype, np.datetime64):
+            entry_times = entry_times.astype('datetime64[s]')
+        months = entry_times.astype('datetime64[M]').astype(np.int64)
+        months -= months.min()
+        n_months = int(months.max()) + 1
+
+        key = seg * n_months + months
+        month_pnl = np.bincount(key, weights=pnl, minlength=n_configs * n_months).reshape(n_configs, n_months)
+        month_trades = np.bincount(key, minlength=n_configs * n_months).reshape(n_configs, n_months)
+
+        active = month_trades > 0
+        winning_months = np.count_nonzero(active & (month_pnl > 0), axis=1)
+        total_months = np.count_nonzero(active, axis=1)
+
+        metrics['winning_months'] = winning_months
+        metrics['total_months'] = total_months
+        metrics['monthly_win_rate'] = np.where(total_months > 0,
+                                               winning_months / np.maximum(total_months, 1) * 100, 0.0)
+    elif entry_times is not None:
+        metrics['winning_months'] = np.zeros(n_configs, dtype=np.int64)
+        metrics['total_months'] = np.zeros(n_configs, dtype=np.int64)
+        metrics['monthly_win_rate'] = np.zeros(n_configs)
+
+    return metrics
+
+
+def trade_metrics(pnl: np.ndarray, entry_times: Optional[np.ndarray] = None,
+                  durations: Optional[np.ndarray] = None, initial_balance: float = 10000.0,
+                  final_balance: Optional[float] = None) -> Dict:
+    """Trade-based metrics for a single configuration as Python scalars"""
+    batch = batch_trade_metrics(
+        pnl, np.array([0, len(pnl)]), entry_times, durations, initial_balance,
+        None if final_balance is None else np.array([final_balance])
+    )
+    return {key: values[0].item() for key, values in batch.items()}
+
+
+def equity_metrics(equity: np.ndarray, annualization: float = ANNUALIZATION_15M) -> Dict:
+    """
+    Drawdown and risk-adjusted return metrics from a per-bar equity curve
+
+    Matches the pandas implementation (pct_change, expanding max, sample std).
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) == 0:
+        return {'max_drawdown': 0.0, 'sharpe_ratio': 0, 'sortino_ratio': 0, 'peak_balance': 0.0}
+
+    peak = np.maximum.accumulate(equity)
+    max_drawdown = float(((equity - peak) / peak * 100).min())
+
+    returns = np.diff(equity) / equity[:-1]
+    returns = returns[~np.isnan(returns)]
+
+    sharpe_ratio = 0
+    if len(returns) > 1:
+        std = returns.std(ddof=1)
+        if std > 0:
+            sharpe_ratio = float(returns.mean() / std * annualization)
+
+    sortino_ratio = 0
+    negative = returns[returns < 0]
+    if len(negative) > 1:
+        downside = negative.std(ddof=1)
+        if downside > 0:
+            sortino_ratio = float(returns.mean() / downside * annualization)
+
+    return {
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe_ratio,
+        'sortino_ratio': sortino_ratio,
+        'peak_balance': float(peak[-1])
+    }
+
+
+def _wall_clock_times(times) -> np.ndarray:
+    """datetime64 array in local wall time (timezone-aware inputs keep their calendar month)"""
+    index = pd.DatetimeIndex(pd.to_datetime(times))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values
+
+
+def trades_to_arrays(trades: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convert backtester trade records into the arrays used by the kernel"""
+    return {
+        'pnl': np.fromiter((t['pnl'] for t in trades), dtype=np.float64, count=len(trades)),
+        'durations': np.fromiter((t['duration'] for t in trades), dtype=np.float64, count=len(trades)),
+        'entry_times': _wall_clock_times([t['entry_time'] for t in trades]),
+    }
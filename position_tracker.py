@@ -0,0 +1,179 @@
+import MetaTrader5 as mt5
+import time
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from log_pipeline import log_event
+
+
+class PositionTracker:
+    """
+    Incremental deal and position tracker with per-symbol P&L
+    ردیابی افزایشی معاملات و پوزیشن‌ها با سود و زیان هر نماد
+
+    Each update only processes deals newer than the last seen ticket and
+    replaces (rather than accumulates) floating P&L, so every deal is
+    counted exactly once.
+    """
+
+    CLOSING_ENTRIES = (mt5.DEAL_ENTRY_OUT, mt5.DEAL_ENTRY_INOUT, mt5.DEAL_ENTRY_OUT_BY)
+
+    def __init__(self, magic: Optional[int] = None, risk_manager=None):
+        """
+        Initialize the tracker
+
+        Args:
+            magic: Only track deals and positions with this magic number (None = all)
+            risk_manager: Optional AdvancedRiskManager notified when tracked positions close
+        """
+        self.magic = magic
+        self.risk_manager = risk_manager
+
+        # Incremental cursor (deal times are epoch seconds in server time)
+        self.last_deal_ticket = 0
+        self.last_deal_time = None
+
+        # Per-symbol P&L
+        self.realized_pnl = {}
+        self.daily_realized_pnl = {}
+        self.unrealized_pnl = {}
+        self.total_realized = 0.0
+        self.daily_realized = 0.0
+        self.total_unrealized = 0.0
+
+        # Daily win/loss counts
+        self.current_day = datetime.now().date()
+        self.daily_wins = 0
+        self.daily_closed = 0
+
+        # MT5 position ticket -> risk manager position id
+        self.position_map = {}
+
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def register_position(self, position_ticket: int, risk_position_id: str):
+        """Link an MT5 position to the risk manager position opened for it"""
+        with self._lock:
+            self.position_map[position_ticket] = risk_position_id
+
+    def _roll_day(self):
+        """Reset daily counters at midnight"""
+        today = datetime.now().date()
+        if today != self.current_day:
+            self.current_day = today
+            self.daily_realized_pnl = {}
+            self.daily_realized = 0.0
+            self.daily_wins = 0
+            self.daily_closed = 0
+
+    def _apply_deal(self, deal):
+        """Account for a single new deal"""
+        pnl = deal.profit + deal.commission + deal.swap
+        symbol = deal.symbol
+
+        self.realized_pnl[symbol] = self.realized_pnl.get(symbol, 0.0) + pnl
+        self.daily_realized_pnl[symbol] = self.daily_realized_pnl.get(symbol, 0.0) + pnl
+        self.total_realized += pnl
+        self.daily_realized += pnl
+
+        if deal.entry not in self.CLOSING_ENTRIES:
+            return
+
+        self.daily_closed += 1
+        if deal.profit > 0:
+            self.daily_wins += 1
+
+        risk_position_id = self.position_map.pop(deal.position_id, None)
+        log_event(
+            logging.getLogger('trades'), 'trade_closed',
+            f"Trade closed: {symbol} position {deal.position_id} at {deal.price}, P&L {pnl:.2f}",
+            symbol=symbol, position=deal.position_id, position_id=risk_position_id,
+            price=deal.price, profit=deal.profit, pnl=pnl, deal_time=datetime.fromtimestamp(deal.time)
+        )
+        if risk_position_id and self.risk_manager is not None:
+            self.risk_manager.close_position(
+                risk_position_id, deal.price, datetime.fromtimestamp(deal.time)
+            )
+
+    def update_deals(self) -> int:
+        """Fetch and apply deals after the last seen ticket, returning how many were new"""
+        try:
+            with self._lock:
+                self._roll_day()
+
+                if self.last_deal_time is None:
+                    date_from = int(datetime.combine(self.current_day, datetime.min.time()).timestamp())
+                else:
+                    date_from = self.last_deal_time
+
+                # Server time can run ahead of local time
+                date_to = int(time.time()) + 86400
+                deals = mt5.history_deals_get(date_from, date_to)
+                if deals is None:
+                    return 0
+
+                new_deals = 0
+                for deal in sorted(deals, key=lambda d: d.ticket):
+                    if deal.ticket <= self.last_deal_ticket:
+                        continue
+                    self.last_deal_ticket = deal.ticket
+                    self.last_deal_time = deal.time
+
+                    if not deal.symbol or (self.magic is not None and deal.magic != self.magic):
+                        continue
+
+                    self._apply_deal(deal)
+                    new_deals += 1
+
+                return new_deals
+
+        except Exception as e:
+            self.logger.error(f"Error updating deals: {e}")
+            return 0
+
+    def update_positions(self):
+        """Refresh floating P&L from open positions"""
+        try:
+            positions = mt5.positions_get()
+            if positions is None:
+                return
+
+            unrealized = {}
+            for position in positions:
+                if self.magic is not None and position.magic != self.magic:
+                    continue
+                unrealized[position.symbol] = unrealized.get(position.symbol, 0.0) + position.profit
+
+            with self._lock:
+                self.unrealized_pnl = unrealized
+                self.total_unrealized = sum(unrealized.values())
+
+        except Exception as e:
+            self.logger.error(f"Error updating positions: {e}")
+
+    def update(self) -> int:
+        """Process new deals and refresh open position P&L"""
+        new_deals = self.update_deals()
+        self.update_positions()
+        return new_deals
+
+    def get_symbol_pnl(self, symbol: str) -> Dict:
+        """Get realized and unrealized P&L for a symbol"""
+        return {
+            'realized': self.realized_pnl.get(symbol, 0.0),
+            'daily_realized': self.daily_realized_pnl.get(symbol, 0.0),
+            'unrealized': self.unrealized_pnl.get(symbol, 0.0)
+        }
+
+    def get_daily_pnl(self, symbol: Optional[str] = None) -> float:
+        """Today's realized plus current floating P&L, for one symbol or all"""
+        if symbol is None:
+            return self.daily_realized + self.total_unrealized
+        return self.daily_realized_pnl.get(symbol, 0.0) + self.unrealized_pnl.get(symbol, 0.0)
+
+    def get_daily_win_rate(self) -> float:
+        """Win rate of positions closed today"""
+        return self.daily_wins / self.daily_closed * 100 if self.daily_closed else 0.0
@@ -0,0 +1,319 @@
+import os
+import sys
+import time
+import zlib
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+# Flamegraph layout
+SVG_WIDTH = 1200
+FRAME_HEIGHT = 16
+MIN_FRAME_WIDTH = 0.1  # pixels; narrower frames are not drawn
+
+
+class CycleProfile:
+    """Samples and duration of one trading cycle"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+
+class SamplingProfiler:
+    """
+    Low-overhead sampling profiler for the live trading threads
+    پروفایلر نمونه‌برداری کم‌هزینه برای رشته‌های معاملات زنده
+
+    A daemon thread snapshots the stacks of registered threads every
+    ``interval`` seconds through sys._current_frames(), so the profiled
+    threads do no work per sample beyond declaring their stage
+    (``with profiler.stage('fetch')``). Samples are aggregated as collapsed
+    stacks (``thread;stage:fetch;module:function;... count``), the input
+    of flamegraph.pl, inferno and speedscope, and can be written as an SVG
+    flamegraph directly.
+    """
+
+    def __init__(self, interval: float = 0.05, output_dir: str = 'logs/profiles',
+                 max_stacks: int = 20000, max_depth: int = 64, slow_dump_interval: float = 300.0):
+        """
+        Args:
+            interval: Seconds between samples
+            output_dir: Where dumps are written
+            max_stacks: Distinct stacks kept; further new stacks are counted as dropped
+            max_depth: Frames kept per stack (innermost frames are kept)
+            slow_dump_interval: Minimum seconds between two slow-cycle dumps
+        """
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.slow_dump_interval = slow_dump_interval
+
+        self._threads = {}   # thread ident -> name
+        self._stages = {}    # thread ident -> current stage
+        self._cycles = {}    # thread ident -> CycleProfile in progress
+        self._labels = {}    # code object -> frame label
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.samples = 0
+        self.dropped = 0
+        self.sampling_seconds = 0.0
+        self.started_at = None
+        self.slow_cycles = 0
+        self.slow_dumps = 0
+        self._last_slow_dump = None
+
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def register_thread(self, name: Optional[str] = None, thread: Optional[threading.Thread] = None):
+        """Sample a thread (default: the calling thread)"""
+        thread = thread or threading.current_thread()
+        self._threads[thread.ident] = name or thread.name
+
+    def unregister_thread(self, thread: Optional[threading.Thread] = None):
+        ident = (thread or threading.current_thread()).ident
+        self._threads.pop(ident, None)
+        self._stages.pop(ident, None)
+        self._cycles.pop(ident, None)
+
+    def start(self) -> bool:
+        if self.running:
+            return False
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Sampling profiler started ({1 / self.interval:.0f} Hz)")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                self.logger.error(f"Error sampling stacks: {e}")
+
+    @contextmanager
+    def stage(self, name: str):
+        """Tag samples of the calling thread with a stage name"""
+        ident = threading.get_ident()
+        previous = self._stages.get(ident)
+        self._stages[ident] = name
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._stages.pop(ident, None)
+            else:
+                self._stages[ident] = previous
+
+    @contextmanager
+    def cycle(self, budget: Optional[float] = None, name: str = 'cycle'):
+        """
+        Collect the calling thread's samples for one cycle
+
+        When the cycle takes longer than ``budget`` seconds (and the profiler
+        is running), its samples are dumped as a slow-cycle profile, at most
+        once per ``slow_dump_interval`` and on a background thread, so a
+        sustained slowdown adds no file I/O to the profiled thread.
+        """
+        ident = threading.get_ident()
+        profile = CycleProfile()
+        self._cycles[ident] = profile
+        try:
+            yield profile
+        finally:
+            self._cycles.pop(ident, None)
+            profile.elapsed = time.perf_counter() - profile.started
+            if budget is not None and profile.elapsed > budget and profile.counts:
+                self.slow_cycles += 1
+                now = time.monotonic()
+                if self._last_slow_dump is None or now - self._last_slow_dump >= self.slow_dump_interval:
+                    self._last_slow_dump = now
+                    threading.Thread(target=self._dump_slow, args=(profile, budget, name),
+                                     name='profile-dump', daemon=True).start()
+
+    def _dump_slow(self, profile: CycleProfile, budget: float, name: str):
+        try:
+            paths = self.write(profile.counts, f"slow_{name}_{profile.elapsed * 1000:.0f}ms")
+            self.slow_dumps += 1
+            self.logger.warning(f"Slow {name}: {profile.elapsed:.2f}s (budget {budget:.2f}s), "
+                                f"profile written to {paths['folded']}")
+        except Exception as e:
+            self.logger.error(f"Error writing slow {name} profile: {e}")
+
+    def sample(self):
+        """Record one stack sample of every registered thread"""
+        started = time.perf_counter()
+        frames = sys._current_frames()
+        try:
+            for ident, thread_name in list(self._threads.items()):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stage = self._stages.get(ident)
+                stack = self._collapse(frame)
+                key = f"{thread_name};stage:{stage};{stack}" if stage else f"{thread_name};{stack}"
+
+                with self._lock:
+                    if key in self._counts or len(self._counts) < self.max_stacks:
+                        self._counts[key] += 1
+                    else:
+                        self.dropped += 1
+                    profile = self._cycles.get(ident)
+                    if profile is not None:
+                        profile.counts[key] += 1
+                    self.samples += 1
+        finally:
+            del frames
+            self.sampling_seconds += time.perf_counter() - started
+
+    def _collapse(self, frame) -> str:
+        """Root-first 'module:function' labels of a stack"""
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                label = self._labels[code] = f"{module}:{code.co_name}"
+            labels.append(label)
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def snapshot(self, reset: bool = False) -> Counter:
+        """Copy of the aggregated stacks (optionally starting a new profile)"""
+        with self._lock:
+            counts = Counter(self._counts)
+            if reset:
+                self._counts.clear()
+                self.dropped = 0
+        return counts
+
+    def write(self, counts: Optional[Dict[str, int]] = None, prefix: str = 'profile') -> Dict[str, str]:
+        """
+        Write collapsed stacks (.folded) and an SVG flamegraph
+
+        Returns:
+            {'folded': path, 'svg': path}
+        """
+        counts = self.snapshot() if counts is None else counts
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+
+        with open(f"{base}.folded", 'w') as f:
+            f.write(collapsed_text(counts))
+        with open(f"{base}.svg", 'w') as f:
+            f.write(flamegraph_svg(counts, title=f"{prefix} ({sum(counts.values())} samples)"))
+        return {'folded': f"{base}.folded", 'svg': f"{base}.svg"}
+
+    def stage_breakdown(self, counts: Optional[Dict[str, int]] = None) -> Dict[str, float]:
+        """Share of samples in each stage (untagged samples under 'other')"""
+        counts = self.snapshot() if counts is None else counts
+        stages = Counter()
+        for stack, count in counts.items():
+            parts = stack.split(';', 2)
+            stage = parts[1][6:] if len(parts) > 1 and parts[1].startswith('stage:') else 'other'
+            stages[stage] += count
+        total = sum(stages.values()) or 1
+        return {stage: count / total for stage, count in stages.most_common()}
+
+    def get_stats(self) -> Dict:
+        wall = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'distinct_stacks': len(self._counts),
+            'dropped_samples': self.dropped,
+            'overhead_pct': 100 * self.sampling_seconds / wall if wall else 0.0,
+            'slow_cycles': self.slow_cycles,
+            'slow_dumps': self.slow_dumps,
+            'stages': self.stage_breakdown(),
+        }
+
+
+def collapsed_text(counts: Dict[str, int]) -> str:
+    """Collapsed-stack lines ('frame;frame;frame count'), most frequent first"""
+    return ''.join(f"{stack} {count}\n" for stack, count in
+                   sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def _frame_color(label: str) -> str:
+    """Stable warm color per frame name"""
+    h = zlib.crc32(label.encode())
+    return f"rgb({205 + h % 50},{(h >> 8) % 190},{(h >> 16) % 55})"
+
+
+def flamegraph_svg(counts: Dict[str, int], title: str = 'profile') -> str:
+    """
+    Render collapsed stacks as a static SVG flamegraph (root at the bottom)
+    رسم نمودار شعله‌ای از پشته‌های نمونه‌برداری شده
+    """
+    # Merge stacks into a tree: label -> [count, children]
+    root = [0, {}]
+    for stack, count in counts.items():
+        node = root
+        node[0] += count
+        for label in stack.split(';'):
+            node = node[1].setdefault(label, [0, {}])
+            node[0] += count
+
+    total = root[0] or 1
+    scale = SVG_WIDTH / total
+    rects: List[str] = []
+    depth_max = 0
+
+    def visit(children: Dict, x: float, depth: int):
+        nonlocal depth_max
+        for label, (count, grandchildren) in sorted(children.items()):
+            width = count * scale
+            if width >= MIN_FRAME_WIDTH:
+                depth_max = max(depth_max, depth)
+                rects.append((x, depth, width, label, count))
+                visit(grandchildren, x, depth + 1)
+            x += width
+
+    visit(root[1], 0.0, 0)
+
+    height = (depth_max + 1) * FRAME_HEIGHT + 2 * FRAME_HEIGHT
+    body = []
+    for x, depth, width, label, count in rects:
+        y = height - (depth + 1) * FRAME_HEIGHT
+        text = escape(label)
+        tooltip = f"{text} ({count} samples, {100 * count / total:.1f}%)"
+        chars = int(width / 7)
+        shown = text if len(label) <= chars else (escape(label[:chars - 2]) + '..' if chars > 3 else '')
+        body.append(
+            f'<g><title>{tooltip}</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" height="{FRAME_HEIGHT - 1}" '
+            f'fill="{_frame_color(label)}" rx="2"/>'
+            f'<text x="{x + 3:.2f}" y="{y + FRAME_HEIGHT - 4}">{shown}</text></g>'
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<rect width="100%" height="100%" fill="#f8f8f8"/>'
+        f'<text x="{SVG_WIDTH / 2}" y="{FRAME_HEIGHT}" text-anchor="middle" font-size="13">{escape(title)}</text>'
+        + ''.join(body) + '</svg>\n'
+    )
@@ -2,8 +2,20 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
+from functools import wraps
+import threading
 import logging
 
+
+def synchronized(method):
+    """Run a method under the instance's re-entrant lock"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class AdvancedRiskManager:
     """
     Advanced Risk Management System for Forex Trading
@@ -48,9 +60,13 @@ class AdvancedRiskManager:
         self.open_positions = {}
         self.currency_exposure = {}
         
+        # The trading loop, the order executor and the deal tracker all update positions
+        self.lock = threading.RLock()
+        
         # Setup logging
         self.logger = logging.getLogger(__name__)
     
+    @synchronized
     def calculate_position_size(self, symbol: str, entry_price: float, 
                               stop_loss: float, current_balance: float,
                               volatility: float = None) -> float:
@@ -93,13 +109,12 @@ class AdvancedRiskManager:
             final_position_size = min(base_position_size, 2.0)  # Max 2 lots
             final_position_size = max(final_position_size, 0.01)  # Min 0.01 lots
             
-            self.logger.info(f"Position size calculation for {symbol}:")
-            self.logger.info(f"  Base size: {base_position_size:.4f}")
-            self.logger.info(f"  Volatility factor: {volatility_factor if volatility else 1:.4f}")
-            self.logger.info(f"  Drawdown factor: {drawdown_factor:.4f}")
-            self.logger.info(f"  Correlation factor: {correlation_factor:.4f}")
-            self.logger.info(f"  Exposure factor: {exposure_factor:.4f}")
-            self.logger.info(f"  Final size: {final_position_size:.4f}")
+            # Called for every entry signal: one debug record, built only when debug is enabled
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Position size for {symbol}: base {base_position_size:.4f}, "
+                                  f"volatility x{volatility_factor if volatility else 1:.4f}, "
+                                  f"drawdown x{drawdown_factor:.4f}, correlation x{correlation_factor:.4f}, "
+                                  f"exposure x{exposure_factor:.4f}, final {final_position_size:.4f}")
             
             return final_position_size
             
@@ -217,6 +232,7 @@ class AdvancedRiskManager:
             self.logger.error(f"Error calculating exposure adjustment: {e}")
             return 1.0
     
+    @synchronized
     def can_open_position(self, symbol: str, position_size: float, 
                          entry_price: float) -> Tuple[bool, str]:
         """
@@ -310,11 +326,19 @@ class AdvancedRiskManager:
             self.logger.error(f"Error calculating monthly risk: {e}")
             return 0
     
+    @synchronized
     def add_position(self, symbol: str, position_size: float, entry_price: float,
-                    stop_loss: float, take_profit: float, position_type: str):
-        """Add a new position to tracking"""
+                    stop_loss: float, take_profit: float, position_type: str,
+                    position_id: Optional[str] = None, entry_time: Optional[datetime] = None) -> Optional[str]:
+        """
+        Add a new position to tracking and return its id
+
+        Backtests pass their own id and the bar time, so runs do not depend
+        on the wall clock; live positions default to the current time.
+        """
         try:
-            position_id = f"{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            entry_time = entry_time or datetime.now()
+            position_id = position_id or f"{symbol}_{entry_time.strftime('%Y%m%d_%H%M%S')}"
             
             risk_amount = abs(entry_price - stop_loss) * position_size * self._get_pip_cost(symbol)
             
@@ -326,7 +350,7 @@ class AdvancedRiskManager:
                 'stop_loss': stop_loss,
                 'take_profit': take_profit,
                 'type': position_type,
-                'entry_time': datetime.now(),
+                'entry_time': entry_time,
                 'risk_amount': risk_amount,
                 'status': 'open'
             }
@@ -344,11 +368,57 @@ class AdvancedRiskManager:
             # Add to trade history
             self.trade_history.append(position.copy())
             
-            self.logger.info(f"Position added: {position_id}")
+            self.logger.debug("Position added: %s", position_id)
+            
+            return position_id
             
         except Exception as e:
             self.logger.error(f"Error adding position: {e}")
+            return None
+    
+    @synchronized
+    def update_position_entry(self, position_id: str, entry_price: float):
+        """Move a reserved position to its actual fill price"""
+        try:
+            position = self.open_positions.get(position_id)
+            if position is None:
+                return
+            
+            # Exposure follows the position value
+            change = position['size'] * (entry_price - position['entry_price'])
+            for currency in (position['symbol'][:3], position['symbol'][3:]):
+                self.currency_exposure[currency] = max(0, self.currency_exposure.get(currency, 0) + change)
+            
+            position['entry_price'] = entry_price
+            position['risk_amount'] = (abs(entry_price - position['stop_loss']) * position['size'] *
+                                       self._get_pip_cost(position['symbol']))
+            for trade in self.trade_history:
+                if trade['id'] == position_id:
+                    trade.update(position)
+                    break
+            
+        except Exception as e:
+            self.logger.error(f"Error updating position entry: {e}")
     
+    @synchronized
+    def release_position(self, position_id: str):
+        """Drop a reserved position whose order was not filled"""
+        try:
+            position = self.open_positions.pop(position_id, None)
+            if position is None:
+                return
+            
+            position_value = position['size'] * position['entry_price']
+            for currency in (position['symbol'][:3], position['symbol'][3:]):
+                self.currency_exposure[currency] = max(0, self.currency_exposure.get(currency, 0) - position_value)
+            
+            self.trade_history = [trade for trade in self.trade_history if trade['id'] != position_id]
+            self.logger.debug("Position released: %s", position_id)
+            
+        except Exception as e:
+            self.logger.error(f"Error releasing position: {e}")
+    
+    @synchronized
     def close_position(self, position_id: str, close_price: float, close_time: datetime = None):
         """Close a position and update statistics"""
         try:
@@ -395,11 +465,35 @@ class AdvancedRiskManager:
                     trade.update(position)
                     break
             
-            self.logger.info(f"Position closed: {position_id}, P&L: ${pnl:.2f}")
+            self.logger.debug("Position closed: %s, P&L: $%.2f", position_id, pnl)
             
         except Exception as e:
             self.logger.error(f"Error closing position: {e}")
     
+    @synchronized
+    def get_unrealized_pnl(self, quotes: Dict) -> Dict[str, float]:
+        """
+        Floating P&L of open positions per symbol from current quotes
+        
+        Args:
+            quotes: Symbol -> quote with bid/ask (e.g. MarketSnapshot.quotes());
+                positions of symbols without a quote are left out
+        """
+        unrealized = {}
+        for position in list(self.open_positions.values()):
+            quote = quotes.get(position['symbol'])
+            if quote is None:
+                continue
+            # Longs close at the bid, shorts at the ask
+            if position['type'] == 'BUY':
+                move = quote.bid - position['entry_price']
+            else:
+                move = position['entry_price'] - quote.ask
+            pnl = move * position['size'] * self._get_pip_cost(position['symbol'])
+            unrealized[position['symbol']] = unrealized.get(position['symbol'], 0.0) + pnl
+        return unrealized
+    
+    @synchronized
     def get_portfolio_metrics(self) -> Dict:
         """Get comprehensive portfolio performance metrics"""
         try:
@@ -486,6 +580,7 @@ class AdvancedRiskManager:
             self.logger.error(f"Error calculating portfolio metrics: {e}")
             return {}
     
+    @synchronized
     def should_stop_trading(self) -> Tuple[bool, str]:
         """Determine if trading should be stopped due to risk limits"""
         try:
@@ -509,6 +604,7 @@ class AdvancedRiskManager:
             self.logger.error(f"Error checking stop conditions: {e}")
             return True, "Error in risk check - stopping trading"
     
+    @synchronized
     def get_risk_summary(self) -> Dict:
         """Get current risk exposure summary"""
         try:
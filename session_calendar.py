@@ -0,0 +1,254 @@
+import time
+import numpy as np
+import pandas as pd
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+WEEKDAYS = (0, 1, 2, 3, 4)  # Monday=0
+
+# Main forex sessions in local time; the time zone takes care of daylight saving
+SESSIONS = {
+    'sydney': {'start': '07:00', 'end': '16:00', 'timezone': 'Australia/Sydney'},
+    'tokyo': {'start': '09:00', 'end': '18:00', 'timezone': 'Asia/Tokyo'},
+    'london': {'start': '08:00', 'end': '17:00', 'timezone': 'Europe/London'},
+    'new_york': {'start': '08:00', 'end': '17:00', 'timezone': 'America/New_York'},
+}
+
+DAY_NS = 86_400 * 10**9
+
+
+def _minutes(hhmm: str) -> int:
+    """'HH:MM' -> minutes after midnight ('24:00' allowed as an end)"""
+    hours, minutes = hhmm.split(':')
+    value = int(hours) * 60 + int(minutes)
+    if not 0 <= value <= 24 * 60:
+        raise ValueError(f"Invalid time of day: {hhmm}")
+    return value
+
+
+def _to_ns(when) -> int:
+    """Epoch seconds, datetime or Timestamp -> UTC epoch nanoseconds (naive times are UTC)"""
+    if when is None:
+        return time.time_ns()
+    if isinstance(when, (int, float, np.integer, np.floating)):
+        return int(when * 1e9)
+    when = pd.Timestamp(when)
+    if when.tz is None:
+        when = when.tz_localize('UTC')
+    return when.as_unit('ns').value
+
+
+def _merge(opens: np.ndarray, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sort windows and merge overlapping or touching ones"""
+    if len(opens) == 0:
+        return opens, closes
+    order = np.argsort(opens, kind='stable')
+    opens, closes = opens[order], np.maximum.accumulate(closes[order])
+    starts = np.ones(len(opens), dtype=bool)
+    starts[1:] = opens[1:] > closes[:-1]
+    first = np.flatnonzero(starts)
+    last = np.append(first[1:] - 1, len(opens) - 1)
+    return opens[first], closes[last]
+
+
+@dataclass(frozen=True)
+class Session:
+    """
+    A daily trading window in local time
+    یک بازه معاملاتی روزانه به وقت محلی
+
+    A window whose end is not after its start runs past midnight and
+    belongs to the day it opens; ``days`` and holidays refer to that day.
+    """
+    start: str = '00:00'
+    end: str = '24:00'
+    timezone: str = 'UTC'
+    days: Tuple[int, ...] = WEEKDAYS
+
+    def __post_init__(self):
+        object.__setattr__(self, 'days', tuple(int(d) for d in self.days))
+        # Fail on bad times when the config is loaded rather than in the trading loop
+        _minutes(self.start)
+        _minutes(self.end)
+
+    def windows(self, first_day, last_day, holidays: Iterable = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Open and close times (UTC epoch ns) of every window opening between two local dates
+        """
+        start, end = _minutes(self.start), _minutes(self.end)
+        if end <= start:
+            end += 24 * 60
+
+        days = pd.date_range(pd.Timestamp(first_day).normalize(), pd.Timestamp(last_day).normalize(), freq='D')
+        days = days[np.isin(days.weekday, self.days)]
+        holidays = pd.DatetimeIndex(list(holidays))
+        if len(holidays):
+            days = days[~days.isin(holidays.normalize())]
+
+        def utc_ns(minutes: int) -> np.ndarray:
+            local = (days + pd.Timedelta(minutes=minutes)).tz_localize(
+                self.timezone, nonexistent='shift_forward', ambiguous=False
+            )
+            return local.as_unit('ns').asi8
+
+        return utc_ns(start), utc_ns(end)
+
+
+class SessionCalendar:
+    """
+    Trading sessions per symbol with weekend and holiday closures
+    تقویم جلسات معاملاتی هر نماد با تعطیلات آخر هفته و رسمی
+
+    Each symbol trades during the union of its sessions (the default
+    sessions unless configured otherwise). Open/close transitions are
+    precomputed as sorted UTC timestamps, so a lookup is a binary search:
+    the live loop asks when the next session opens and sleeps until then,
+    and the backtester masks whole bar indexes at once.
+    """
+
+    def __init__(self, default: Sequence[Session] = (Session(),), symbols: Optional[Dict[str, Sequence[Session]]] = None,
+                 holidays: Iterable = (), horizon_days: int = 14):
+        """
+        Args:
+            default: Sessions of symbols without their own
+            symbols: Symbol -> its sessions
+            holidays: Dates on which no window opens
+            horizon_days: Days of transitions precomputed for live lookups
+        """
+        self.default = tuple(default)
+        self.symbols = {symbol: tuple(sessions) for symbol, sessions in (symbols or {}).items()}
+        self.holidays = pd.DatetimeIndex([pd.Timestamp(day) for day in holidays]).normalize()
+        self.horizon_days = horizon_days
+        self._schedules = {}  # sessions -> (valid from, valid until, opens, closes)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> 'SessionCalendar':
+        """
+        Build from the trading_hours config section
+
+        ``start``/``end``/``timezone``/``days`` give the default session.
+        ``symbols`` maps a symbol to a session name (built-in SESSIONS or one
+        defined under ``sessions``), a list of names, or a session dict.
+        """
+        config = config or {}
+        timezone = config.get('timezone', 'UTC')
+        days = tuple(config.get('days', WEEKDAYS))
+        named = {**SESSIONS, **config.get('sessions', {})}
+
+        def session(spec: Dict) -> Session:
+            return Session(spec.get('start', '00:00'), spec.get('end', '24:00'),
+                           spec.get('timezone', timezone), tuple(spec.get('days', days)))
+
+        def sessions(spec: Union[str, Dict, Sequence]) -> List[Session]:
+            if isinstance(spec, str):
+                if spec not in named:
+                    raise ValueError(f"Unknown session: {spec}")
+                return [session(named[spec])]
+            if isinstance(spec, dict):
+                return [session(spec)]
+            return [s for item in spec for s in sessions(item)]
+
+        default = [session(config)] if 'start' in config or 'end' in config else [Session(timezone=timezone, days=days)]
+        return cls(
+            default=default,
+            symbols={symbol: sessions(spec) for symbol, spec in config.get('symbols', {}).items()},
+            holidays=config.get('holidays', ())
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'default': [asdict(session) for session in self.default],
+            'symbols': {symbol: [asdict(session) for session in sessions]
+                        for symbol, sessions in sorted(self.symbols.items())},
+            'holidays': [str(day.date()) for day in self.holidays],
+        }
+
+    def sessions_for(self, symbol: Optional[str] = None) -> Tuple[Session, ...]:
+        return self.symbols.get(symbol, self.default)
+
+    def schedule(self, symbol: Optional[str], start, end) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Merged open/close times (UTC epoch ns) of windows overlapping [start, end]
+        """
+        return self._schedule(symbol, _to_ns(start), _to_ns(end))
+
+    def _schedule(self, symbol: Optional[str], start_ns: int, end_ns: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Local dates differ from UTC by up to a day, and overnight windows open the day before
+        first_day = pd.Timestamp(start_ns - 2 * DAY_NS)
+        last_day = pd.Timestamp(end_ns + DAY_NS)
+
+        opens, closes = [], []
+        for session in self.sessions_for(symbol):
+            o, c = session.windows(first_day, last_day, self.holidays)
+            opens.append(o)
+            closes.append(c)
+        return _merge(np.concatenate(opens), np.concatenate(closes))
+
+    def _cached(self, symbol: Optional[str], now: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Precomputed schedule around now, rebuilt once now leaves its range"""
+        key = self.sessions_for(symbol)
+        cached = self._schedules.get(key)
+        if cached is None or not cached[0] <= now <= cached[1]:
+            opens, closes = self._schedule(symbol, now - DAY_NS, now + self.horizon_days * DAY_NS)
+            # Rebuilt halfway through, so next_open always sees at least half the horizon ahead
+            cached = (now - DAY_NS, now + self.horizon_days * DAY_NS // 2, opens, closes)
+            self._schedules[key] = cached
+        return cached[2], cached[3]
+
+    def _window(self, symbol: Optional[str], now: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        opens, closes = self._cached(symbol, now)
+        return opens, closes, int(np.searchsorted(opens, now, side='right')) - 1
+
+    def is_open(self, symbol: Optional[str] = None, when=None) -> bool:
+        now = _to_ns(when)
+        opens, closes, i = self._window(symbol, now)
+        return bool(i >= 0 and now < closes[i])
+
+    def next_open(self, symbol: Optional[str] = None, when=None) -> Optional[pd.Timestamp]:
+        """Start of the next window (``when`` itself if a window is open), None if none is scheduled"""
+        now = _to_ns(when)
+        opens, closes, i = self._window(symbol, now)
+        if i >= 0 and now < closes[i]:
+            return pd.Timestamp(now, tz='UTC')
+        return pd.Timestamp(int(opens[i + 1]), tz='UTC') if i + 1 < len(opens) else None
+
+    def next_close(self, symbol: Optional[str] = None, when=None) -> Optional[pd.Timestamp]:
+        """End of the current window, or of the next one while closed"""
+        now = _to_ns(when)
+        opens, closes, i = self._window(symbol, now)
+        if i < 0 or now >= closes[i]:
+            i += 1
+        return pd.Timestamp(int(closes[i]), tz='UTC') if i < len(closes) else None
+
+    def seconds_until_open(self, symbols: Sequence[Optional[str]] = (None,), when=None) -> float:
+        """Seconds until any of the symbols can trade (0 if one already can)"""
+        now = pd.Timestamp(_to_ns(when), tz='UTC')
+        opens = [self.next_open(symbol, now) for symbol in symbols]
+        waits = [(next_open - now).total_seconds() for next_open in opens if next_open is not None]
+        return min(waits) if waits else float(self.horizon_days * 86_400)
+
+    def mask(self, index: pd.DatetimeIndex, symbol: Optional[str] = None) -> np.ndarray:
+        """
+        Which bars fall inside the symbol's sessions (naive times are UTC)
+        تعیین کندل‌های داخل ساعات معاملاتی به صورت برداری
+        """
+        if len(index) == 0:
+            return np.zeros(0, dtype=bool)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        times = index.as_unit('ns').asi8
+        opens, closes = self._schedule(symbol, int(times.min()), int(times.max()))
+        if len(opens) == 0:
+            return np.zeros(len(times), dtype=bool)
+        i = np.searchsorted(opens, times, side='right') - 1
+        return (i >= 0) & (times < closes[np.maximum(i, 0)])
+
+    def status(self, symbols: Sequence[str], when=None) -> Dict[str, Dict]:
+        """Per symbol: open now, and when that next changes"""
+        now = pd.Timestamp(_to_ns(when), tz='UTC')
+        result = {}
+        for symbol in symbols:
+            is_open = self.is_open(symbol, now)
+            change = self.next_close(symbol, now) if is_open else self.next_open(symbol, now)
+            result[symbol] = {'open': is_open, 'next_change': change.isoformat() if change is not None else None}
+        return result
@@ -0,0 +1,692 @@
+"""
+Simulated MetaTrader5 broker for offline and load testing
+شبیه‌ساز بروکر متاتریدر 5 برای تست آفلاین و تست بار
+
+Implements the subset of the ``MetaTrader5`` package used by the bot
+(initialize, login, shutdown, last_error, copy_rates_from_pos, account_info,
+symbol_info_tick, order_send, positions_get, history_deals_get) on top of
+recorded or synthetic bars. A simulated clock runs ``speed`` times faster
+than wall time, so the live loop can be soak-tested without a terminal.
+
+Usage::
+
+    import simulated_mt5
+    simulated_mt5.install(speed=100)   # before importing the trading modules
+    from live_trader import LiveForexTrader
+"""
+
+import sys
+import time
+import zlib
+import threading
+import logging
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# MetaTrader5 constants used by the bot
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+DEAL_ENTRY_INOUT = 2
+DEAL_ENTRY_OUT_BY = 3
+
+TRADE_ACTION_DEAL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60,
+    TIMEFRAME_M5: 300,
+    TIMEFRAME_M15: 900,
+    TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600,
+    TIMEFRAME_H4: 14400,
+    TIMEFRAME_D1: 86400,
+}
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+    ('close', '<f8'), ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+AccountInfo = namedtuple('AccountInfo', 'login balance equity profit margin margin_free margin_level leverage currency server')
+OrderSendResult = namedtuple('OrderSendResult', 'retcode deal order volume price bid ask comment request_id request')
+TradePosition = namedtuple('TradePosition', 'ticket time type magic volume price_open sl tp price_current profit symbol comment')
+TradeDeal = namedtuple('TradeDeal', 'ticket order time type entry magic position_id volume price commission swap profit symbol comment')
+
+DEFAULT_PRICES = {
+    'EURUSD': 1.08, 'GBPUSD': 1.27, 'USDJPY': 150.0, 'USDCHF': 0.88,
+    'AUDUSD': 0.66, 'USDCAD': 1.36, 'NZDUSD': 0.61, 'EURGBP': 0.85,
+    'EURJPY': 162.0, 'GBPJPY': 190.0,
+}
+
+CURRENCIES = ['EUR', 'USD', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'NZD']
+
+
+def make_symbols(count: int) -> List[str]:
+    """Build ``count`` distinct six-letter currency pair names"""
+    symbols = [s for s in DEFAULT_PRICES]
+    for base in CURRENCIES:
+        for quote in CURRENCIES:
+            pair = base + quote
+            if base != quote and pair not in symbols:
+                symbols.append(pair)
+    if count > len(symbols):
+        raise ValueError(f"At most {len(symbols)} symbols can be generated")
+    return symbols[:count]
+
+
+class SimulatedBroker:
+    """
+    In-memory broker driven by recorded or synthetic bars
+    بروکر درون‌حافظه‌ای مبتنی بر داده‌های ضبط‌شده یا مصنوعی
+    """
+
+    def __init__(self, speed: float = 1.0, start_time: Optional[datetime] = None,
+                 base_timeframe: int = TIMEFRAME_M5, history_days: int = 120,
+                 duration_days: int = 30, initial_balance: float = 10000,
+                 leverage: int = 100, seed: int = 42, requote_probability: float = 0.0):
+        """
+        Initialize the simulated broker
+
+        Args:
+            speed: Simulated seconds per wall-clock second
+            start_time: Simulated time at startup (default: now)
+            base_timeframe: Resolution of generated bars; higher timeframes are aggregated
+            history_days: History generated before start_time
+            duration_days: Simulated time generated after start_time
+            initial_balance: Account starting balance
+            leverage: Account leverage
+            seed: Base seed for synthetic data
+            requote_probability: Chance an order is requoted (exercises retry paths)
+        """
+        self.speed = speed
+        self.base_timeframe = base_timeframe
+        self.base_seconds = TIMEFRAME_SECONDS[base_timeframe]
+        self.history_days = history_days
+        self.duration_days = duration_days
+        self.leverage = leverage
+        self.seed = seed
+        self.requote_probability = requote_probability
+
+        start = int(start_time.timestamp()) if start_time else int(time.time())
+        self.start_ts = start // self.base_seconds * self.base_seconds
+        self.wall_start = time.monotonic()
+
+        # Market data: symbol -> base bars, (symbol, timeframe) -> (aggregated bars, group starts)
+        self.bars = {}
+        self.aggregates = {}
+
+        # Account state
+        self.balance = float(initial_balance)
+        self.positions = {}
+        self.deals = []
+        self.next_ticket = 1
+        self.last_checked = {}
+
+        self.connected = False
+        self.error = (1, 'Success')
+        self.rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    # ---------------------------------------------------------------- clock
+
+    def now(self) -> int:
+        """Current simulated time in epoch seconds"""
+        return self.start_ts + int((time.monotonic() - self.wall_start) * self.speed)
+
+    def set_speed(self, speed: float):
+        """Change speed without jumping the clock"""
+        with self._lock:
+            current = self.now()
+            self.start_ts = current
+            self.wall_start = time.monotonic()
+            self.speed = speed
+
+    # ---------------------------------------------------------- market data
+
+    def _digits(self, symbol: str) -> int:
+        return 3 if 'JPY' in symbol else 5
+
+    def _initial_price(self, symbol: str) -> float:
+        if symbol in DEFAULT_PRICES:
+            return DEFAULT_PRICES[symbol]
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        return float(rng.uniform(100, 160)) if 'JPY' in symbol else float(rng.uniform(0.6, 1.6))
+
+    def generate_bars(self, symbol: str, annual_volatility: float = 0.08,
+                      spread_points: int = 12) -> np.ndarray:
+        """Generate a synthetic geometric Brownian motion bar series for a symbol"""
+        period = self.base_seconds
+        first = self.start_ts - self.history_days * 86400
+        count = (self.history_days + self.duration_days) * 86400 // period
+
+        rng = np.random.default_rng((self.seed, zlib.crc32(symbol.encode())))
+        sigma = annual_volatility * np.sqrt(period / (365 * 86400))
+
+        # Volatility clustering: slowly varying volatility multiplier
+        vol_state = np.exp(np.convolve(rng.standard_normal(count), np.ones(50) / 50, mode='same') * 2.0)
+        log_returns = rng.standard_normal(count) * sigma * vol_state - 0.5 * (sigma * vol_state) ** 2
+
+        close = self._initial_price(symbol) * np.exp(np.cumsum(log_returns))
+        open_ = np.empty_like(close)
+        open_[0] = self._initial_price(symbol)
+        open_[1:] = close[:-1]
+        wick = np.abs(rng.standard_normal((2, count))) * sigma * vol_state * 0.5
+
+        bars = np.zeros(count, dtype=RATES_DTYPE)
+        bars['time'] = first + np.arange(count, dtype=np.int64) * period
+        bars['open'] = open_
+        bars['close'] = close
+        bars['high'] = np.maximum(open_, close) * np.exp(wick[0])
+        bars['low'] = np.minimum(open_, close) * np.exp(-wick[1])
+        bars['tick_volume'] = rng.poisson(60 * period / 300, count) + 1
+        bars['spread'] = spread_points
+
+        digits = self._digits(symbol)
+        for field in ('open', 'high', 'low', 'close'):
+            bars[field] = np.round(bars[field], digits)
+
+        return bars
+
+    def load_bars(self, symbol: str, data, spread_points: int = 12):
+        """
+        Load recorded bars for a symbol
+
+        Args:
+            symbol: Symbol name
+            data: DataFrame (time index or 'time' column) or CSV path with
+                  open/high/low/close/tick_volume columns at the base timeframe;
+                  pass a start_time inside the recorded range to the broker
+            spread_points: Spread used when the data has no spread column
+        """
+        if isinstance(data, str):
+            data = pd.read_csv(data)
+
+        df = data.reset_index() if 'time' not in data.columns else data
+        if 'time' not in df.columns:
+            df = df.rename(columns={df.columns[0]: 'time'})
+
+        times = pd.to_datetime(df['time']).astype('int64') // 10**9
+        bars = np.zeros(len(df), dtype=RATES_DTYPE)
+        bars['time'] = times.values
+        for field in ('open', 'high', 'low', 'close'):
+            bars[field] = df[field].values
+        volume = df['tick_volume'] if 'tick_volume' in df.columns else df.get('volume', 0)
+        bars['tick_volume'] = np.asarray(volume, dtype=np.float64).astype(np.uint64)
+        bars['spread'] = df['spread'].values if 'spread' in df.columns else spread_points
+
+        with self._lock:
+            self.bars[symbol] = bars
+            self.aggregates = {k: v for k, v in self.aggregates.items() if k[0] != symbol}
+
+    def _get_bars(self, symbol: str) -> np.ndarray:
+        bars = self.bars.get(symbol)
+        if bars is None:
+            bars = self.generate_bars(symbol)
+            self.bars[symbol] = bars
+        return bars
+
+    def _aggregate(self, symbol: str, timeframe: int):
+        """Aggregate base bars to a higher timeframe (cached)"""
+        key = (symbol, timeframe)
+        cached = self.aggregates.get(key)
+        if cached is not None:
+            return cached
+
+        base = self._get_bars(symbol)
+        period = TIMEFRAME_SECONDS[timeframe]
+        bucket = base['time'] // period
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+        agg = np.zeros(len(starts), dtype=RATES_DTYPE)
+        agg['time'] = bucket[starts] * period
+        agg['open'] = base['open'][starts]
+        agg['high'] = np.maximum.reduceat(base['high'], starts)
+        agg['low'] = np.minimum.reduceat(base['low'], starts)
+        agg['close'] = base['close'][np.r_[starts[1:] - 1, len(base) - 1]]
+        agg['tick_volume'] = np.add.reduceat(base['tick_volume'], starts)
+        agg['spread'] = base['spread'][starts]
+
+        self.aggregates[key] = (agg, starts)
+        return agg, starts
+
+    def _visible_bars(self, symbol: str, timeframe: int, now: int) -> np.ndarray:
+        """Bars up to the simulated clock, with the last bar still forming"""
+        base = self._get_bars(symbol)
+        n_base = int(np.searchsorted(base['time'], now, side='right'))
+        if n_base == 0:
+            return base[:0]
+
+        period = TIMEFRAME_SECONDS[timeframe]
+        if period <= self.base_seconds:
+            return base[:n_base]
+
+        agg, starts = self._aggregate(symbol, timeframe)
+        current = int(np.searchsorted(agg['time'], now, side='right')) - 1
+
+        forming = base[starts[current]:n_base]
+        last = np.zeros(1, dtype=RATES_DTYPE)
+        last['time'] = agg['time'][current]
+        last['open'] = forming['open'][0]
+        last['high'] = forming['high'].max()
+        last['low'] = forming['low'].min()
+        last['close'] = forming['close'][-1]
+        last['tick_volume'] = forming['tick_volume'].sum()
+        last['spread'] = forming['spread'][-1]
+
+        return np.concatenate([agg[:current], last])
+
+    def _price_at(self, symbol: str, now: int):
+        """Bid price and spread at a simulated time, interpolated inside the base bar"""
+        base = self._get_bars(symbol)
+        i = max(int(np.searchsorted(base['time'], now, side='right')) - 1, 0)
+        bar = base[i]
+        fraction = min(max((now - bar['time']) / self.base_seconds, 0.0), 1.0)
+        bid = bar['open'] + (bar['close'] - bar['open']) * fraction
+        point = 10 ** -self._digits(symbol)
+        return round(float(bid), self._digits(symbol)), int(bar['spread']) * point
+
+    # ------------------------------------------------------------ positions
+
+    def _contract_profit(self, symbol: str, direction: int, price_open: float,
+                         price_close: float, volume: float) -> float:
+        """Profit in account currency (USD) for a price move"""
+        profit = (price_close - price_open) * direction * volume * 100000
+        if symbol[3:] != 'USD':
+            profit /= price_close
+        return profit
+
+    def _update_positions(self, now: int):
+        """Trigger stop losses and take profits hit since the last check"""
+        for ticket in list(self.positions):
+            position = self.positions[ticket]
+            base = self._get_bars(position['symbol'])
+            since = self.last_checked.get(ticket, position['time'])
+            lo = int(np.searchsorted(base['time'], since, side='right'))
+            hi = int(np.searchsorted(base['time'], now, side='right'))
+            self.last_checked[ticket] = now
+            if hi <= lo:
+                continue
+
+            highs = base['high'][lo:hi]
+            lows = base['low'][lo:hi]
+            is_buy = position['type'] == POSITION_TYPE_BUY
+            sl, tp = position['sl'], position['tp']
+
+            if is_buy:
+                sl_hit = lows <= sl if sl else np.zeros(len(lows), dtype=bool)
+                tp_hit = highs >= tp if tp else np.zeros(len(highs), dtype=bool)
+            else:
+                sl_hit = highs >= sl if sl else np.zeros(len(highs), dtype=bool)
+                tp_hit = lows <= tp if tp else np.zeros(len(lows), dtype=bool)
+
+            hit = sl_hit | tp_hit
+            if hit.any():
+                first = int(np.argmax(hit))
+                price = sl if sl_hit[first] else tp
+                self._close_position(ticket, price, int(base['time'][lo + first]), 'sl' if sl_hit[first] else 'tp')
+
+    def _close_position(self, ticket: int, price: float, when: int, comment: str):
+        position = self.positions.pop(ticket)
+        self.last_checked.pop(ticket, None)
+        direction = 1 if position['type'] == POSITION_TYPE_BUY else -1
+        profit = self._contract_profit(position['symbol'], direction, position['price_open'],
+                                       price, position['volume'])
+        self.balance += profit
+
+        self.deals.append(TradeDeal(
+            ticket=self.next_ticket, order=self.next_ticket, time=when,
+            type=DEAL_TYPE_SELL if direction == 1 else DEAL_TYPE_BUY, entry=DEAL_ENTRY_OUT,
+            magic=position['magic'], position_id=ticket, volume=position['volume'],
+            price=price, commission=0.0, swap=0.0, profit=profit,
+            symbol=position['symbol'], comment=comment
+        ))
+        self.next_ticket += 1
+
+    def _floating_profit(self, now: int) -> float:
+        total = 0.0
+        for position in self.positions.values():
+            bid, spread = self._price_at(position['symbol'], now)
+            is_buy = position['type'] == POSITION_TYPE_BUY
+            price = bid if is_buy else bid + spread
+            total += self._contract_profit(position['symbol'], 1 if is_buy else -1,
+                                           position['price_open'], price, position['volume'])
+        return total
+
+    # ------------------------------------------------------------- MT5 API
+
+    def initialize(self, *args, **kwargs) -> bool:
+        self.connected = True
+        return True
+
+    def login(self, *args, **kwargs) -> bool:
+        return self.connected
+
+    def shutdown(self):
+        self.connected = False
+
+    def last_error(self):
+        return self.error
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int):
+        with self._lock:
+            if timeframe not in TIMEFRAME_SECONDS:
+                self.error = (-2, 'Invalid timeframe')
+                return None
+
+            bars = self._visible_bars(symbol, timeframe, self.now())
+            end = len(bars) - start_pos
+            if end <= 0:
+                return bars[:0].copy()
+            return bars[max(0, end - count):end].copy()
+
+    def symbol_info_tick(self, symbol: str):
+        with self._lock:
+            now = self.now()
+            bid, spread = self._price_at(symbol, now)
+            return Tick(time=now, bid=bid, ask=round(bid + spread, self._digits(symbol)), last=0.0,
+                        volume=0, time_msc=now * 1000, flags=6, volume_real=0.0)
+
+    def account_info(self):
+        with self._lock:
+            now = self.now()
+            self._update_positions(now)
+            profit = self._floating_profit(now)
+            margin = sum(p['volume'] * 100000 / self.leverage for p in self.positions.values())
+            equity = self.balance + profit
+            return AccountInfo(
+                login=1, balance=round(self.balance, 2), equity=round(equity, 2),
+                profit=round(profit, 2), margin=margin, margin_free=equity - margin,
+                margin_level=equity / margin * 100 if margin else 0.0,
+                leverage=self.leverage, currency='USD', server='Simulated'
+            )
+
+    def order_send(self, request: Dict):
+        with self._lock:
+            now = self.now()
+            self._update_positions(now)
+
+            def result(retcode, comment, price=0.0, deal=0, order=0, bid=0.0, ask=0.0):
+                return OrderSendResult(retcode=retcode, deal=deal, order=order,
+                                       volume=request.get('volume', 0.0), price=price, bid=bid, ask=ask,
+                                       comment=comment, request_id=0, request=request)
+
+            symbol = request.get('symbol')
+            volume = float(request.get('volume', 0))
+            if request.get('action') != TRADE_ACTION_DEAL or not symbol:
+                return result(TRADE_RETCODE_INVALID, 'Invalid request')
+            if volume <= 0:
+                return result(TRADE_RETCODE_INVALID_VOLUME, 'Invalid volume')
+
+            bid, spread = self._price_at(symbol, now)
+            ask = round(bid + spread, self._digits(symbol))
+            is_buy = request.get('type') == ORDER_TYPE_BUY
+            market_price = ask if is_buy else bid
+            point = 10 ** -self._digits(symbol)
+
+            requested = request.get('price') or market_price
+            deviation = request.get('deviation', 10) * point
+            if abs(requested - market_price) > deviation or self.rng.random() < self.requote_probability:
+                return result(TRADE_RETCODE_REQUOTE, 'Requote', bid=bid, ask=ask)
+
+            ticket = self.next_ticket
+            self.next_ticket += 1
+
+            # Closing an existing position
+            if request.get('position'):
+                if request['position'] not in self.positions:
+                    return result(TRADE_RETCODE_INVALID, 'Position not found')
+                self._close_position(request['position'], market_price, now, request.get('comment', ''))
+                return result(TRADE_RETCODE_DONE, 'Request executed', market_price, ticket, ticket, bid, ask)
+
+            margin_needed = volume * 100000 / self.leverage
+            if margin_needed > self.balance + self._floating_profit(now):
+                return result(TRADE_RETCODE_NO_MONEY, 'No money')
+
+            self.positions[ticket] = {
+                'ticket': ticket, 'time': now, 'symbol': symbol, 'volume': volume,
+                'type': POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL,
+                'price_open': market_price, 'sl': request.get('sl', 0.0), 'tp': request.get('tp', 0.0),
+                'magic': request.get('magic', 0), 'comment': request.get('comment', '')
+            }
+            self.deals.append(TradeDeal(
+                ticket=ticket, order=ticket, time=now, type=DEAL_TYPE_BUY if is_buy else DEAL_TYPE_SELL,
+                entry=DEAL_ENTRY_IN, magic=request.get('magic', 0), position_id=ticket, volume=volume,
+                price=market_price, commission=0.0, swap=0.0, profit=0.0, symbol=symbol,
+                comment=request.get('comment', '')
+            ))
+
+            return result(TRADE_RETCODE_DONE, 'Request executed', market_price, ticket, ticket, bid, ask)
+
+    def positions_get(self, symbol: str = None, ticket: int = None, group: str = None):
+        with self._lock:
+            now = self.now()
+            self._update_positions(now)
+
+            positions = []
+            for position in self.positions.values():
+                if symbol and position['symbol'] != symbol:
+                    continue
+                if ticket and position['ticket'] != ticket:
+                    continue
+
+                bid, spread = self._price_at(position['symbol'], now)
+                is_buy = position['type'] == POSITION_TYPE_BUY
+                current = bid if is_buy else bid + spread
+                positions.append(TradePosition(
+                    ticket=position['ticket'], time=position['time'], type=position['type'],
+                    magic=position['magic'], volume=position['volume'],
+                    price_open=position['price_open'], sl=position['sl'], tp=position['tp'],
+                    price_current=current,
+                    profit=self._contract_profit(position['symbol'], 1 if is_buy else -1,
+                                                 position['price_open'], current, position['volume']),
+                    symbol=position['symbol'], comment=position['comment']
+                ))
+            return tuple(positions)
+
+    def history_deals_get(self, date_from=None, date_to=None, group: str = None,
+                          ticket: int = None, position: int = None):
+        with self._lock:
+            self._update_positions(self.now())
+
+            def to_ts(value):
+                if value is None:
+                    return None
+                return int(value.timestamp()) if isinstance(value, datetime) else int(value)
+
+            start, end = to_ts(date_from), to_ts(date_to)
+            deals = []
+            for deal in self.deals:
+                if start is not None and deal.time < start:
+                    continue
+                if end is not None and deal.time > end:
+                    continue
+                if ticket is not None and deal.ticket != ticket:
+                    continue
+                if position is not None and deal.position_id != position:
+                    continue
+                deals.append(deal)
+            return tuple(deals)
+
+
+# Default broker instance backing the module-level MT5-compatible API
+_broker = SimulatedBroker()
+
+
+def configure(**kwargs) -> SimulatedBroker:
+    """Replace the default broker (see SimulatedBroker for arguments)"""
+    global _broker
+    _broker = SimulatedBroker(**kwargs)
+    return _broker
+
+
+def get_broker() -> SimulatedBroker:
+    return _broker
+
+
+def initialize(*args, **kwargs):
+    return _broker.initialize(*args, **kwargs)
+
+
+def login(*args, **kwargs):
+    return _broker.login(*args, **kwargs)
+
+
+def shutdown():
+    return _broker.shutdown()
+
+
+def last_error():
+    return _broker.last_error()
+
+
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    return _broker.copy_rates_from_pos(symbol, timeframe, start_pos, count)
+
+
+def symbol_info_tick(symbol):
+    return _broker.symbol_info_tick(symbol)
+
+
+def account_info():
+    return _broker.account_info()
+
+
+def order_send(request):
+    return _broker.order_send(request)
+
+
+def positions_get(*args, **kwargs):
+    return _broker.positions_get(*args, **kwargs)
+
+
+def history_deals_get(*args, **kwargs):
+    return _broker.history_deals_get(*args, **kwargs)
+
+
+def install(**kwargs) -> SimulatedBroker:
+    """
+    Register this module as ``MetaTrader5`` so the bot runs against the simulator
+
+    Call before importing the trading modules; already-imported modules are patched too.
+    """
+    broker = configure(**kwargs) if kwargs else _broker
+    module = sys.modules[__name__]
+    sys.modules['MetaTrader5'] = module
+
+    for name in ('forex_trading_bot', 'order_executor', 'live_trader'):
+        loaded = sys.modules.get(name)
+        if loaded is not None and hasattr(loaded, 'mt5'):
+            loaded.mt5 = module
+
+    return broker
+
+
+def run_load_test(symbols: int = 50, speed: float = 100.0, duration: float = 60.0,
+                  config_file: str = "loadtest_config.json", profile: bool = False) -> Dict:
+    """
+    Soak-test the live trading loop against the simulator
+    تست بار حلقه معاملات زنده با بروکر شبیه‌سازی‌شده
+
+    Args:
+        symbols: Number of symbols to trade
+        speed: Simulated seconds per wall-clock second
+        duration: Wall-clock seconds to run
+        config_file: Config file written for the run
+        profile: Run the sampling profiler and write a flamegraph when done
+    """
+    import json
+
+    install(speed=speed)
+    from live_trader import LiveForexTrader
+
+    config = {
+        "trading": {
+            "symbols": make_symbols(symbols),
+            "confidence_threshold": 75.0,
+            "max_concurrent_trades": symbols,
+            # The simulator runs on the wall clock, so never close the session
+            "trading_hours": {"start": "00:00", "end": "24:00", "timezone": "UTC", "days": list(range(7))}
+        },
+        "monitoring": {
+            # One M15 bar of simulated time per cycle
+            "update_interval": max(TIMEFRAME_SECONDS[TIMEFRAME_M15] / speed, 0.1),
+            "save_stats_interval": 3600,
+            "backup_interval": 86400,
+            "metrics_enabled": False
+        },
+        "profiling": {
+            "enabled": profile,
+            "interval_ms": 10,
+            "output_dir": "logs/profiles",
+            "slow_cycle_seconds": None
+        }
+    }
+    with open(config_file, 'w') as f:
+        json.dump(config, f, indent=4)
+
+    trader = LiveForexTrader(config_file)
+    trader.start_trading(run_validation=False)
+
+    try:
+        time.sleep(duration)
+        profiler_stats = trader.profiler.get_stats() if profile else None
+    finally:
+        trader.stop_trading()
+
+    return {
+        'symbols': symbols,
+        'speed': speed,
+        'simulated_seconds': duration * speed,
+        'account': _broker.account_info()._asdict(),
+        'deals': len(_broker.deals),
+        'metrics': trader.metrics.get_summary(),
+        'profiler': profiler_stats
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Load-test the live loop against a simulated MT5 broker")
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--speed', type=float, default=100.0)
+    parser.add_argument('--duration', type=float, default=60.0, help="wall-clock seconds")
+    parser.add_argument('--profile', action='store_true', help="write a flamegraph to logs/profiles")
+    args = parser.parse_args()
+
+    report = run_load_test(args.symbols, args.speed, args.duration, profile=args.profile)
+    print(json.dumps(report, indent=2, default=str))